@@ -0,0 +1,63 @@
+-- Unique key on audit_agent_submissions for bulk agent result upserts
+-- Run this in Supabase SQL Editor (or psql against a local Postgres)
+--
+-- findings_writer.py writes agent results with
+-- POST /audit_agent_submissions?on_conflict=session_id,audit_item_id,
+-- which PostgREST turns into INSERT ... ON CONFLICT (session_id, audit_item_id).
+-- Postgres only accepts that with a unique index on exactly those columns.
+-- Existing duplicate rows are moved to audit_agent_submissions_duplicates_archive
+-- first; nothing is deleted without a copy. SubmitForReview.jsx writes with
+-- the same key (upsert on session_id,audit_item_id).
+
+-- Agent result columns (no-ops where they already exist)
+ALTER TABLE audit_agent_submissions
+ADD COLUMN IF NOT EXISTS ai_agent_name TEXT,
+ADD COLUMN IF NOT EXISTS status TEXT,
+ADD COLUMN IF NOT EXISTS ai_score NUMERIC,
+ADD COLUMN IF NOT EXISTS ai_analysis TEXT,
+ADD COLUMN IF NOT EXISTS ai_status TEXT DEFAULT 'Pending';
+
+BEGIN;
+
+-- Older rows per (session_id, audit_item_id) are moved here, not dropped,
+-- so the index can be built without losing any submission
+CREATE TABLE IF NOT EXISTS audit_agent_submissions_duplicates_archive (
+    LIKE audit_agent_submissions
+);
+ALTER TABLE audit_agent_submissions_duplicates_archive
+ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+-- Keep the newest row in place; move every older one to the archive.
+-- Rows with a NULL created_at are never matched, so duplicates among them
+-- are left in place and CREATE UNIQUE INDEX below fails (and rolls back)
+-- instead of guessing which one to keep.
+WITH moved AS (
+    DELETE FROM audit_agent_submissions older
+    USING audit_agent_submissions newer
+    WHERE older.session_id = newer.session_id
+      AND older.audit_item_id = newer.audit_item_id
+      AND (older.created_at, older.ctid) < (newer.created_at, newer.ctid)
+    RETURNING older.*
+)
+INSERT INTO audit_agent_submissions_duplicates_archive
+SELECT moved.*, now() FROM moved;
+
+CREATE UNIQUE INDEX IF NOT EXISTS audit_agent_submissions_session_item_key
+ON audit_agent_submissions (session_id, audit_item_id);
+
+COMMIT;
+
+-- Let PostgREST see the new index without a restart
+NOTIFY pgrst, 'reload schema';
+
+-- Review what was archived (an empty result means there were no duplicates)
+SELECT session_id, audit_item_id, count(*) AS archived_rows
+FROM audit_agent_submissions_duplicates_archive
+GROUP BY session_id, audit_item_id
+ORDER BY session_id, audit_item_id;
+
+-- Verify the index exists
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'audit_agent_submissions'
+AND indexname = 'audit_agent_submissions_session_item_key';
@@ -5,31 +5,211 @@ This module demonstrates how to implement run_master_audit() function
 that routes Code on Wages and OSH Code items to specialist agents
 
 Installation:
-pip install fastapi uvicorn pydantic python-dateutil
+pip install fastapi uvicorn "pydantic>=2" python-dateutil numpy orjson httpx
 
 Usage:
-Copy this code into your src/api.py file in the Universal_Subject_Expert_Agent project
+Copy this code into your src/api.py file in the Universal_Subject_Expert_Agent project,
+or run it with `python serve.py orchestrator --workers N` (see serve.py)
+
+Configuration (environment variables):
+AGENT_CONCURRENCY_LIMIT - max specialist agents running at once (default 8)
+AGENT_TIMEOUT_SECONDS   - per-agent timeout in seconds (default 120)
+AGENT_EXECUTOR_THREADS  - threads for blocking agent clients (default 2 x AGENT_CONCURRENCY_LIMIT)
+AGENT_CHUNK_*           - agent request sizing (see agent_scheduler.py)
+FINDING_CACHE_*         - finding cache settings (see result_cache.py)
+IDEMPOTENCY_*           - duplicate submission window (see idempotency.py)
+EVIDENCE_*              - evidence prefetch and cache (see evidence_fetcher.py)
+SESSION_STORE_PATH      - session report aggregates (see session_aggregates.py)
+FINDINGS_*              - upserts of agent results into audit_agent_submissions (see findings_writer.py)
+BATCH_VERSION_STORE_PATH - stored batches for delta resubmission (see batch_versions.py)
+ACT_SEARCH_*            - catalogue search index (see act_search.py)
+ADMISSION_*             - item budgets and admission queue (see admission.py)
+AUDIT_LOG_*             - log level, JSON/text format and item sampling (see audit_logging.py)
+
+Metrics:
+GET /metrics serves Prometheus metrics (see metrics.py): per-stage timings
+(master_audit_stage_seconds), agent latency by act, audit duration and item
+counts by batch size, items routed per act and in-flight gauges.
+master_audit_agent_threads_abandoned counts blocking agent calls still
+running after their caller timed out: a timeout cannot stop a thread, so
+each one holds an AGENT_EXECUTOR_THREADS thread until the agent returns.
+
+Logging:
+Logs go through a queue to a background thread (see audit_logging.py) as
+structured events tagged with the batch_id and session_id being audited:
+one event per batch stage and per act, never one per item. Per-item
+routing and finding events are DEBUG-only and sampled. Logging is set up
+by the app's startup hook, not on import.
+
+Persistence:
+With a PostgREST URL configured (SUPABASE_REST_URL or VITE_SUPABASE_URL),
+each act's results are buffered as it finishes and upserted into
+audit_agent_submissions in batches of FINDINGS_WRITER_BATCH_SIZE rows,
+keyed by (session_id, audit_item_id); the persist stage after synthesis
+sends the remainder and waits for that audit's writes only. Concurrent
+audits share the loop's writer but each buffers, awaits and counts its own
+rows (a FindingsBatch, see findings_writer.py).
+
+Admission control:
+/run-master-audit (and its delta and stream variants) and master runs
+through /invoke-agent are admitted against item budgets (see admission.py).
+A batch that does not fit waits in a bounded priority queue; when that is
+full too the request gets 429 with a Retry-After header. Replays of a
+finished submission are served without being admitted again.
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Optional, Any
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import List, Dict, Optional, Any, Callable, AsyncIterator, AsyncIterable, Literal, Tuple
+from typing_extensions import TypedDict, Required
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import inspect
 import logging
+import os
+import time
+import weakref
+
+import fast_json
+from admission import (
+    AdmissionController, AdmissionRejected, AdmittedStreamingResponse, batch_priority, client_id, too_busy
+)
+from audit_logging import configure_logging, event, log_context, sampled, sampled_items
+from audit_records import Finding, as_dict
+from batch_versions import BatchVersionStore, StaleBaseError
+from agent_scheduler import PrioritySemaphore, item_priority, plan_chunks
+from act_search import RISK_LEVELS, get_search_index, search_hits
+from act_catalogue import ACTS_BY_PARTITION, OTHER_PARTITION, get_catalogue, get_router, summarize_partitions
+from evidence_fetcher import EvidenceFetcher, EVIDENCE_PREFETCH
+from findings_writer import FindingsWriter, FindingsBatch, persistence_enabled
+from idempotency import IdempotencyCache, COMPUTED
+from metrics import Counter, Gauge, Histogram, BATCH_SIZE_BUCKETS, batch_size_label, metrics_response
+from result_cache import FindingCache, finding_key
+from risk_scoring import score_batch, item_compliance
+from session_aggregates import SessionAggregates
 
 logger = logging.getLogger(__name__)
 
+app = FastAPI(title="Master Audit Orchestrator", version="1.0.0")
+
+# Enable CORS for frontend communication (reportService.js reads /sessions/{id}/report)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:5173", "http://localhost:3000"],  # Vite/React dev servers
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# ============================================
+# AGENT CONCURRENCY SETTINGS
+# ============================================
+
+# Maximum number of specialist agent calls running at once (shared by all
+# batches); calls are chunks of an act, most severe chunks first
+AGENT_CONCURRENCY_LIMIT = int(os.environ.get("AGENT_CONCURRENCY_LIMIT", "8"))
+
+# Seconds to wait for a single specialist agent before giving up on its act
+AGENT_TIMEOUT_SECONDS = float(os.environ.get("AGENT_TIMEOUT_SECONDS", "120"))
+
+# Threads for blocking agent clients. Only AGENT_CONCURRENCY_LIMIT calls hold
+# a slot at once; the rest is headroom for calls that timed out but whose
+# thread is still running (a timeout cannot stop a thread)
+AGENT_EXECUTOR_THREADS = max(
+    int(os.environ.get("AGENT_EXECUTOR_THREADS", str(2 * AGENT_CONCURRENCY_LIMIT))),
+    AGENT_CONCURRENCY_LIMIT
+)
+
+# Blocking agent clients run here so they never stall the event loop
+_agent_executor = ThreadPoolExecutor(
+    max_workers=AGENT_EXECUTOR_THREADS,
+    thread_name_prefix="specialist-agent"
+)
+
+# Per-item findings reused across resubmissions (see result_cache.py)
+finding_cache = FindingCache()
+
+# Per-session report totals, updated as acts finish (see session_aggregates.py)
+session_store = SessionAggregates()
+
+# Latest full copy of each batch, for delta resubmissions (see batch_versions.py)
+batch_versions = BatchVersionStore()
+
+# Duplicate submissions of a batch share one computation (see idempotency.py)
+master_audit_submissions = IdempotencyCache('master_audit')
+
+# Item budgets and the bounded queue in front of every audit (see admission.py)
+admission = AdmissionController('master_audit')
+
+# One semaphore per event loop (asyncio primitives cannot cross loops)
+_agent_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, PrioritySemaphore]" = weakref.WeakKeyDictionary()
+
+# One evidence fetcher per event loop (its pooled httpx client is loop-bound)
+_evidence_fetchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EvidenceFetcher]" = weakref.WeakKeyDictionary()
+
+# One findings writer per event loop (pooled client and in-flight upserts are loop-bound)
+_findings_writers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, FindingsWriter]" = weakref.WeakKeyDictionary()
+
+# ============================================
+# METRICS (served on /metrics)
+# ============================================
+
+STAGE_SECONDS = Histogram(
+    'master_audit_stage_seconds',
+    'Time spent in each orchestrator stage',
+    ['stage']
+)
+AGENT_SECONDS = Histogram(
+    'master_audit_agent_seconds',
+    'Specialist agent call duration by act (excludes waiting for a slot)',
+    ['act', 'outcome']
+)
+AUDIT_SECONDS = Histogram(
+    'master_audit_duration_seconds',
+    'Master audit duration from hydration to synthesis, by batch size',
+    ['batch_size']
+)
+BATCH_ITEMS = Histogram(
+    'master_audit_batch_items',
+    'Items per master audit batch',
+    buckets=BATCH_SIZE_BUCKETS
+)
+ITEMS_ROUTED = Counter(
+    'master_audit_items_routed_total',
+    "Items routed to each act partition ('other' = matched no act)",
+    ['partition']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'master_audit_requests_in_flight',
+    'Master audit requests being processed',
+    ['endpoint']
+)
+AGENTS_IN_FLIGHT = Gauge(
+    'master_audit_agents_in_flight',
+    'Specialist agent calls currently running'
+)
+AGENT_THREADS_ABANDONED = Gauge(
+    'master_audit_agent_threads_abandoned',
+    'Blocking agent calls still running on the agent thread pool after their caller gave up'
+)
+
 # ============================================
 # PYDANTIC MODELS
 # ============================================
 
 class AuditItemRequest(BaseModel):
     audit_item_id: str
-    question_text: str
-    legal_text: str
-    risk_level: str
-    category: str
-    workflow_type: str
+    
+    # Filled in from the act catalogue when omitted
+    question_text: Optional[str] = None
+    legal_text: Optional[str] = None
+    risk_level: Optional[str] = None
+    category: Optional[str] = None
+    workflow_type: Optional[str] = None
+    
     intern_verdict: Optional[str] = None
     intern_comment: Optional[str] = None
     evidence_url: Optional[str] = None
@@ -48,8 +228,80 @@ class MasterAuditRequest(BaseModel):
     audit_items: List[AuditItemRequest]
 
 
+# ============================================
+# INTERNAL BATCH REPRESENTATION
+# ============================================
+
+# Same shape as MasterAuditRequest, but validating into plain dicts: the
+# request body is parsed and validated once (in pydantic-core) and the
+# orchestrator works on the result directly, with no .dict() round trip.
+
+class AuditItemData(TypedDict, total=False):
+    audit_item_id: Required[str]
+    question_text: Optional[str]
+    legal_text: Optional[str]
+    risk_level: Optional[str]
+    category: Optional[str]
+    workflow_type: Optional[str]
+    intern_verdict: Optional[str]
+    intern_comment: Optional[str]
+    evidence_url: Optional[str]
+    intern_evidence: Optional[str]
+    missing_evidence_reason: Optional[str]
+    applicability_reason: Optional[str]
+    is_applicable: bool
+
+
+class MasterAuditBatch(TypedDict):
+    batch_id: str
+    session_id: str
+    company_name: str
+    location: str
+    submitted_at: str
+    audit_items: List[AuditItemData]
+
+
+master_audit_batch = TypeAdapter(MasterAuditBatch)
+
+
+class MasterAuditDelta(TypedDict, total=False):
+    """Edit to a stored batch (see batch_versions.py)"""
+    batch_id: Required[str]
+    base_version: Required[int]
+    session_id: str
+    company_name: str
+    location: str
+    submitted_at: str
+    changed_items: List[AuditItemData]
+    removed_item_ids: List[str]
+
+
+master_audit_delta = TypeAdapter(MasterAuditDelta)
+
+
+async def read_master_audit_batch(request: Request) -> Dict:
+    """Parse and validate a MasterAuditRequest body into a plain dict"""
+    body = await request.body()
+    try:
+        with STAGE_SECONDS.time(stage='validation'):
+            return master_audit_batch.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+
+async def read_master_audit_delta(request: Request) -> Dict:
+    """Parse and validate a MasterAuditDelta body into a plain dict"""
+    body = await request.body()
+    try:
+        with STAGE_SECONDS.time(stage='validation'):
+            return master_audit_delta.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+
 class ActComplianceScore(BaseModel):
-    score: float
+    # None when every item of the act is Not Applicable (see risk_scoring.py)
+    score: Optional[float]
     critical: int
     high: int
     items_analyzed: int
@@ -64,7 +316,7 @@ class MasterAuditResponse(BaseModel):
     
     # Compliance breakdown
     act_scores: Dict[str, ActComplianceScore]
-    overall_compliance_score: float
+    overall_compliance_score: Optional[float]
     
     # Findings
     total_findings: int
@@ -86,35 +338,39 @@ class MasterAuditResponse(BaseModel):
 
 def partition_audit_items(audit_items: List[Dict]) -> Dict[str, List[Dict]]:
     """
-    Partition audit items by their ID prefix to route to appropriate agents
+    Partition audit items by act to route to appropriate agents
+    
+    Uses the routing table from act_catalogue (built once per process from
+    src/data), so every act in the catalogue gets its own partition.
     
     Returns:
         {
-            'wages': [...],      # CW-2019-SEC- prefixed items
-            'safety': [...],     # OSHWC-SEC- prefixed items
-            'other': [...]       # All others
+            'wages': [...],      # Code on Wages items (CW-2019-SEC-...)
+            'safety': [...],     # OSH Code items (OSHWC-SEC-...)
+            ...                  # One key per other act present in the batch
+            'other': [...]       # Items no act claims
         }
     """
-    partitions = {
-        'wages': [],
-        'safety': [],
-        'other': []
-    }
+    with STAGE_SECONDS.time(stage='partitioning'):
+        partitions = get_router().partition(audit_items)
     
-    for item in audit_items:
-        item_id = item.get('audit_item_id', '')
-        
-        if item_id.startswith('CW-2019-SEC-'):
-            partitions['wages'].append(item)
-            logger.info(f"📄 Routed to Wages Agent: {item_id}")
-        
-        elif item_id.startswith('OSHWC-SEC-'):
-            partitions['safety'].append(item)
-            logger.info(f"🛡️  Routed to Safety Agent: {item_id}")
-        
-        else:
-            partitions['other'].append(item)
-            logger.info(f"❓ Unknown prefix: {item_id}")
+    counts = summarize_partitions(partitions)
+    for name, count in counts.items():
+        if count:
+            ITEMS_ROUTED.inc(count, partition=name)
+    routed = {name: count for name, count in sorted(counts.items()) if count}
+    event(logger, 'items_partitioned', "📊 Partitioned {items} items: {partitions}",
+          items=len(audit_items), partitions=routed)
+    for name, items in partitions.items():
+        for item in sampled_items(logger, items):
+            event(logger, 'item_routed', level=logging.DEBUG,
+                  audit_item_id=item.get('audit_item_id'), partition=name)
+    
+    other = partitions[OTHER_PARTITION]
+    if other:
+        sample = [item.get('audit_item_id') for item in other[:5]]
+        event(logger, 'items_unrouted', "❓ {items} items match no act (e.g. {sample})",
+              level=logging.WARNING, items=len(other), sample=sample)
     
     return partitions
 
@@ -134,171 +390,749 @@ def invoke_specialist_agent(
     if not items:
         return None
     
-    logger.info(f"\n🚀 Invoking {agent_name}...")
-    logger.info(f"   Items to analyze: {len(items)}")
-    
     # ================================================================
     # TODO: Replace this with actual agent invocation
     # Example: result = call_agent_framework(agent_name, items, context)
     # ================================================================
     
-    # Mock response for demonstration
-    critical_count = sum(1 for item in items if item.get('risk_level') == 'Critical')
-    high_count = sum(1 for item in items if item.get('risk_level') == 'High')
-    non_compliant = sum(1 for item in items if item.get('intern_verdict') == 'Non-Compliant')
+    # Mock response for demonstration: one finding per item, scored with
+    # the weighted riskWeights.json model. Items of a category share one
+    # recommendation string.
+    company_name = context.get('company_name')
+    recommendations: Dict[Optional[str], str] = {}
+    findings = []
+    for item in items:
+        category = item.get('category')
+        recommendation = recommendations.get(category)
+        if recommendation is None:
+            recommendation = recommendations[category] = f"Review {category} compliance for {company_name}"
+        findings.append(Finding(
+            item.get('audit_item_id'),
+            item.get('intern_verdict', 'Not Assessed'),
+            category,
+            item.get('risk_level'),
+            item.get('intern_comment', ''),
+            recommendation
+        ))
+    result = build_act_result(agent_name, items, findings)
     
-    # Simple scoring: deduct points for non-compliance
-    base_score = 100
-    penalty_per_critical = 15
-    penalty_per_high = 8
-    penalty_per_non_compliant = 5
+    # One call per chunk: the per-act summary is logged by ReportReducer
+    event(logger, 'agent_result', "🤖 {agent}: {score}% over {items} items", level=logging.DEBUG,
+          agent=agent_name, score=result['overall_compliance_score'], items=len(items))
+    
+    return result
+
+
+# Agent client used when no agent_fn is passed (e.g. by the endpoints).
+# Point this at your agent framework: any sync or async callable with
+# invoke_specialist_agent's signature.
+agent_client: Callable = invoke_specialist_agent
+
+
+def build_act_result(agent_name: str, items: List[Dict], findings: List[Dict]) -> Dict:
+    """
+    Build a specialist result for one act from its items and per-item findings
+    
+    Scores and severity counts come from the risk scoring engine over all
+    items, so the result is the same whether findings were fresh or cached.
+    """
+    scores = score_batch(items)
+    critical_count = scores['critical_findings']
+    high_count = scores['high_risk_findings']
     
-    score = base_score - (critical_count * penalty_per_critical) - (high_count * penalty_per_high) - (non_compliant * penalty_per_non_compliant)
-    score = max(0, min(100, score))  # Clamp between 0-100
+    recommendations = [
+        f"Address {scores['non_compliant_items']} non-compliance findings",
+        f"Focus on {critical_count} critical items" if critical_count > 0 else None,
+        f"Improve {high_count} high-risk areas" if high_count > 0 else None
+    ]
     
-    result = {
+    return {
         'agent_name': agent_name,
-        'overall_compliance_score': score,
+        'overall_compliance_score': scores['overall_compliance_score'],
         'critical_findings': critical_count,
         'high_risk_findings': high_count,
-        'medium_risk_findings': 0,
-        'low_risk_findings': 0,
+        'medium_risk_findings': scores['medium_risk_findings'],
+        'low_risk_findings': scores['low_risk_findings'],
         'analyzed_items': len(items),
-        'findings': [
-            {
-                'item_id': item.get('audit_item_id'),
-                'status': item.get('intern_verdict', 'Not Assessed'),
-                'category': item.get('category'),
-                'severity': item.get('risk_level'),
-                'comment': item.get('intern_comment', ''),
-                'recommendation': f"Review {item.get('category')} compliance for {context.get('company_name')}"
-            }
-            for item in items
-        ],
-        'recommendations': [
-            f"Address {len([i for i in items if i.get('intern_verdict') == 'Non-Compliant'])} non-compliance findings",
-            f"Focus on {critical_count} critical items" if critical_count > 0 else None,
-            f"Improve {high_count} high-risk areas" if high_count > 0 else None
-        ]
+        'applicable_items': scores['applicable_items'],
+        'findings': findings,
+        'recommendations': [r for r in recommendations if r is not None]
     }
+
+
+def merge_cached_findings(
+    agent_name: str,
+    items: List[Dict],
+    keys: List[str],
+    cached: Dict[str, Dict],
+    fresh_by_id: Dict[str, Dict]
+) -> Dict:
+    """
+    Merge cached findings with the agent's findings for changed items
     
-    # Filter out None recommendations
-    result['recommendations'] = [r for r in result['recommendations'] if r is not None]
-    
-    logger.info(f"   ✅ Score: {score}%")
-    logger.info(f"   📊 Findings: {len(result['findings'])} items analyzed")
+    fresh_by_id maps item_id to the agent's finding. Findings keep the
+    order of `items` (the finding objects themselves are not copied); the
+    act is then re-scored over the full item list.
+    """
+    findings = []
+    for item, key in zip(items, keys):
+        finding = cached.get(key) or fresh_by_id.get(item.get('audit_item_id'))
+        if finding is not None:
+            findings.append(finding)
     
-    return result
+    return build_act_result(agent_name, items, findings)
 
 
-def synthesize_results(
-    batch_data: Dict,
-    wages_results: Optional[Dict] = None,
-    safety_results: Optional[Dict] = None
-) -> Dict:
+# ============================================
+# RESULT SYNTHESIS
+# ============================================
+
+class ReportReducer:
     """
-    Synthesize results from specialist agents into unified report
-    Handles cases where only one act was audited
-    """
-    
-    logger.info("\n🔀 Synthesizing results...")
-    
-    # Build act_scores dictionary
-    act_scores = {}
-    all_findings = []
-    all_recommendations = []
-    total_critical = 0
-    total_high = 0
-    total_medium = 0
-    total_low = 0
-    
-    # === Extract Wages Results ===
-    if wages_results:
-        act_scores['Code on Wages, 2019'] = {
-            'score': wages_results.get('overall_compliance_score', 0),
-            'critical': wages_results.get('critical_findings', 0),
-            'high': wages_results.get('high_risk_findings', 0),
-            'items_analyzed': wages_results.get('analyzed_items', 0)
+    Folds per-act specialist results into the unified report, one act at a time
+    
+    Keeps only running totals (severity counts, weighted score sum,
+    finding count) plus one ActComplianceScore per act, so the cost of
+    adding an act does not depend on how many came before it. The overall
+    score is the mean of act scores weighted by applicable items, like
+    computeMultiActScore and risk_scoring.score_encoded, so a 3-item act no
+    longer counts as much as a 100-item one and acts without a score
+    (nothing applicable) carry no weight. Agent results without an
+    applicable_items count are weighted by items analyzed.
+    Recommendations are deduplicated in first-seen order.
+    
+    Findings are collected only with keep_findings=True (the full report);
+    streaming callers hand findings out per act and keep just the count.
+    """
+    
+    def __init__(self, batch_data: Dict, keep_findings: bool = True):
+        self.batch_data = batch_data
+        self.keep_findings = keep_findings
+        self.act_scores: Dict[str, Dict] = {}
+        self.findings: List[Dict] = []
+        self.total_findings = 0
+        self.critical = 0
+        self.high = 0
+        self.medium = 0
+        self.low = 0
+        self._weighted_score = 0.0
+        self._score_weight = 0
+        # dict as an insertion-ordered set
+        self._recommendations: Dict[str, None] = {}
+    
+    def add(self, act_name: str, results: Optional[Dict]):
+        """Fold in one act's agent result (None = act skipped or timed out)"""
+        if not results:
+            return
+        
+        score = results.get('overall_compliance_score')
+        items_analyzed = results.get('analyzed_items', 0)
+        self.act_scores[act_name] = {
+            'score': score,
+            'critical': results.get('critical_findings', 0),
+            'high': results.get('high_risk_findings', 0),
+            'items_analyzed': items_analyzed
         }
-        all_findings.extend(wages_results.get('findings', []))
-        all_recommendations.extend(wages_results.get('recommendations', []))
         
-        total_critical += wages_results.get('critical_findings', 0)
-        total_high += wages_results.get('high_risk_findings', 0)
-        total_medium += wages_results.get('medium_risk_findings', 0)
-        total_low += wages_results.get('low_risk_findings', 0)
+        self.critical += results.get('critical_findings', 0)
+        self.high += results.get('high_risk_findings', 0)
+        self.medium += results.get('medium_risk_findings', 0)
+        self.low += results.get('low_risk_findings', 0)
+        if score is not None:
+            weight = results.get('applicable_items', items_analyzed)
+            self._weighted_score += score * weight
+            self._score_weight += weight
+        
+        findings = results.get('findings', [])
+        self.total_findings += len(findings)
+        if self.keep_findings:
+            self.findings += findings
+        
+        for recommendation in results.get('recommendations', []):
+            self._recommendations.setdefault(recommendation)
         
-        logger.info(f"💰 Wages Expert: {wages_results.get('overall_compliance_score', 0)}%")
-    
-    # === Extract Safety Results ===
-    if safety_results:
-        act_scores['OSH Code, 2020'] = {
-            'score': safety_results.get('overall_compliance_score', 0),
-            'critical': safety_results.get('critical_findings', 0),
-            'high': safety_results.get('high_risk_findings', 0),
-            'items_analyzed': safety_results.get('analyzed_items', 0)
+        event(logger, 'act_scored', "📘 {act}: {score}% over {items} items",
+              act=act_name, score=score, items=items_analyzed)
+    
+    @property
+    def overall_score(self) -> Optional[float]:
+        if not self._score_weight:
+            return None
+        return self._weighted_score / self._score_weight
+    
+    def finish(self) -> Dict:
+        """Build the MasterAuditResponse dict (without findings unless kept)"""
+        overall_score = self.overall_score
+        
+        batch_data = self.batch_data
+        report = {
+            'batch_id': batch_data.get('batch_id'),
+            'session_id': batch_data.get('session_id'),
+            'company_name': batch_data.get('company_name'),
+            'location': batch_data.get('location'),
+            'submitted_at': batch_data.get('submitted_at'),
+            
+            # Compliance Breakdown
+            'act_scores': self.act_scores,
+            'overall_compliance_score': round(overall_score, 2) if overall_score is not None else None,
+            
+            # Findings Summary
+            'total_findings': self.total_findings,
+            'critical_findings': self.critical,
+            'high_risk_findings': self.high,
+            'medium_risk_findings': self.medium,
+            'low_risk_findings': self.low,
+            
+            # Detailed Results
+            'recommendations': list(self._recommendations),
+            
+            # Metadata
+            'agents_invoked': list(self.act_scores),
+            'processing_timestamp': datetime.now().isoformat()
         }
-        all_findings.extend(safety_results.get('findings', []))
-        all_recommendations.extend(safety_results.get('recommendations', []))
+        if self.keep_findings:
+            report['findings'] = self.findings
         
-        total_critical += safety_results.get('critical_findings', 0)
-        total_high += safety_results.get('high_risk_findings', 0)
-        total_medium += safety_results.get('medium_risk_findings', 0)
-        total_low += safety_results.get('low_risk_findings', 0)
+        event(logger, 'report_ready', "✨ Report Ready: {score}%, {findings} findings, {recommendations} recommendations",
+              score=report['overall_compliance_score'], findings=report['total_findings'],
+              recommendations=len(report['recommendations']))
         
-        logger.info(f"🛡️  Safety Expert: {safety_results.get('overall_compliance_score', 0)}%")
-    
-    # === Compute Overall Score ===
-    scores = [s['score'] for s in act_scores.values()]
-    if len(scores) > 1:
-        overall_score = sum(scores) / len(scores)
-    elif len(scores) == 1:
-        overall_score = scores[0]
+        return report
+
+
+def synthesize_results(batch_data: Dict, act_results: Dict[str, Optional[Dict]]) -> Dict:
+    """
+    Synthesize results from specialist agents into unified report
+    
+    act_results maps act name (e.g. 'Code on Wages, 2019') to the agent
+    result for that act, for any number of acts; None entries are skipped.
+    """
+    with STAGE_SECONDS.time(stage='synthesis'):
+        reducer = ReportReducer(batch_data)
+        for act_name, results in act_results.items():
+            reducer.add(act_name, results)
+        return reducer.finish()
+
+
+async def synthesize_results_stream(
+    batch_data: Dict,
+    act_results: AsyncIterable[Tuple[str, Optional[Dict]]],
+    keep_findings: bool = True
+) -> Dict:
+    """
+    Synthesize (act name, agent result) pairs as they arrive
+    
+    Each act is folded in as soon as the iterator yields it, so synthesis
+    overlaps with agents that are still running and finishes right after
+    the last one.
+    """
+    reducer = ReportReducer(batch_data, keep_findings)
+    reducing_seconds = 0.0
+    
+    async for act_name, results in act_results:
+        started = time.perf_counter()
+        reducer.add(act_name, results)
+        reducing_seconds += time.perf_counter() - started
+    
+    started = time.perf_counter()
+    report = reducer.finish()
+    STAGE_SECONDS.observe(reducing_seconds + time.perf_counter() - started, stage='synthesis')
+    return report
+
+
+def _is_async_callable(fn: Callable) -> bool:
+    """True for coroutine functions and objects with an async __call__"""
+    return inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, '__call__', None))
+
+
+def _get_agent_semaphore() -> PrioritySemaphore:
+    """Return the process-wide agent semaphore for the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _agent_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = PrioritySemaphore(AGENT_CONCURRENCY_LIMIT)
+        _agent_semaphores[loop] = semaphore
+    return semaphore
+
+
+def _get_evidence_fetcher() -> EvidenceFetcher:
+    """Return the evidence fetcher for the running event loop"""
+    loop = asyncio.get_running_loop()
+    fetcher = _evidence_fetchers.get(loop)
+    if fetcher is None:
+        fetcher = EvidenceFetcher()
+        _evidence_fetchers[loop] = fetcher
+    return fetcher
+
+
+async def close_evidence_fetcher():
+    """Release the running loop's evidence fetcher connections"""
+    fetcher = _evidence_fetchers.pop(asyncio.get_running_loop(), None)
+    if fetcher is not None:
+        await fetcher.aclose()
+
+
+def _get_findings_writer() -> Optional[FindingsWriter]:
+    """Return the findings writer for the running event loop (None when persistence is off)"""
+    if not persistence_enabled():
+        return None
+    loop = asyncio.get_running_loop()
+    writer = _findings_writers.get(loop)
+    if writer is None:
+        writer = FindingsWriter()
+        _findings_writers[loop] = writer
+    return writer
+
+
+def new_findings_batch() -> Optional[FindingsBatch]:
+    """Findings batch for one audit on the running loop's writer (None when persistence is off)"""
+    writer = _get_findings_writer()
+    return writer.batch() if writer is not None else None
+
+
+async def persist_findings(findings: Optional[FindingsBatch]):
+    """Persist stage: send this audit's buffered findings and wait for its upserts only"""
+    if findings is None:
+        return
+    with STAGE_SECONDS.time(stage='persist'):
+        outcome = await findings.flush()
+    if outcome['written'] or outcome['failed']:
+        event(logger, 'findings_persisted', "💾 {written} findings written to audit_agent_submissions, {failed} failed",
+              written=outcome['written'], failed=outcome['failed'])
+
+
+async def close_findings_writer():
+    """Write out buffered findings and release the running loop's writer connections"""
+    writer = _findings_writers.pop(asyncio.get_running_loop(), None)
+    if writer is not None:
+        await writer.aclose()
+
+
+async def invoke_specialist_agent_async(
+    agent_name: str,
+    items: List[Dict],
+    context: Dict,
+    agent_fn: Optional[Callable] = None,
+    semaphore: Optional[PrioritySemaphore] = None,
+    timeout: Optional[float] = None,
+    priority: int = 0
+) -> Optional[Dict]:
+    """
+    Invoke one specialist agent without blocking the event loop
+    
+    Coroutine agent clients are awaited directly; blocking clients run on
+    the agent thread pool. The call waits for a slot on the shared
+    semaphore (lower `priority` values are served first) and is abandoned
+    after `timeout` seconds, in which case None is returned instead of
+    failing the whole batch.
+    
+    Abandoning a blocking client does not stop it: its thread keeps
+    running until the agent returns, and is counted in
+    master_audit_agent_threads_abandoned until then. Once abandoned
+    threads fill the pool's headroom, later blocking calls queue behind
+    them (see AGENT_EXECUTOR_THREADS).
+    """
+    
+    if not items:
+        return None
+    
+    agent_fn = agent_fn or agent_client
+    semaphore = semaphore or _get_agent_semaphore()
+    timeout = AGENT_TIMEOUT_SECONDS if timeout is None else timeout
+    
+    if isinstance(semaphore, PrioritySemaphore):
+        slot = semaphore.slot(priority)
     else:
-        overall_score = 0
+        slot = semaphore
+    
+    waiting_since = time.perf_counter()
+    async with slot:
+        STAGE_SECONDS.observe(time.perf_counter() - waiting_since, stage='agent_wait')
+        
+        thread_call = None
+        if _is_async_callable(agent_fn):
+            call = agent_fn(agent_name, items, context)
+        else:
+            thread_call = _agent_executor.submit(agent_fn, agent_name, items, context)
+            call = asyncio.wrap_future(thread_call)
+        
+        outcome = 'error'
+        started = time.perf_counter()
+        AGENTS_IN_FLIGHT.inc()
+        try:
+            result = await asyncio.wait_for(call, timeout)
+            outcome = 'ok'
+            return result
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            event(logger, 'agent_timeout', "⏱️  {agent} timed out after {timeout}s ({items} items)",
+                  level=logging.ERROR, agent=agent_name, timeout=timeout, items=len(items))
+            return None
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        finally:
+            AGENTS_IN_FLIGHT.dec()
+            if thread_call is not None and outcome in ('timeout', 'cancelled'):
+                _abandon_agent_thread(thread_call, agent_name)
+            AGENT_SECONDS.observe(
+                time.perf_counter() - started,
+                act=context.get('act_id', agent_name),
+                outcome=outcome
+            )
+
+
+def _abandon_agent_thread(thread_call, agent_name: str):
+    """Count a blocking agent call its caller gave up on until its thread finishes"""
+    # Cancelling the caller also cancels a call that had not started yet
+    if thread_call.done():
+        return
+    AGENT_THREADS_ABANDONED.inc()
+    thread_call.add_done_callback(lambda _: AGENT_THREADS_ABANDONED.dec())
+    abandoned = AGENT_THREADS_ABANDONED.value()
+    headroom = AGENT_EXECUTOR_THREADS - AGENT_CONCURRENCY_LIMIT
+    event(logger, 'agent_thread_abandoned',
+          "🧵 {agent} is still running on its thread after its caller gave up "
+          "({abandoned} abandoned, {threads} agent threads)",
+          level=logging.WARNING if abandoned > headroom else logging.INFO,
+          agent=agent_name, abandoned=int(abandoned), threads=AGENT_EXECUTOR_THREADS)
+
+
+async def audit_act(
+    partition: str,
+    items: List[Dict],
+    context: Dict,
+    agent_fn: Optional[Callable] = None,
+    semaphore: Optional[PrioritySemaphore] = None,
+    timeout: Optional[float] = None,
+    findings: Optional[FindingsBatch] = None,
+    persist: bool = True
+) -> Optional[Dict]:
+    """
+    Audit one act, sending only items without a cached finding to its agent
+    
+    Evidence documents for changed ai_evidence items are downloaded first
+    (see evidence_fetcher.py) and attached as item['evidence_documents'].
+    Changed items are then split into token-budgeted chunks (see
+    agent_scheduler.plan_chunks) that run in parallel, most severe first.
+    Findings from every chunk that succeeded are cached; if any chunk
+    timed out the act is left out of this report (returns None), and a
+    resubmission only re-sends the chunks that did not finish.
+    
+    Returns the merged per-act result, with findings in item order however
+    the chunks were split or finished. With a session_id and persist, the
+    act's rows go to the session aggregates and, when given, the audit's
+    findings batch.
+    """
+    agent_name = ACTS_BY_PARTITION[partition]['agent']
+    keys = [finding_key(item, agent_name, context) for item in items]
+    cached = finding_cache.get_many(keys)
+    changed = [item for item, key in zip(items, keys) if key not in cached]
+    
+    fresh_by_id = {}
+    if changed:
+        if EVIDENCE_PREFETCH:
+            with STAGE_SECONDS.time(stage='evidence'):
+                await _get_evidence_fetcher().prefetch(changed)
+        
+        chunks = plan_chunks(changed)
+        if len(chunks) > 1:
+            event(logger, 'act_chunked', "🧩 {agent}: {items} items split into {chunks} chunks",
+                  agent=agent_name, items=len(changed), chunks=len(chunks))
+        
+        outcomes = await asyncio.gather(*(
+            invoke_specialist_agent_async(
+                agent_name=agent_name,
+                items=chunk,
+                context=context,
+                agent_fn=agent_fn,
+                semaphore=semaphore,
+                timeout=timeout,
+                priority=item_priority(chunk[0])
+            )
+            for chunk in chunks
+        ), return_exceptions=True)
+        
+        for outcome in outcomes:
+            if outcome and not isinstance(outcome, BaseException):
+                for finding in outcome.get('findings', []):
+                    fresh_by_id[finding.get('item_id')] = finding
+        finding_cache.put_many({
+            key: fresh_by_id[item.get('audit_item_id')]
+            for item, key in zip(items, keys)
+            if key not in cached and item.get('audit_item_id') in fresh_by_id
+        })
+        
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        if any(outcome is None for outcome in outcomes):
+            return None
     
-    logger.info(f"📊 Overall Score: {overall_score}%")
+    if cached:
+        event(logger, 'findings_reused', "♻️  {agent}: reused {cached} cached findings, {sent} sent to agent",
+              agent=agent_name, cached=len(items) - len(changed), sent=len(changed))
     
-    # === Build Final Report ===
-    final_report = {
+    result = merge_cached_findings(agent_name, items, keys, cached, fresh_by_id)
+    if logger.isEnabledFor(logging.DEBUG):
+        for item, key in zip(items, keys):
+            item_id = item.get('audit_item_id')
+            if not sampled(item_id):
+                continue
+            finding = fresh_by_id.get(item_id) or cached.get(key) or {}
+            event(logger, 'item_finding', level=logging.DEBUG, audit_item_id=item_id, agent=agent_name,
+                  status=finding.get('status'), severity=finding.get('severity'), cached=item_id not in fresh_by_id)
+    if persist and context.get('session_id'):
+        rows = session_rows(agent_name, items, result['findings'])
+        await asyncio.to_thread(session_store.record_results, context['session_id'], rows)
+        if findings is not None:
+            findings.add(context['session_id'], rows)
+    return result
+
+
+def session_rows(agent_name: str, items: List[Dict], findings: List[Dict]) -> List[Dict]:
+    """
+    Shape an act's findings as audit_agent_submissions rows (session_store and findings_writer)
+
+    Findings without an ai_score of their own are scored from their status
+    with the riskWeights.json status factors (see risk_scoring.item_compliance),
+    so session totals and per-agent averages have a score to average.
+    """
+    items_by_id = None
+    rows = []
+    for finding in findings:
+        row = as_dict(finding)
+        item_id = row.get('item_id')
+        risk_level = row.get('severity')
+        if not risk_level:
+            # Only findings without a severity need their item
+            if items_by_id is None:
+                items_by_id = {item.get('audit_item_id'): item for item in items}
+            risk_level = items_by_id.get(item_id, {}).get('risk_level')
+        row.update(
+            audit_item_id=item_id,
+            ai_agent_name=agent_name,
+            status=row.get('status'),
+            risk_level=risk_level,
+            ai_score=row['ai_score'] if row.get('ai_score') is not None else item_compliance(row.get('status')),
+        )
+        rows.append(row)
+    return rows
+
+
+def audit_log_context(batch_data: Dict) -> Dict:
+    """Fields that tag every log record of a batch's audit"""
+    return {'batch_id': batch_data.get('batch_id'), 'session_id': batch_data.get('session_id')}
+
+
+def start_act_audits(
+    batch_data: Dict,
+    agent_fn: Optional[Callable] = None,
+    concurrency_limit: Optional[int] = None,
+    agent_timeout: Optional[float] = None,
+    findings: Optional[FindingsBatch] = None,
+    persist: bool = True
+) -> Dict[str, "asyncio.Task"]:
+    """
+    Fill in catalogue fields, partition items and start one audit task per act
+    
+    The items of batch_data are replaced in place by compact AuditItem
+    records (see audit_records.py), freeing the parsed request dicts.
+    
+    Returns:
+        {partition: asyncio.Task resolving to the act result (or None)}
+    """
+    with STAGE_SECONDS.time(stage='hydration'):
+        audit_items = get_catalogue().hydrate_records(batch_data.get('audit_items', []))
+    BATCH_ITEMS.observe(len(audit_items))
+    partitions = partition_audit_items(audit_items)
+    
+    context = {
         'batch_id': batch_data.get('batch_id'),
         'session_id': batch_data.get('session_id'),
         'company_name': batch_data.get('company_name'),
-        'location': batch_data.get('location'),
-        'submitted_at': batch_data.get('submitted_at'),
+        'location': batch_data.get('location')
+    }
+    semaphore = PrioritySemaphore(concurrency_limit) if concurrency_limit else None
+    
+    return {
+        partition: asyncio.create_task(
+            audit_act(
+                partition=partition,
+                items=items,
+                context={**context, 'act_id': ACTS_BY_PARTITION[partition]['id']},
+                agent_fn=agent_fn,
+                semaphore=semaphore,
+                timeout=agent_timeout,
+                findings=findings,
+                persist=persist
+            )
+        )
+        for partition, items in partitions.items()
+        if partition != OTHER_PARTITION and items
+    }
+
+
+async def run_master_audit_async(
+    batch_data: Dict,
+    agent_fn: Optional[Callable] = None,
+    concurrency_limit: Optional[int] = None,
+    agent_timeout: Optional[float] = None,
+    persist: bool = True
+) -> Dict:
+    """
+    Master orchestrator for multi-act audits (async)
+    
+    1. Fills in statute text from the act catalogue and partitions items by act
+    2. Starts every specialist agent at once, in token-budgeted chunks capped
+       by the concurrency limit (Critical and High chunks get slots first);
+       items with a cached finding are not sent to agents again
+    3. Synthesizes results into unified report
+    4. Persists the findings to audit_agent_submissions (when configured),
+       most of them already upserted while later agents were running
+    
+    Latency is roughly that of the slowest agent rather than the sum of all
+    agents, and the event loop stays free to serve other batches meanwhile.
+    
+    Args:
+        batch_data: Same shape as run_master_audit()
+        agent_fn: Agent client (sync or async), defaults to agent_client
+        concurrency_limit: Per-batch cap; defaults to the shared AGENT_CONCURRENCY_LIMIT
+        agent_timeout: Per-agent timeout in seconds; defaults to AGENT_TIMEOUT_SECONDS
+        persist: Write findings to the session aggregates and audit_agent_submissions
+            (False for offline re-scoring, see rescore_sessions.py)
+    
+    Returns:
+        Unified audit report with all findings and recommendations
+    """
+    
+    n_items = len(batch_data.get('audit_items', []))
+    with log_context(**audit_log_context(batch_data)):
+        event(logger, 'audit_started', "🚀 Master audit started: {items} items for {company}",
+              items=n_items, company=batch_data.get('company_name'))
+        started = time.perf_counter()
         
-        # Compliance Breakdown
-        'act_scores': act_scores,
-        'overall_compliance_score': round(overall_score, 2),
+        # Steps 1-2: Partition items and start specialist agents concurrently
+        findings = new_findings_batch() if persist else None
+        tasks = start_act_audits(batch_data, agent_fn, concurrency_limit, agent_timeout, findings, persist)
+        agents_started = time.perf_counter()
         
-        # Findings Summary
-        'total_findings': len(all_findings),
-        'critical_findings': total_critical,
-        'high_risk_findings': total_high,
-        'medium_risk_findings': total_medium,
-        'low_risk_findings': total_low,
+        async def act_results():
+            # Partition order, so the report does not depend on which agent finishes first
+            try:
+                for partition, task in tasks.items():
+                    try:
+                        result = await task
+                    except Exception as e:
+                        event(logger, 'agent_failed', "❌ {agent} failed: {error}", level=logging.ERROR,
+                              agent=ACTS_BY_PARTITION[partition]['agent'], error=str(e))
+                        continue
+                    yield ACTS_BY_PARTITION[partition]['name'], result
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - agents_started, stage='agents')
+                for task in tasks.values():
+                    task.cancel()
         
-        # Detailed Results
-        'findings': all_findings,
-        'recommendations': list(set(all_recommendations)),  # Deduplicate
+        # Step 3: Synthesize results as each act completes
+        final_report = await synthesize_results_stream(batch_data, act_results())
         
-        # Metadata
-        'agents_invoked': list(act_scores.keys()),
-        'processing_timestamp': datetime.now().isoformat()
-    }
-    
-    logger.info(f"✨ Report Ready: {final_report['total_findings']} findings, {len(final_report['recommendations'])} recommendations")
+        # Step 4: Persist findings buffered by the act audits
+        await persist_findings(findings)
+        
+        seconds = time.perf_counter() - started
+        AUDIT_SECONDS.observe(seconds, batch_size=batch_size_label(n_items))
+        event(logger, 'audit_completed', "✅ Master audit complete in {seconds}s", seconds=round(seconds, 3))
     
     return final_report
 
 
-def run_master_audit(batch_data: Dict) -> Dict:
+async def stream_master_audit(
+    batch_data: Dict,
+    agent_fn: Optional[Callable] = None,
+    concurrency_limit: Optional[int] = None,
+    agent_timeout: Optional[float] = None
+) -> AsyncIterator[Dict]:
     """
-    Master orchestrator for multi-act audits
+    Master orchestrator that yields results as each specialist finishes
     
-    1. Partitions items by ID prefix (CW-2019-SEC- vs OSHWC-SEC-)
-    2. Routes to appropriate specialist agents
-    3. Synthesizes results into unified report
+    Yields one 'act' frame per act, in completion order, then a final
+    'summary' frame. Findings are handed out with their act frame and not
+    kept afterwards, so memory does not grow with the size of the batch.
+    
+    Frames:
+        {'type': 'act', 'act': str, 'agent_name': str, 'score': {...ActComplianceScore...},
+         'findings': [...], 'recommendations': [...]}
+        {'type': 'summary', ...MasterAuditResponse fields except findings...}
+    """
+    started = time.perf_counter()
+    # Bound around the start only: act tasks keep the context, this generator's caller does not
+    findings = new_findings_batch()
+    with log_context(**audit_log_context(batch_data)):
+        tasks = start_act_audits(batch_data, agent_fn, concurrency_limit, agent_timeout, findings)
+    partition_of = {task: partition for partition, task in tasks.items()}
+    reducer = ReportReducer(batch_data, keep_findings=False)
+    reducing_seconds = 0.0
+    
+    try:
+        pending = set(tasks.values())
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                act = ACTS_BY_PARTITION[partition_of[task]]
+                if task.exception() is not None:
+                    with log_context(**audit_log_context(batch_data)):
+                        event(logger, 'agent_failed', "❌ {agent} failed: {error}", level=logging.ERROR,
+                              agent=act['agent'], error=str(task.exception()))
+                    continue
+                result = task.result()
+                if not result:
+                    continue
+                
+                started_reducing = time.perf_counter()
+                with log_context(**audit_log_context(batch_data)):
+                    reducer.add(act['name'], result)
+                reducing_seconds += time.perf_counter() - started_reducing
+                
+                yield {
+                    'type': 'act',
+                    'act': act['name'],
+                    'agent_name': result.get('agent_name'),
+                    'score': {
+                        'score': result.get('overall_compliance_score'),
+                        'critical': result.get('critical_findings', 0),
+                        'high': result.get('high_risk_findings', 0),
+                        'items_analyzed': result.get('analyzed_items', 0)
+                    },
+                    'findings': result.get('findings', []),
+                    'recommendations': result.get('recommendations', [])
+                }
+    finally:
+        # Client went away or a frame failed: stop agents that are still running
+        for task in tasks.values():
+            task.cancel()
+        # and still write the findings of the acts that finished
+        if findings is not None:
+            findings.send_buffered()
+    
+    started_reducing = time.perf_counter()
+    with log_context(**audit_log_context(batch_data)):
+        summary = reducer.finish()
+    STAGE_SECONDS.observe(reducing_seconds + time.perf_counter() - started_reducing, stage='synthesis')
+    with log_context(**audit_log_context(batch_data)):
+        await persist_findings(findings)
+    AUDIT_SECONDS.observe(
+        time.perf_counter() - started,
+        batch_size=batch_size_label(len(batch_data.get('audit_items', [])))
+    )
+    yield {'type': 'summary', **summary}
+
+
+def run_master_audit(batch_data: Dict, persist: bool = True) -> Dict:
+    """
+    Master orchestrator for multi-act audits (blocking wrapper)
+    
+    Runs run_master_audit_async() on a fresh event loop. Use it from scripts
+    and workers; inside FastAPI handlers await run_master_audit_async().
     
     Args:
         batch_data: {
@@ -308,113 +1142,279 @@ def run_master_audit(batch_data: Dict) -> Dict:
             'location': str,
             'audit_items': [...]
         }
+        persist: Write findings to the session aggregates and audit_agent_submissions
     
     Returns:
         Unified audit report with all findings and recommendations
     """
     
-    logger.info("=" * 60)
-    logger.info(f"🚀 MASTER AUDIT ORCHESTRATOR - Starting")
-    logger.info(f"   Batch ID: {batch_data.get('batch_id')}")
-    logger.info(f"   Company: {batch_data.get('company_name')}")
-    logger.info(f"   Items: {len(batch_data.get('audit_items', []))}")
-    logger.info("=" * 60)
-    
-    # Step 1: Partition items
-    partitions = partition_audit_items(batch_data.get('audit_items', []))
-    
-    logger.info(f"\n📊 Partition Summary:")
-    logger.info(f"   💰 Wages items: {len(partitions['wages'])}")
-    logger.info(f"   🛡️  Safety items: {len(partitions['safety'])}")
-    logger.info(f"   ❓ Other items: {len(partitions['other'])}")
-    
-    # Step 2: Invoke specialist agents
-    wages_results = None
-    safety_results = None
-    
-    if partitions['wages']:
-        wages_results = invoke_specialist_agent(
-            agent_name='wages_expert',
-            items=partitions['wages'],
-            context={
-                'batch_id': batch_data.get('batch_id'),
-                'company_name': batch_data.get('company_name'),
-                'location': batch_data.get('location')
-            }
-        )
-    
-    if partitions['safety']:
-        safety_results = invoke_specialist_agent(
-            agent_name='safety_expert',
-            items=partitions['safety'],
-            context={
-                'batch_id': batch_data.get('batch_id'),
-                'company_name': batch_data.get('company_name'),
-                'location': batch_data.get('location')
-            }
-        )
-    
-    # Step 3: Synthesize results
-    final_report = synthesize_results(
-        batch_data=batch_data,
-        wages_results=wages_results,
-        safety_results=safety_results
-    )
-    
-    logger.info("=" * 60)
-    logger.info("✅ MASTER AUDIT COMPLETE")
-    logger.info("=" * 60)
+    async def run_once():
+        try:
+            return await run_master_audit_async(batch_data, persist=persist)
+        finally:
+            await close_findings_writer()
+            await close_evidence_fetcher()
     
-    return final_report
+    return asyncio.run(run_once())
 
 
 # ============================================
 # FASTAPI ENDPOINTS
 # ============================================
 
-# (Add this to your existing FastAPI app)
+@app.on_event("startup")
+async def start_logging():
+    """Route logs through the queued structured handler (see audit_logging.py)"""
+    configure_logging()
+
+
+@app.on_event("startup")
+async def load_act_catalogue():
+    """Load the act catalogue, routing table and search index before the first request"""
+    get_router()
+    get_search_index()
+
+
+@app.on_event("shutdown")
+async def release_evidence_fetcher():
+    """Close pooled evidence download connections"""
+    await close_evidence_fetcher()
+
+
+@app.on_event("shutdown")
+async def release_findings_writer():
+    """Write out buffered findings and close pooled PostgREST connections"""
+    await close_findings_writer()
+
+
+def _master_audit_body_schema() -> Dict:
+    """MasterAuditRequest JSON schema with the item model inlined, for the docs"""
+    schema = MasterAuditRequest.model_json_schema()
+    item_schema = schema.pop('$defs')['AuditItemRequest']
+    schema['properties']['audit_items']['items'] = item_schema
+    return schema
+
+
+def _master_audit_delta_body_schema() -> Dict:
+    """MasterAuditDelta JSON schema with the item model inlined, for the docs"""
+    schema = master_audit_delta.json_schema()
+    item_schema = schema.pop('$defs')['AuditItemData']
+    schema['properties']['changed_items']['items'] = item_schema
+    return schema
+
 
-@app.post("/run-master-audit", response_model=MasterAuditResponse)
-async def run_master_audit_endpoint(request: MasterAuditRequest):
+# Request bodies for the docs (bodies are validated by read_master_audit_batch
+# and read_master_audit_delta)
+_MASTER_AUDIT_BODY = {
+    'requestBody': {
+        'required': True,
+        'content': {'application/json': {'schema': _master_audit_body_schema()}}
+    }
+}
+_MASTER_AUDIT_DELTA_BODY = {
+    'requestBody': {
+        'required': True,
+        'content': {'application/json': {'schema': _master_audit_delta_body_schema()}}
+    }
+}
+
+
+@app.post(
+    "/run-master-audit",
+    response_model=MasterAuditResponse,
+    response_class=fast_json.FastJSONResponse,
+    openapi_extra=_MASTER_AUDIT_BODY
+)
+async def run_master_audit_endpoint(request: Request):
     """
     Main orchestrator endpoint for multi-act audits
     
-    Routes items to specialist agents based on ID prefix:
+    Routes items to specialist agents by act (see act_catalogue.ACT_REGISTRY):
     - CW-2019-SEC-* → wages_expert
     - OSHWC-SEC-* → safety_expert
+    - every other catalogued act → its own specialist
+    
+    Returns unified report with merged findings and recommendations.
+    The body is validated once on input and the report is encoded directly
+    (response_model only documents the shape).
+    
+    Resubmitting the same batch_id and items while it is running waits for
+    the running audit; resubmitting after it finished returns the same
+    report. Either way the response carries Idempotent-Replayed: true.
+    
+    The Batch-Version response header identifies the stored copy of the
+    batch; send it as base_version to /run-master-audit/delta to resubmit
+    only what changed.
+    """
+    with REQUESTS_IN_FLIGHT.track_inprogress(endpoint='/run-master-audit'):
+        batch = await read_master_audit_batch(request)
+        try:
+            version = await asyncio.to_thread(batch_versions.put, batch)
+            return await _master_audit_response(batch, version, client_id(request))
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error in master audit: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post(
+    "/run-master-audit/delta",
+    response_model=MasterAuditResponse,
+    response_class=fast_json.FastJSONResponse,
+    openapi_extra=_MASTER_AUDIT_DELTA_BODY
+)
+async def run_master_audit_delta_endpoint(request: Request):
+    """
+    Re-run a master audit from an edit to a previously submitted batch
+    
+    The body carries batch_id, the base_version it was made against (the
+    Batch-Version header of the last response) and only the added/changed
+    items and removed item ids. The full batch is rebuilt from the stored
+    copy; only changed items reach the specialist agents, since unchanged
+    ones hit the finding cache. Responds like /run-master-audit.
+    
+    409 if base_version is no longer current (detail.current_version says
+    which version to rebase on), 404 if the batch was never submitted in
+    full to this server.
+    """
+    with REQUESTS_IN_FLIGHT.track_inprogress(endpoint='/run-master-audit/delta'):
+        delta = await read_master_audit_delta(request)
+        try:
+            with STAGE_SECONDS.time(stage='delta'):
+                batch, version, changed_ids = await asyncio.to_thread(batch_versions.apply_delta, delta)
+        except StaleBaseError as e:
+            logger.warning(f"⚠️  {e}")
+            raise HTTPException(
+                status_code=404 if e.current_version is None else 409,
+                detail={'error': str(e), 'current_version': e.current_version}
+            )
+        
+        removed_ids = delta.get('removed_item_ids') or []
+        logger.info(
+            f"🧮 Batch {batch['batch_id']}: v{delta['base_version']} → v{version} "
+            f"({len(changed_ids)} changed, {len(removed_ids)} removed, {len(batch['audit_items'])} items)"
+        )
+        try:
+            if removed_ids and batch.get('session_id'):
+                await asyncio.to_thread(session_store.remove_results, batch['session_id'], removed_ids)
+            return await _master_audit_response(batch, version, client_id(request))
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error in master audit: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+async def run_admitted_master_audit(batch: Dict, client: str) -> Dict:
+    """Run a master audit once admission control lets it in (raises AdmissionRejected)"""
+    items = batch.get('audit_items') or []
+    async with admission.admit(client, len(items), batch_priority(items, get_catalogue())):
+        return await run_master_audit_async(batch)
+
+
+async def _master_audit_response(batch: Dict, version: int, client: str) -> fast_json.FastJSONResponse:
+    """Run (or join/replay) the audit for a full batch and encode the report"""
+    try:
+        result, outcome = await master_audit_submissions.run(
+            batch['batch_id'], batch, lambda: run_admitted_master_audit(batch, client)
+        )
+    except AdmissionRejected as e:
+        logger.warning(f"🚦 Batch {batch['batch_id']} rejected ({e.reason}): {e}")
+        raise too_busy(e)
+    if outcome != COMPUTED:
+        logger.info(f"🔁 Batch {batch['batch_id']}: duplicate submission {outcome}")
+    
+    with STAGE_SECONDS.time(stage='serialization'):
+        return fast_json.FastJSONResponse(
+            result,
+            headers={
+                'Idempotent-Replayed': 'false' if outcome == COMPUTED else 'true',
+                'Batch-Version': str(version)
+            }
+        )
+
+
+@app.post("/run-master-audit/stream", openapi_extra=_MASTER_AUDIT_BODY)
+async def run_master_audit_stream_endpoint(request: Request):
+    """
+    Streaming variant of /run-master-audit
     
-    Returns unified report with merged findings and recommendations
+    Sends each act's ActComplianceScore and findings as soon as its
+    specialist finishes, then a final summary frame. Responds with
+    Server-Sent Events when the client accepts text/event-stream, and
+    newline-delimited JSON otherwise. Admission is decided before the
+    stream starts, so a saturated server still answers 429.
     """
+    use_sse = 'text/event-stream' in request.headers.get('accept', '')
+    batch = await read_master_audit_batch(request)
+    items = batch.get('audit_items') or []
     try:
-        batch_dict = request.dict()
-        result = run_master_audit(batch_dict)
-        return MasterAuditResponse(**result)
-    except Exception as e:
-        logger.error(f"❌ Error in master audit: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        ticket = await admission.acquire(client_id(request), len(items), batch_priority(items, get_catalogue()))
+    except AdmissionRejected as e:
+        logger.warning(f"🚦 Batch {batch['batch_id']} rejected ({e.reason}): {e}")
+        raise too_busy(e)
+    frames = stream_master_audit(batch)
+    
+    async def encode():
+        # Serialization time is summed over frames and recorded once per stream
+        encoding_seconds = 0.0
+        REQUESTS_IN_FLIGHT.inc(endpoint='/run-master-audit/stream')
+        try:
+            async for frame in frames:
+                started = time.perf_counter()
+                payload = fast_json.dumps(frame)
+                encoding_seconds += time.perf_counter() - started
+                if use_sse:
+                    yield b"event: " + frame['type'].encode() + b"\ndata: " + payload + b"\n\n"
+                else:
+                    yield payload + b"\n"
+        except Exception as e:
+            logger.error(f"❌ Error in streaming master audit: {str(e)}")
+            error = fast_json.dumps({'type': 'error', 'error': str(e)})
+            yield b"event: error\ndata: " + error + b"\n\n" if use_sse else error + b"\n"
+        finally:
+            REQUESTS_IN_FLIGHT.dec(endpoint='/run-master-audit/stream')
+            STAGE_SECONDS.observe(encoding_seconds, stage='serialization')
+    
+    return AdmittedStreamingResponse(
+        encode(),
+        ticket,
+        media_type='text/event-stream' if use_sse else 'application/x-ndjson'
+    )
 
 
-@app.post("/invoke-agent")
-async def invoke_agent_router(work_order: Dict):
+@app.post("/invoke-agent", response_class=fast_json.FastJSONResponse)
+async def invoke_agent_router(request: Request):
     """
     Universal agent router - determines which agent to invoke
     
     If agent_id is "master" or "universal", routes to master audit
+    (admitted like /run-master-audit; 429 when the server is saturated)
     """
     try:
+        work_order = fast_json.loads(await request.body())
         agent_id = work_order.get('agent_id', '')
         
         if agent_id in ['master', 'universal', 'master_audit']:
             # Extract batch data from work order payload
             payload = work_order.get('payload', {})
-            result = run_master_audit(payload)
-            
-            return {
-                'status': 'success',
-                'agent_id': 'master_audit',
-                'batch_id': result.get('batch_id'),
-                'report': result
-            }
+            with REQUESTS_IN_FLIGHT.track_inprogress(endpoint='/invoke-agent'):
+                client = client_id(request)
+                if payload.get('batch_id'):
+                    result, _ = await master_audit_submissions.run(
+                        payload['batch_id'], payload, lambda: run_admitted_master_audit(payload, client)
+                    )
+                else:
+                    result = await run_admitted_master_audit(payload, client)
+                
+                with STAGE_SECONDS.time(stage='serialization'):
+                    return fast_json.FastJSONResponse({
+                        'status': 'success',
+                        'agent_id': 'master_audit',
+                        'batch_id': result.get('batch_id'),
+                        'report': result
+                    })
         else:
             # Route to other agents
             return {
@@ -422,6 +1422,9 @@ async def invoke_agent_router(work_order: Dict):
                 'error': f"Unknown agent: {agent_id}"
             }
     
+    except AdmissionRejected as e:
+        logger.warning(f"🚦 Agent router rejected a master audit ({e.reason}): {e}")
+        raise too_busy(e)
     except Exception as e:
         logger.error(f"❌ Agent router error: {str(e)}")
         return {
@@ -430,6 +1433,85 @@ async def invoke_agent_router(work_order: Dict):
         }
 
 
+@app.get("/catalogue/search")
+async def search_catalogue_endpoint(
+    q: str = Query(..., min_length=1, max_length=1000),
+    limit: int = Query(10, ge=1, le=100),
+    act: Optional[str] = None,
+    risk_level: Optional[Literal[RISK_LEVELS]] = None,
+    category: Optional[str] = None
+):
+    """
+    Full-text search over every checklist item (BM25, see act_search.py)
+    
+    act takes an act id or partition (e.g. code_on_wages_2019 or wages);
+    category matches the catalogue category case-insensitively.
+    """
+    results = get_search_index().search(q, limit, act, risk_level, category)
+    return {'query': q, 'results': search_hits(results)}
+
+
+@app.get("/catalogue/items/{audit_item_id}/related")
+async def related_catalogue_items_endpoint(
+    audit_item_id: str,
+    limit: int = Query(5, ge=1, le=50),
+    same_act: bool = False
+):
+    """Checklist items closest to one item, e.g. as extra context for an agent"""
+    if get_catalogue().get(audit_item_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown audit item: {audit_item_id}")
+    results = get_search_index().related(audit_item_id, limit, same_act)
+    return {'audit_item_id': audit_item_id, 'results': search_hits(results)}
+
+
+@app.get("/sessions/{session_id}/report", response_class=fast_json.FastJSONResponse)
+async def session_report_endpoint(
+    session_id: str,
+    limit: int = Query(100, ge=0, le=1000),
+    cursor: Optional[str] = None,
+    agent: Optional[str] = None
+):
+    """
+    Session report for the dashboard (replaces client-side aggregation)
+    
+    summary and agent_breakdown come from precomputed totals; raw_details
+    is one page of rows in audit_item_id order - pass next_cursor back as
+    `cursor` for the next page (null on the last one), or limit=0 for the
+    summary alone.
+    """
+    report = await asyncio.to_thread(session_store.get_summary, session_id)
+    details, next_cursor = [], None
+    if limit:
+        details, next_cursor = await asyncio.to_thread(
+            session_store.get_details, session_id, limit, cursor, agent
+        )
+    return fast_json.FastJSONResponse({
+        'session_id': session_id,
+        **report,
+        'raw_details': details,
+        'next_cursor': next_cursor
+    })
+
+
+@app.post("/sessions/{session_id}/agent-results")
+async def record_session_results_endpoint(session_id: str, rows: List[Dict[str, Any]]):
+    """
+    Record audit_agent_submissions rows written outside the orchestrator
+    
+    Rows are keyed on audit_item_id; a row for an item already recorded
+    replaces it in the totals.
+    """
+    recorded = await asyncio.to_thread(session_store.record_results, session_id, rows)
+    return {'session_id': session_id, 'recorded': recorded}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics for this process"""
+    return metrics_response()
+
+
 if __name__ == "__main__":
     import uvicorn
+    configure_logging()
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,459 @@
+"""
+Act Catalogue - Python-side registry of the checklist acts in src/data
+
+Mirrors src/data/actRegistry.js (plus the deprecated Factories Act) so the
+Python services know every act an audit item can belong to, which
+specialist agent handles it and which partition it is routed to.
+
+The routing table is built once per process from the act JSON files:
+an exact audit_item_id -> partition map, backed by a prefix map on the
+first ID segment (CW, OSHWC, AIRACT, FACT, MFR, ...) for items that are
+newer than the local catalogue. Routing a batch is then one dict lookup
+per item with no I/O.
+
+The same load produces the catalogue index: every checklist item keyed by
+audit_item_id with its statute text, category and precomputed risk weight,
+so clients can send just IDs, verdicts and evidence.
+
+Setting ACT_SNAPSHOT_PATH loads the catalogue from a prebuilt binary
+snapshot instead of parsing the JSON (see act_snapshot.py).
+
+Configuration (environment variables):
+ACT_DATA_DIR      - directory holding the act JSON files (default ./src/data)
+ACT_SNAPSHOT_PATH - prebuilt catalogue snapshot (default: parse the JSON files)
+"""
+
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Mapping
+from collections import Counter
+import functools
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+from audit_records import AuditItem
+from risk_scoring import item_weights, level_code, load_risk_weights, penalty_amount
+
+logger = logging.getLogger(__name__)
+
+ACT_DATA_DIR = Path(os.environ.get(
+    "ACT_DATA_DIR",
+    Path(__file__).resolve().parent / "src" / "data"
+))
+
+ACT_SNAPSHOT_PATH = os.environ.get("ACT_SNAPSHOT_PATH", "")
+
+# Partition used for items no act claims
+OTHER_PARTITION = 'other'
+
+# ============================================
+# ACT REGISTRY
+# ============================================
+
+ACT_REGISTRY = [
+    # Modern labour codes (2019-2020)
+    {
+        'id': 'code_on_wages_2019',
+        'name': 'Code on Wages, 2019',
+        'partition': 'wages',
+        'agent': 'wages_expert',
+        'file': 'codeOnWages.json',
+    },
+    {
+        'id': 'code_on_occupational_safety_2020',
+        'name': 'OSH Code, 2020',
+        'partition': 'safety',
+        'agent': 'safety_expert',
+        'file': 'codeONOccupationalSafety.json',
+    },
+    {
+        'id': 'code_on_social_security_2020',
+        'name': 'Social Security Code, 2020',
+        'partition': 'social_security',
+        'agent': 'social_security_expert',
+        'file': 'codeOnSocialSecurity.json',
+    },
+    {
+        'id': 'code_on_industrial_relations_2020',
+        'name': 'IR Code, 2020',
+        'partition': 'industrial_relations',
+        'agent': 'industrial_relations_expert',
+        'file': 'codeONIndustrialDispute.json',
+    },
+
+    # Central labour acts
+    {
+        'id': 'child_labour_act_1986',
+        'name': 'Child Labour Act, 1986',
+        'partition': 'child_labour',
+        'agent': 'child_labour_expert',
+        'file': 'childLabourAct.json',
+    },
+    {
+        'id': 'legal_metrology_act_2009',
+        'name': 'Legal Metrology Act, 2009',
+        'partition': 'legal_metrology',
+        'agent': 'legal_metrology_expert',
+        'file': 'legalMeterology.json',
+    },
+    {
+        'id': 'sexual_harassment_act_2013',
+        'name': 'POSH Act, 2013',
+        'partition': 'posh',
+        'agent': 'posh_expert',
+        'file': 'sexualHarrasement.json',
+    },
+    {
+        'id': 'factories_act_1948',
+        'name': 'Factories Act, 1948',
+        'partition': 'factories',
+        'agent': 'factories_expert',
+        'file': 'factoriesAct.json',
+    },
+
+    # Environmental acts
+    {
+        'id': 'water_act_1974',
+        'name': 'Water Act, 1974',
+        'partition': 'water',
+        'agent': 'environment_expert',
+        'file': 'waterAct.json',
+    },
+    {
+        'id': 'air_act_1981',
+        'name': 'Air Act, 1981',
+        'partition': 'air',
+        'agent': 'environment_expert',
+        'file': 'airAct.json',
+    },
+    {
+        'id': 'environment_protection_act_1986',
+        'name': 'EPA, 1986',
+        'partition': 'environment_protection',
+        'agent': 'environment_expert',
+        'file': 'environmentProtectionAct.json',
+    },
+    {
+        'id': 'hazardous_waste_rules_2016',
+        'name': 'Hazardous Waste Rules, 2016',
+        'partition': 'hazardous_waste',
+        'agent': 'environment_expert',
+        'file': 'hazardousWasteManagement.json',
+    },
+
+    # Maharashtra state acts
+    {
+        'id': 'maharashtra_labour_welfare_fund_act_1953',
+        'name': 'MH Labour Welfare Fund, 1953',
+        'partition': 'mh_labour_welfare_fund',
+        'agent': 'maharashtra_expert',
+        'file': 'maharashtraLabourWelfareFundAct.json',
+    },
+    {
+        'id': 'maharashtra_factories_rules_1963',
+        'name': 'MH Factory Rules, 1963',
+        'partition': 'mh_factories_rules',
+        'agent': 'maharashtra_expert',
+        'file': 'factoriesRule.json',
+    },
+    {
+        'id': 'maharashtra_manual_labour_act_1969',
+        'name': 'MH Manual Workers Act, 1969',
+        'partition': 'mh_manual_workers',
+        'agent': 'maharashtra_expert',
+        'file': 'maharashtraManualLabourAct.json',
+    },
+    {
+        'id': 'maharashtra_fire_safety_act_2006',
+        'name': 'MH Fire Safety Act, 2006',
+        'partition': 'mh_fire_safety',
+        'agent': 'maharashtra_expert',
+        'file': 'maharashtraFireSafetyAct.json',
+    },
+]
+
+ACTS_BY_PARTITION = {act['partition']: act for act in ACT_REGISTRY}
+ACTS_BY_ID = {act['id']: act for act in ACT_REGISTRY}
+
+
+def id_prefix(audit_item_id: str) -> str:
+    """First segment of an audit_item_id (e.g. 'CW' for 'CW-2019-SEC-03')"""
+    return audit_item_id.split('-', 1)[0]
+
+
+def load_act_items(act: Dict, data_dir: Path = ACT_DATA_DIR) -> List[Dict]:
+    """Read the checklist items of one act from its JSON file"""
+    with open(data_dir / act['file'], encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ============================================
+# CATALOGUE INDEX
+# ============================================
+
+# CatalogueEntry text fields stored in act snapshots
+SNAPSHOT_TEXT_FIELDS = ('audit_item_id', 'question_text', 'legal_text', 'category',
+                         'risk_level', 'workflow_type', 'section_reference')
+
+# Request fields the server can fill in from the catalogue
+HYDRATED_FIELDS = ('question_text', 'legal_text', 'category', 'risk_level', 'workflow_type')
+
+
+class CatalogueEntry:
+    """Compact, read-only view of one checklist item"""
+
+    __slots__ = ('audit_item_id', 'act_id', 'partition', 'question_text', 'legal_text', 'category',
+                 'risk_level', 'workflow_type', 'section_reference', 'penalty_amount', 'weight')
+
+    def __init__(self, audit_item_id, act_id, partition, question_text, legal_text, category,
+                 risk_level, workflow_type, section_reference, penalty_amount, weight=1.0):
+        self.audit_item_id = audit_item_id
+        self.act_id = act_id
+        self.partition = partition
+        self.question_text = question_text
+        self.legal_text = legal_text
+        self.category = category
+        self.risk_level = risk_level
+        self.workflow_type = workflow_type
+        self.section_reference = section_reference
+        self.penalty_amount = penalty_amount
+        self.weight = weight
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _entry_from_item(item: Dict, act: Dict) -> CatalogueEntry:
+    meta = item.get('meta_data') or {}
+    risk_profile = item.get('risk_profile') or {}
+    return CatalogueEntry(
+        audit_item_id=sys.intern(item['audit_item_id']),
+        act_id=sys.intern(act['id']),
+        partition=sys.intern(act['partition']),
+        question_text=item.get('question_text'),
+        legal_text=item.get('legal_text'),
+        category=_intern(item.get('category') or meta.get('category')),
+        risk_level=_intern(item.get('risk_level') or risk_profile.get('severity_level')),
+        workflow_type=_intern(item.get('workflow_type')),
+        section_reference=_intern(item.get('section_reference') or meta.get('section_reference')),
+        penalty_amount=penalty_amount(item)
+    )
+
+
+class ActCatalogue:
+    """
+    All checklist items of every registered act, keyed by audit_item_id
+
+    Loaded once per process. Repeated strings (act ids, categories, risk
+    levels) are interned, and each entry carries its riskWeights.json weight
+    so scoring never has to look at risk_profile again.
+    """
+
+    def __init__(self, entries: Dict[str, CatalogueEntry]):
+        self.entries = entries
+
+    @classmethod
+    def from_files(cls, acts: Iterable[Dict] = ACT_REGISTRY, data_dir: Path = ACT_DATA_DIR) -> 'ActCatalogue':
+        entries = {}
+        duplicates = 0
+
+        for act in acts:
+            try:
+                items = load_act_items(act, data_dir)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping act {act['id']}: {e}")
+                continue
+
+            for item in items:
+                if not item.get('audit_item_id'):
+                    continue
+                if item['audit_item_id'] in entries:
+                    duplicates += 1
+                    continue
+                entries[item['audit_item_id']] = _entry_from_item(item, act)
+
+        catalogue = cls(entries)
+        catalogue._compute_weights()
+        logger.info(f"Act catalogue loaded: {len(entries)} items"
+                    + (f" ({duplicates} duplicate IDs ignored)" if duplicates else ""))
+        return catalogue
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'ActCatalogue':
+        """Build the catalogue from an act_snapshot.ActSnapshot (no JSON parsing)"""
+        blob = snapshot.columns['strings'].tobytes()
+        texts = {field: snapshot.texts(field, blob) for field in SNAPSHOT_TEXT_FIELDS}
+        acts = [ACTS_BY_ID.get(act_id) for act_id in snapshot.meta['acts']]
+        act_codes = snapshot.columns['act_code'].tolist()
+        penalties = snapshot.columns['penalty_amount'].tolist()
+
+        entries = {}
+        for i, (item_id, act_code) in enumerate(zip(texts['audit_item_id'], act_codes)):
+            act = acts[act_code]
+            if act is None:
+                continue
+            entries[sys.intern(item_id)] = CatalogueEntry(
+                audit_item_id=sys.intern(item_id),
+                act_id=sys.intern(act['id']),
+                partition=sys.intern(act['partition']),
+                question_text=texts['question_text'][i],
+                legal_text=texts['legal_text'][i],
+                category=_intern(texts['category'][i]),
+                risk_level=_intern(texts['risk_level'][i]),
+                workflow_type=_intern(texts['workflow_type'][i]),
+                section_reference=_intern(texts['section_reference'][i]),
+                penalty_amount=penalties[i]
+            )
+
+        catalogue = cls(entries)
+        catalogue._compute_weights()
+        logger.info(f"Act catalogue loaded from snapshot {snapshot.path}: {len(entries)} items")
+        return catalogue
+
+    def _compute_weights(self):
+        entries = list(self.entries.values())
+        weights = item_weights(
+            np.array([level_code(e.risk_level) for e in entries], dtype=np.int8),
+            np.array([e.penalty_amount for e in entries], dtype=np.float64),
+            load_risk_weights()
+        )
+        for entry, weight in zip(entries, weights.tolist()):
+            entry.weight = weight
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, audit_item_id: str) -> bool:
+        return audit_item_id in self.entries
+
+    def get(self, audit_item_id: str) -> Optional[CatalogueEntry]:
+        return self.entries.get(audit_item_id)
+
+    def hydrate(self, audit_items: List[Dict]) -> List[Dict]:
+        """
+        Fill in catalogue fields the client left out, in place
+
+        Clients only need to send audit_item_id plus verdicts and evidence;
+        question_text, legal_text, category, risk_level and workflow_type
+        come from the catalogue, and penalty_amount is attached for scoring.
+        Values the client did send are kept.
+        """
+        get = self.entries.get
+        for item in audit_items:
+            entry = get(item.get('audit_item_id'))
+            if entry is None:
+                continue
+            for field in HYDRATED_FIELDS:
+                if item.get(field) is None:
+                    item[field] = getattr(entry, field)
+            item['penalty_amount'] = entry.penalty_amount
+        return audit_items
+
+    def hydrate_records(self, audit_items: List[Mapping]) -> List[AuditItem]:
+        """
+        Like hydrate(), but turns the items into compact AuditItem records
+
+        The list is updated in place, one item at a time, so each request
+        dict is freed as soon as its record exists. Catalogue text the
+        client sent back unchanged (question_text, legal_text, ...) is
+        swapped for the catalogue's own string, so the batch keeps one copy
+        per checklist item instead of one per request item.
+        """
+        get = self.entries.get
+        from_mapping = AuditItem.from_mapping
+        for i, item in enumerate(audit_items):
+            record = from_mapping(item)
+            entry = get(record.get('audit_item_id'))
+            if entry is not None:
+                record.audit_item_id = entry.audit_item_id
+                for field in HYDRATED_FIELDS:
+                    known = getattr(entry, field)
+                    value = getattr(record, field, None)
+                    if value is None or value == known:
+                        setattr(record, field, known)
+                record.penalty_amount = entry.penalty_amount
+            audit_items[i] = record
+        return audit_items
+
+
+@functools.lru_cache(maxsize=None)
+def get_catalogue() -> ActCatalogue:
+    """Process-wide catalogue, loaded on first use (from ACT_SNAPSHOT_PATH when usable)"""
+    if ACT_SNAPSHOT_PATH:
+        # Imported here so processes without a snapshot never load it
+        from act_snapshot import open_snapshot
+        snapshot = open_snapshot(Path(ACT_SNAPSHOT_PATH))
+        if snapshot is not None:
+            return ActCatalogue.from_snapshot(snapshot)
+    return ActCatalogue.from_files()
+
+
+# ============================================
+# ITEM ROUTER
+# ============================================
+
+class ItemRouter:
+    """
+    Routes audit items to act partitions
+
+    Built once from the act catalogue; route() and partition() never touch
+    the filesystem.
+    """
+
+    def __init__(self, exact: Dict[str, str], prefixes: Dict[str, str]):
+        self.exact = exact
+        self.prefixes = prefixes
+
+    @classmethod
+    def from_catalogue(cls, catalogue: ActCatalogue) -> 'ItemRouter':
+        exact = {}
+        prefixes = {}
+
+        for item_id, entry in catalogue.entries.items():
+            exact[item_id] = entry.partition
+
+            prefix = id_prefix(item_id)
+            owner = prefixes.setdefault(prefix, entry.partition)
+            if owner != entry.partition:
+                logger.warning(f"ID prefix {prefix!r} is shared by {owner} and {entry.partition}")
+
+        logger.info(f"Routing table built: {len(exact)} items, {len(prefixes)} prefixes")
+        return cls(exact, prefixes)
+
+    def route(self, audit_item_id: str) -> str:
+        """Partition for one item ID ('other' when no act claims it)"""
+        partition = self.exact.get(audit_item_id)
+        if partition is None:
+            partition = self.prefixes.get(id_prefix(audit_item_id), OTHER_PARTITION)
+        return partition
+
+    def partition(self, audit_items: List[Dict]) -> Dict[str, List[Dict]]:
+        """Group items by partition in a single pass"""
+        partitions = {OTHER_PARTITION: []}
+        exact_get = self.exact.get
+        prefix_get = self.prefixes.get
+
+        for item in audit_items:
+            item_id = item.get('audit_item_id') or ''
+            partition = exact_get(item_id) or prefix_get(id_prefix(item_id), OTHER_PARTITION)
+            bucket = partitions.get(partition)
+            if bucket is None:
+                bucket = partitions[partition] = []
+            bucket.append(item)
+
+        return partitions
+
+
+@functools.lru_cache(maxsize=None)
+def get_router() -> ItemRouter:
+    """Process-wide router, built on first use"""
+    return ItemRouter.from_catalogue(get_catalogue())
+
+
+def summarize_partitions(partitions: Dict[str, List[Dict]]) -> Counter:
+    """Item count per partition"""
+    return Counter({name: len(items) for name, items in partitions.items()})
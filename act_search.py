@@ -0,0 +1,467 @@
+"""
+Act Search - BM25 full-text index over the act catalogue
+
+Finds checklist items for a free-text observation ("fire extinguisher
+expired", "no creche for women workers") across every act in src/data.
+
+Each checklist item is one document. Its question_text, simplified_guidance,
+legal_text, applicability_criteria, category and section_reference are
+tokenized into an inverted index with per-field weights (a match in the
+question counts more than one in the statute text). Because k1 and b are
+fixed, each posting stores its final BM25 contribution, so a query is a few
+NumPy scatter-adds over the postings of its terms plus a top-k selection -
+well under a millisecond for the ~700-item catalogue.
+
+Results can be filtered by act (id or partition), risk level and category.
+related() reuses the same index to find the sections closest to a given
+item, so agents can pull neighbouring requirements into their context.
+
+The index is built from the act JSON files on first use. Set
+ACT_SEARCH_SNAPSHOT to load a prebuilt .npz snapshot instead (rebuilt and
+rewritten automatically when the act files change). act_snapshot.py
+writes it as part of the act data build.
+
+Installation:
+pip install numpy
+
+Usage:
+python act_search.py build --output act_search.npz
+python act_search.py query "fire extinguisher refill" --risk-level Critical
+
+Configuration (environment variables):
+ACT_SEARCH_SNAPSHOT - prebuilt index snapshot (default: build in memory)
+ACT_SEARCH_K1       - BM25 term frequency saturation (default 1.2)
+ACT_SEARCH_B        - BM25 length normalisation (default 0.75)
+"""
+
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+from collections import defaultdict
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+from act_catalogue import ACT_DATA_DIR, ACT_REGISTRY, get_catalogue, load_act_items
+from act_snapshot import source_signature as act_files_signature
+from risk_scoring import RISK_LEVELS, UNKNOWN_LEVEL, level_code
+
+logger = logging.getLogger(__name__)
+
+ACT_SEARCH_SNAPSHOT = os.environ.get("ACT_SEARCH_SNAPSHOT", "")
+ACT_SEARCH_K1 = float(os.environ.get("ACT_SEARCH_K1", "1.2"))
+ACT_SEARCH_B = float(os.environ.get("ACT_SEARCH_B", "0.75"))
+
+# Bump when the snapshot layout or tokenization changes
+SNAPSHOT_FORMAT = 1
+
+# Term frequency multiplier per indexed field
+FIELD_WEIGHTS = {
+    'question_text': 3.0,
+    'simplified_guidance': 2.0,
+    'category': 2.0,
+    'section_reference': 1.0,
+    'applicability_criteria': 1.0,
+    'legal_text': 1.0,
+}
+
+# Terms used by related() to describe an item (its rarest ones)
+RELATED_QUERY_TERMS = 24
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be been being by can could do does for from has have if in into is it its
+may must no not of on or shall should such than that the their there these this those to under
+was were which while who will with within without any all per
+""".split())
+
+_ACT_INDEX = {act['id']: code for code, act in enumerate(ACT_REGISTRY)}
+_ACT_INDEX.update({act['partition']: code for code, act in enumerate(ACT_REGISTRY)})
+
+
+def _normalize(token: str) -> str:
+    # Light plural folding so "wages" matches "wage" and "registers" "register"
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    return [_normalize(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _field_text(item: Dict, field: str) -> str:
+    value = item.get(field)
+    if value is None:
+        value = (item.get('meta_data') or {}).get(field)
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return ' '.join(_field_text(value, key) for key in value)
+    if isinstance(value, list):
+        return ' '.join(v if isinstance(v, str) else json.dumps(v) for v in value)
+    return ''
+
+
+def source_signature(acts: Iterable[Dict] = ACT_REGISTRY, data_dir: Path = ACT_DATA_DIR) -> Optional[str]:
+    """
+    Hash of the act files and index settings a snapshot was built from
+
+    None when no act files are deployed (a snapshot is then used as is).
+    """
+    files = act_files_signature(acts, data_dir)
+    if files is None:
+        return None
+    material = [SNAPSHOT_FORMAT, ACT_SEARCH_K1, ACT_SEARCH_B, sorted(FIELD_WEIGHTS.items()), files]
+    return hashlib.sha256(json.dumps(material).encode('utf-8')).hexdigest()
+
+
+class ActSearchIndex:
+    """
+    Immutable BM25 index: postings in CSR layout plus per-document filter columns
+
+    terms[i]'s postings are doc_ids/impacts[offsets[i]:offsets[i + 1]];
+    impacts are final BM25 scores, so querying is summation only.
+    """
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        impacts: np.ndarray,
+        item_ids: np.ndarray,
+        act_codes: np.ndarray,
+        level_codes: np.ndarray,
+        category_codes: np.ndarray,
+        categories: np.ndarray,
+        signature: str = ''
+    ):
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+        self.item_ids = item_ids
+        self.act_codes = act_codes
+        self.level_codes = level_codes
+        self.category_codes = category_codes
+        self.categories = categories
+        self.signature = signature
+
+        self._term_ids = {term: i for i, term in enumerate(terms.tolist())}
+        self._doc_index = {item_id: i for i, item_id in enumerate(item_ids.tolist())}
+        self._category_index = {category.lower(): i for i, category in enumerate(categories.tolist())}
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    # === Build / snapshot ===
+
+    @classmethod
+    def build(cls, acts: Iterable[Dict] = ACT_REGISTRY, data_dir: Path = ACT_DATA_DIR) -> 'ActSearchIndex':
+        """Index every checklist item of the given acts"""
+        acts = list(acts)
+        catalogue = get_catalogue()
+        seen = set()
+        item_ids: List[str] = []
+        act_codes: List[int] = []
+        level_codes: List[int] = []
+        category_codes: List[int] = []
+        categories: Dict[str, int] = {}
+        doc_lengths: List[float] = []
+        postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+
+        for act in acts:
+            try:
+                items = load_act_items(act, data_dir)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping act {act['id']} in search index: {e}")
+                continue
+
+            for item in items:
+                item_id = item.get('audit_item_id')
+                # Same first-wins rule as the catalogue for duplicate IDs
+                if not item_id or item_id in seen:
+                    continue
+                seen.add(item_id)
+                entry = catalogue.get(item_id)
+
+                frequencies: Dict[str, float] = defaultdict(float)
+                for field, weight in FIELD_WEIGHTS.items():
+                    for token in tokenize(_field_text(item, field)):
+                        frequencies[token] += weight
+                if not frequencies:
+                    continue
+
+                doc = len(item_ids)
+                item_ids.append(item_id)
+                act_codes.append(_ACT_INDEX[act['id']])
+                level_codes.append(level_code(entry.risk_level if entry else item.get('risk_level')))
+                category = (entry.category if entry else item.get('category')) or ''
+                category_codes.append(categories.setdefault(category, len(categories)))
+                doc_lengths.append(sum(frequencies.values()))
+                for token, frequency in frequencies.items():
+                    postings[token].append((doc, frequency))
+
+        n_docs = len(item_ids)
+        lengths = np.array(doc_lengths, dtype=np.float64)
+        avg_length = float(lengths.mean()) if n_docs else 1.0
+        norms = ACT_SEARCH_K1 * (1 - ACT_SEARCH_B + ACT_SEARCH_B * lengths / avg_length)
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_ids = []
+        impacts = []
+        for i, term in enumerate(terms):
+            docs, frequencies = zip(*postings[term])
+            docs = np.array(docs, dtype=np.int32)
+            frequencies = np.array(frequencies, dtype=np.float64)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            doc_ids.append(docs)
+            impacts.append(idf * frequencies * (ACT_SEARCH_K1 + 1) / (frequencies + norms[docs]))
+            offsets[i + 1] = offsets[i] + len(docs)
+
+        index = cls(
+            terms=np.array(terms, dtype=np.str_),
+            offsets=offsets,
+            doc_ids=np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int32),
+            impacts=np.concatenate(impacts).astype(np.float32) if impacts else np.zeros(0, dtype=np.float32),
+            item_ids=np.array(item_ids, dtype=np.str_),
+            act_codes=np.array(act_codes, dtype=np.int16),
+            level_codes=np.array(level_codes, dtype=np.int8),
+            category_codes=np.array(category_codes, dtype=np.int16),
+            categories=np.array(list(categories), dtype=np.str_),
+            signature=source_signature(acts, data_dir) or ''
+        )
+        logger.info(f"🔎 Act search index built: {n_docs} items, {len(terms)} terms, {len(index.doc_ids)} postings")
+        return index
+
+    def save(self, path: Path):
+        """Write the index as an .npz snapshot (no pickled objects)"""
+        path = Path(path)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f,
+                terms=self.terms,
+                offsets=self.offsets,
+                doc_ids=self.doc_ids,
+                impacts=self.impacts,
+                item_ids=self.item_ids,
+                act_codes=self.act_codes,
+                level_codes=self.level_codes,
+                category_codes=self.category_codes,
+                categories=self.categories,
+                signature=np.array(self.signature)
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'ActSearchIndex':
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        arrays['signature'] = str(arrays['signature'])
+        return cls(**arrays)
+
+    # === Queries ===
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        act: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Best matching items for a free-text query
+
+        act is an act id or partition; risk_level and category match
+        case-insensitively. Returns [(audit_item_id, score)], best first.
+        """
+        return self._rank(set(tokenize(query)), limit, act, risk_level, category)
+
+    def related(
+        self,
+        audit_item_id: str,
+        limit: int = 5,
+        same_act: bool = False
+    ) -> List[Tuple[str, float]]:
+        """Items most similar to a catalogued item (the item itself excluded)"""
+        doc = self._doc_index.get(audit_item_id)
+        entry = get_catalogue().get(audit_item_id)
+        if doc is None or entry is None:
+            return []
+
+        terms = {t for t in tokenize(f"{entry.question_text or ''} {entry.legal_text or ''}") if t in self._term_ids}
+        # The rarest terms say most about the item and keep the query short
+        terms = sorted(terms, key=lambda t: self.offsets[self._term_ids[t] + 1] - self.offsets[self._term_ids[t]])
+        act = entry.act_id if same_act else None
+        return self._rank(terms[:RELATED_QUERY_TERMS], limit, act, None, None, exclude=doc)
+
+    def _rank(
+        self,
+        terms: Iterable[str],
+        limit: int,
+        act: Optional[str],
+        risk_level: Optional[str],
+        category: Optional[str],
+        exclude: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        mask = self._filter_mask(act, risk_level, category)
+        if mask is False or limit <= 0:
+            return []
+
+        scores = np.zeros(len(self.item_ids), dtype=np.float32)
+        matched = False
+        for term in terms:
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Postings of one term name each document once, so += is exact
+            scores[self.doc_ids[start:end]] += self.impacts[start:end]
+            matched = True
+        if not matched:
+            return []
+
+        if mask is not None:
+            scores[~mask] = 0
+        if exclude is not None:
+            scores[exclude] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        # Best first; ties keep catalogue order
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(self.item_ids[doc], round(float(scores[doc]), 4)) for doc in candidates.tolist()]
+
+    def _filter_mask(self, act: Optional[str], risk_level: Optional[str], category: Optional[str]):
+        """Boolean mask of documents passing the filters, None for no filter, False for none pass"""
+        mask = None
+        if act:
+            code = _ACT_INDEX.get(act)
+            if code is None:
+                return False
+            mask = self.act_codes == code
+        if risk_level:
+            code = level_code(risk_level)
+            if code == UNKNOWN_LEVEL:
+                return False
+            level_mask = self.level_codes == code
+            mask = level_mask if mask is None else mask & level_mask
+        if category:
+            code = self._category_index.get(category.lower())
+            if code is None:
+                return False
+            category_mask = self.category_codes == code
+            mask = category_mask if mask is None else mask & category_mask
+        return mask
+
+
+def search_hits(results: List[Tuple[str, float]]) -> List[Dict[str, Any]]:
+    """Attach catalogue fields to (audit_item_id, score) results"""
+    catalogue = get_catalogue()
+    hits = []
+    for item_id, score in results:
+        entry = catalogue.get(item_id)
+        if entry is None:
+            continue
+        hits.append({
+            'audit_item_id': item_id,
+            'score': score,
+            'act_id': entry.act_id,
+            'partition': entry.partition,
+            'section_reference': entry.section_reference,
+            'category': entry.category,
+            'risk_level': entry.risk_level,
+            'question_text': entry.question_text,
+        })
+    return hits
+
+
+def related_sections(audit_item_id: str, limit: int = 5, same_act: bool = False) -> List[Dict[str, Any]]:
+    """Catalogue items related to one item, for agents that want extra context"""
+    return search_hits(get_search_index().related(audit_item_id, limit, same_act))
+
+
+@functools.lru_cache(maxsize=None)
+def get_search_index() -> ActSearchIndex:
+    """
+    Process-wide search index
+
+    Loaded from ACT_SEARCH_SNAPSHOT when it matches the current act files,
+    otherwise built (and written there when the variable is set).
+    """
+    if not ACT_SEARCH_SNAPSHOT:
+        return ActSearchIndex.build()
+
+    snapshot = Path(ACT_SEARCH_SNAPSHOT)
+    if snapshot.exists():
+        try:
+            index = ActSearchIndex.load(snapshot)
+            current = source_signature()
+            if current is None or index.signature == current:
+                logger.info(f"🔎 Act search index loaded from {snapshot}: {len(index)} items")
+                return index
+            logger.info(f"🔎 Act search snapshot {snapshot} is stale; rebuilding")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️  Unreadable act search snapshot {snapshot}: {e}")
+
+    index = ActSearchIndex.build()
+    try:
+        index.save(snapshot)
+    except OSError as e:
+        logger.warning(f"⚠️  Could not write act search snapshot {snapshot}: {e}")
+    return index
+
+
+# ============================================
+# CLI
+# ============================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the act catalogue search index")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='write an index snapshot')
+    build.add_argument('--output', type=Path, default=Path(ACT_SEARCH_SNAPSHOT or 'act_search.npz'))
+
+    query = commands.add_parser('query', help='search the catalogue')
+    query.add_argument('text')
+    query.add_argument('--limit', type=int, default=10)
+    query.add_argument('--act')
+    query.add_argument('--risk-level', choices=RISK_LEVELS)
+    query.add_argument('--category')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'build':
+        ActSearchIndex.build().save(args.output)
+        print(f"Wrote {args.output}")
+        return
+
+    index = get_search_index()
+    started = time.perf_counter()
+    results = index.search(args.text, args.limit, args.act, args.risk_level, args.category)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for hit in search_hits(results):
+        print(f"{hit['score']:8.3f}  {hit['audit_item_id']:<22} [{hit['risk_level']}] {hit['question_text']}")
+    print(f"{len(results)} results in {elapsed_ms:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+Act Snapshot - prebuilt binary copy of the act catalogue for fast worker starts
+
+Every process that touches the catalogue used to parse ~1 MB of act JSON
+(src/data/*.json) on startup. The build step below compiles the catalogue
+fields into one versioned file of fixed-layout columns:
+
+    header   b"ACTSNAP\\0", format version, metadata length
+    metadata JSON: signature of the source files, item count, act ids and
+             the offset/dtype/length of every column
+    columns  8-byte aligned little-endian arrays: one UTF-8 blob holding
+             every string, int64 offsets and a null mask per text field,
+             act codes and penalty amounts
+
+Workers mmap the file and view the columns with np.frombuffer, so opening a
+snapshot reads no JSON and the pages are shared between processes on the
+same host. act_catalogue.get_catalogue() uses the snapshot when
+ACT_SNAPSHOT_PATH points at one whose signature matches the act files (or
+when the act files are not deployed at all), and falls back to the JSON
+files otherwise.
+
+The build also writes the search index snapshot (see act_search.py) next
+to it, so neither the catalogue nor the search index is built from JSON at
+startup.
+
+Usage:
+python act_snapshot.py build --output build/act_catalogue.snap
+python act_snapshot.py info build/act_catalogue.snap
+
+Configuration (environment variables):
+ACT_SNAPSHOT_PATH - default --output (read by act_catalogue.py)
+"""
+
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Iterable
+from datetime import datetime
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from act_catalogue import ACT_DATA_DIR, ACT_REGISTRY, ACT_SNAPSHOT_PATH, ActCatalogue, SNAPSHOT_TEXT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ACTSNAP\0"
+# Bump when the layout or the set of columns changes
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+
+
+class SnapshotError(ValueError):
+    """Missing, truncated or incompatible snapshot file"""
+
+
+def source_signature(acts: Iterable[Dict] = ACT_REGISTRY, data_dir: Path = ACT_DATA_DIR) -> Optional[str]:
+    """
+    Content hash of the act files, or None when none of them are present
+
+    Hashing ~1 MB takes about a millisecond; unlike mtimes it survives
+    checkouts and image builds.
+    """
+    digest = hashlib.sha256(str(FORMAT_VERSION).encode())
+    found = False
+    for act in acts:
+        digest.update(act['id'].encode() + b'\0')
+        try:
+            with open(data_dir / act['file'], 'rb') as f:
+                digest.update(f.read())
+            found = True
+        except OSError:
+            digest.update(b'\0missing\0')
+    return digest.hexdigest() if found else None
+
+
+# ============================================
+# WRITE
+# ============================================
+
+def write_snapshot(catalogue: ActCatalogue, path: Path, signature: Optional[str] = None) -> Dict[str, Any]:
+    """Write a catalogue snapshot atomically and return its metadata"""
+    entries = list(catalogue.entries.values())
+    act_ids = [act['id'] for act in ACT_REGISTRY]
+    act_index = {act_id: code for code, act_id in enumerate(act_ids)}
+
+    blob = bytearray()
+    arrays: Dict[str, np.ndarray] = {}
+    for field in SNAPSHOT_TEXT_FIELDS:
+        offsets = np.zeros(len(entries) + 1, dtype='<i8')
+        offsets[0] = len(blob)
+        nulls = np.zeros(len(entries), dtype=np.uint8)
+        for i, entry in enumerate(entries):
+            value = getattr(entry, field)
+            if value is None:
+                nulls[i] = 1
+            else:
+                blob += value.encode('utf-8')
+            offsets[i + 1] = len(blob)
+        arrays[f'{field}.offsets'] = offsets
+        arrays[f'{field}.null'] = nulls
+    arrays['act_code'] = np.array([act_index[entry.act_id] for entry in entries], dtype='<i2')
+    arrays['penalty_amount'] = np.array([entry.penalty_amount for entry in entries], dtype='<f8')
+    arrays['strings'] = np.frombuffer(bytes(blob), dtype=np.uint8)
+
+    columns = {}
+    offset = 0
+    for name, array in arrays.items():
+        columns[name] = {'offset': offset, 'dtype': array.dtype.str, 'length': len(array)}
+        offset += _aligned(array.nbytes)
+
+    meta = {
+        'format': FORMAT_VERSION,
+        'signature': signature if signature is not None else source_signature(),
+        'created_at': datetime.now().isoformat(),
+        'items': len(entries),
+        'acts': act_ids,
+        'columns': columns,
+    }
+    meta_bytes = json.dumps(meta).encode('utf-8')
+    data_start = _aligned(_HEADER.size + len(meta_bytes))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(meta_bytes)))
+        f.write(meta_bytes)
+        f.write(b'\0' * (data_start - _HEADER.size - len(meta_bytes)))
+        for array in arrays.values():
+            data = array.tobytes()
+            f.write(data)
+            f.write(b'\0' * (_aligned(len(data)) - len(data)))
+    os.replace(tmp, path)
+    return meta
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+# ============================================
+# READ
+# ============================================
+
+class ActSnapshot:
+    """
+    Read-only, memory-mapped view of a catalogue snapshot
+
+    Columns are NumPy views into the mapping; strings are decoded only
+    when asked for.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot open act snapshot {self.path}: {e}") from e
+
+        if len(self._mmap) < _HEADER.size:
+            raise SnapshotError(f"{self.path} is not an act snapshot")
+        magic, version, meta_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path} is not an act snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{self.path} has format {version}, expected {FORMAT_VERSION}")
+
+        self.meta = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_length])
+        data_start = _aligned(_HEADER.size + meta_length)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, spec in self.meta['columns'].items():
+            dtype = np.dtype(spec['dtype'])
+            start = data_start + spec['offset']
+            if start + dtype.itemsize * spec['length'] > len(self._mmap):
+                raise SnapshotError(f"{self.path} is truncated")
+            self.columns[name] = np.frombuffer(self._mmap, dtype=dtype, count=spec['length'], offset=start)
+
+    def __len__(self):
+        return self.meta['items']
+
+    @property
+    def signature(self) -> Optional[str]:
+        return self.meta.get('signature')
+
+    def text(self, field: str, i: int) -> Optional[str]:
+        if self.columns[f'{field}.null'][i]:
+            return None
+        offsets = self.columns[f'{field}.offsets']
+        return self.columns['strings'][offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+
+    def texts(self, field: str, blob: Optional[bytes] = None) -> List[Optional[str]]:
+        """
+        Decode a whole text column in one pass
+
+        Pass blob=bytes(columns['strings']) when decoding several columns
+        to copy the string table once.
+        """
+        if blob is None:
+            blob = self.columns['strings'].tobytes()
+        offsets = self.columns[f'{field}.offsets'].tolist()
+        nulls = self.columns[f'{field}.null'].tolist()
+        return [
+            None if null else blob[offsets[i]:offsets[i + 1]].decode('utf-8')
+            for i, null in enumerate(nulls)
+        ]
+
+
+def open_snapshot(path: Path) -> Optional[ActSnapshot]:
+    """
+    Open a snapshot for loading, or return None when it is unusable
+
+    A snapshot whose signature does not match the act files on disk is
+    ignored (the files win); with no act files deployed it is used as is.
+    """
+    try:
+        snapshot = ActSnapshot(path)
+    except SnapshotError as e:
+        logger.warning(f"⚠️  {e}; loading the act JSON files instead")
+        return None
+
+    current = source_signature()
+    if current is not None and current != snapshot.signature:
+        logger.warning(f"⚠️  Act snapshot {path} is stale (act files changed); loading the act JSON files instead")
+        return None
+    return snapshot
+
+
+# ============================================
+# CLI
+# ============================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the act catalogue snapshot")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='compile src/data/*.json into a snapshot')
+    build.add_argument('--output', type=Path, default=Path(ACT_SNAPSHOT_PATH or 'build/act_catalogue.snap'))
+    build.add_argument('--search-output', type=Path,
+                       help='search index snapshot (default: act_search.npz next to --output)')
+
+    info = commands.add_parser('info', help='print snapshot metadata')
+    info.add_argument('path', type=Path)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'info':
+        snapshot = ActSnapshot(args.path)
+        meta = {key: value for key, value in snapshot.meta.items() if key != 'columns'}
+        meta['current'] = snapshot.signature == source_signature()
+        print(json.dumps(meta, indent=2))
+        return
+
+    catalogue = ActCatalogue.from_files()
+    meta = write_snapshot(catalogue, args.output)
+    print(f"Wrote {args.output}: {meta['items']} items, {args.output.stat().st_size / 1024:.0f} KiB")
+
+    from act_search import ActSearchIndex
+    search_output = args.search_output or args.output.with_name('act_search.npz')
+    ActSearchIndex.build().save(search_output)
+    print(f"Wrote {search_output}")
+
+
+if __name__ == '__main__':
+    main()
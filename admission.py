@@ -0,0 +1,350 @@
+"""
+Admission Control - item budgets, a bounded priority queue and fast 429s
+
+Without it every submission is accepted, whatever its size: when the real
+agents are slow, batches pile up in memory until the process runs out.
+Work is measured in audit items rather than requests (a 5,000-item audit
+costs a thousand times a 5-item one):
+
+- a global budget of items being audited at once (ADMISSION_MAX_ITEMS)
+- a per-client budget of items running or waiting (ADMISSION_CLIENT_MAX_ITEMS);
+  clients are told apart by the ADMISSION_CLIENT_HEADER request header, or
+  by their address when it is missing
+- a bounded queue (ADMISSION_QUEUE_ITEMS) for batches that do not fit yet,
+  served by batch_priority(): Critical-heavy batches first, then smaller
+  batches before larger ones
+- anything beyond that gets 429 at once, with a Retry-After hint of the
+  backlog divided by the recent throughput; so does a batch that waited
+  ADMISSION_QUEUE_TIMEOUT_SECONDS without being admitted
+
+A batch larger than a budget is charged the whole budget, so it runs on
+its own instead of never. AdmissionController holds the budgets of one
+process (under `serve.py --workers N` each worker has its own); the batch
+service keeps its backlog in the job store instead, which every worker
+process shares (see python_ai_agent_example.py).
+
+Configuration (environment variables):
+ADMISSION_MAX_ITEMS             - items audited at once per process, 0 disables admission control (default 20000)
+ADMISSION_CLIENT_MAX_ITEMS      - items one client may have running or queued (default 10000)
+ADMISSION_QUEUE_ITEMS           - items allowed to wait for admission (default 20000)
+ADMISSION_QUEUE_TIMEOUT_SECONDS - longest wait before a queued batch gets 429 (default 30)
+ADMISSION_CRITICAL_SHARE        - share of Critical items that makes a batch Critical-heavy (default 0.25)
+ADMISSION_CLIENT_HEADER         - request header identifying the client (default X-Client-Id)
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Mapping
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from metrics import Counter, Gauge, Histogram
+from risk_scoring import level_code
+
+ADMISSION_MAX_ITEMS = int(os.environ.get("ADMISSION_MAX_ITEMS", "20000"))
+ADMISSION_CLIENT_MAX_ITEMS = int(os.environ.get("ADMISSION_CLIENT_MAX_ITEMS", "10000"))
+ADMISSION_QUEUE_ITEMS = int(os.environ.get("ADMISSION_QUEUE_ITEMS", "20000"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+ADMISSION_CRITICAL_SHARE = float(os.environ.get("ADMISSION_CRITICAL_SHARE", "0.25"))
+ADMISSION_CLIENT_HEADER = os.environ.get("ADMISSION_CLIENT_HEADER", "X-Client-Id")
+
+# Retry-After bounds, and the hint used before any throughput is measured
+MIN_RETRY_AFTER_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 60
+DEFAULT_RETRY_AFTER_SECONDS = 5
+
+# Completions older than this do not count towards the throughput estimate
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+# batch_priority(): Critical-heavy batches sort below every other batch
+PRIORITY_BAND = 10 ** 7
+
+# Rejection reasons
+CLIENT_BUDGET = "client_budget"
+SATURATED = "saturated"
+QUEUE_TIMEOUT = "queue_timeout"
+
+ADMISSION_DECISIONS = Counter(
+    'admission_decisions_total',
+    'Admission decisions (admitted, queued = admitted after waiting, cancelled, or a rejection reason)',
+    ['controller', 'outcome']
+)
+ADMISSION_ITEMS = Gauge(
+    'admission_items',
+    'Items admitted (running) and waiting for admission',
+    ['controller', 'state']
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    'admission_wait_seconds',
+    'Time batches spent in the admission queue before being admitted',
+    ['controller']
+)
+
+
+class AdmissionRejected(Exception):
+    """A batch was turned away; retry_after is the suggested wait in seconds"""
+
+    def __init__(self, reason: str, retry_after: int, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def too_busy(error: AdmissionRejected) -> HTTPException:
+    """429 response for a rejected batch, with its Retry-After hint"""
+    return HTTPException(
+        status_code=429,
+        detail={'error': str(error), 'reason': error.reason, 'retry_after': error.retry_after},
+        headers={'Retry-After': str(error.retry_after)}
+    )
+
+
+def client_id(request: Request) -> str:
+    """Budget key of the client sending a request"""
+    client = request.headers.get(ADMISSION_CLIENT_HEADER)
+    if client:
+        return client
+    return request.client.host if request.client else 'unknown'
+
+
+def batch_priority(audit_items: Iterable[Mapping], catalogue=None) -> int:
+    """
+    Queue priority of a batch (lower is served first)
+
+    Batches where at least ADMISSION_CRITICAL_SHARE of the items are
+    Critical come first, then every other batch; within each group smaller
+    batches go first. Items without a risk_level are looked up in the act
+    catalogue when one is given.
+    """
+    total = critical = 0
+    for item in audit_items:
+        total += 1
+        level = item.get('risk_level')
+        if level is None and catalogue is not None:
+            entry = catalogue.get(item.get('audit_item_id'))
+            level = entry.risk_level if entry is not None else None
+        if level_code(level) == 0:
+            critical += 1
+    heavy = total > 0 and critical >= ADMISSION_CRITICAL_SHARE * total
+    return (0 if heavy else PRIORITY_BAND) + min(total, PRIORITY_BAND - 1)
+
+
+def retry_after_seconds(backlog_items: float, items_per_second: float) -> int:
+    """Seconds until a backlog of items should have drained, for Retry-After"""
+    if items_per_second <= 0:
+        return DEFAULT_RETRY_AFTER_SECONDS
+    seconds = math.ceil(backlog_items / items_per_second)
+    return max(MIN_RETRY_AFTER_SECONDS, min(MAX_RETRY_AFTER_SECONDS, seconds))
+
+
+class ThroughputMeter:
+    """Items finished per second over the last THROUGHPUT_WINDOW_SECONDS"""
+
+    def __init__(self, window_seconds: float = THROUGHPUT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._events: deque = deque()
+        self._items = 0
+        self._started = time.monotonic()
+
+    def record(self, items: int):
+        self._events.append((time.monotonic(), items))
+        self._items += items
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        while self._events and now - self._events[0][0] > self.window_seconds:
+            self._items -= self._events.popleft()[1]
+        # A young process has not been up for a whole window yet
+        elapsed = min(self.window_seconds, now - self._started)
+        return self._items / elapsed if elapsed > 0 else 0.0
+
+
+class Ticket:
+    """Admission of one batch; release() once it is done (safe to call twice)"""
+
+    __slots__ = ('_controller', 'client', 'items', 'cost', 'client_cost', 'queued_cost', 'released')
+
+    def __init__(self, controller: 'AdmissionController', client: str, items: int,
+                 cost: int, client_cost: int, queued_cost: int):
+        self._controller = controller
+        self.client = client
+        self.items = items
+        self.cost = cost
+        self.client_cost = client_cost
+        self.queued_cost = queued_cost
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self._controller._release(self)
+
+
+class AdmissionController:
+    """
+    Item budgets and a bounded priority queue for one process
+
+    acquire() admits a batch at once when it fits the budgets and nobody is
+    waiting, queues it when there is room, and raises AdmissionRejected
+    otherwise. Queued batches are admitted strictly in priority order
+    (equal priorities in arrival order), so a large Critical batch at the
+    head is not starved by small ones slipping past it. Like asyncio
+    primitives it belongs to the event loop it is used on.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_items: int = ADMISSION_MAX_ITEMS,
+        client_max_items: int = ADMISSION_CLIENT_MAX_ITEMS,
+        queue_items: int = ADMISSION_QUEUE_ITEMS,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS
+    ):
+        self.name = name
+        self.max_items = max_items
+        self.client_max_items = client_max_items
+        self.queue_items = queue_items
+        self.queue_timeout = queue_timeout
+        self.throughput = ThroughputMeter()
+        self._running = 0
+        self._queued = 0
+        # client -> items running or queued
+        self._outstanding: Dict[str, int] = {}
+        # (priority, arrival, future, ticket); cancelled waiters are dropped lazily
+        self._waiters: List[tuple] = []
+        self._order = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0
+
+    @property
+    def running_items(self) -> int:
+        return self._running
+
+    @property
+    def queued_items(self) -> int:
+        return self._queued
+
+    async def acquire(self, client: str, items: int, priority: int = 0) -> Ticket:
+        """Admit a batch of `items` items for `client`, waiting in the queue if needed"""
+        if not self.enabled:
+            return Ticket(self, client, items, 0, 0, 0)
+
+        cost = min(max(items, 1), self.max_items)
+        client_cost = min(cost, self.client_max_items)
+        outstanding = self._outstanding.get(client, 0)
+        if outstanding + client_cost > self.client_max_items:
+            self._reject(CLIENT_BUDGET, outstanding + client_cost,
+                         f"Client {client} already has {outstanding} items running or queued "
+                         f"(budget {self.client_max_items})")
+
+        ticket = Ticket(self, client, items, cost, client_cost, min(cost, self.queue_items))
+        if self._running + cost <= self.max_items and not self._has_waiters():
+            self._running += cost
+            self._outstanding[client] = outstanding + client_cost
+            self._update_gauges()
+            ADMISSION_DECISIONS.inc(controller=self.name, outcome='admitted')
+            return ticket
+        if self.queue_items <= 0 or self._queued + ticket.queued_cost > self.queue_items:
+            self._reject(SATURATED, self._running + self._queued + cost,
+                         f"Server is saturated ({self._running} items running, {self._queued} queued)")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future, ticket))
+        self._queued += ticket.queued_cost
+        self._outstanding[client] = outstanding + client_cost
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Admitted just as the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    ticket.release()
+                    raise
+            else:
+                future.cancel()
+                self._queued -= ticket.queued_cost
+                self._forget_client(ticket)
+                # A blocked head leaving may let the next waiters in
+                self._dispatch()
+                if isinstance(e, asyncio.CancelledError):
+                    ADMISSION_DECISIONS.inc(controller=self.name, outcome='cancelled')
+                    raise
+                self._reject(QUEUE_TIMEOUT, self._running + self._queued + cost,
+                             f"Batch waited {self.queue_timeout:g}s without being admitted")
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, controller=self.name)
+        ADMISSION_DECISIONS.inc(controller=self.name, outcome='queued')
+        return ticket
+
+    @asynccontextmanager
+    async def admit(self, client: str, items: int, priority: int = 0):
+        """`async with controller.admit(...)`: acquire() and release when the block ends"""
+        ticket = await self.acquire(client, items, priority)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _has_waiters(self) -> bool:
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        return bool(self._waiters)
+
+    def _dispatch(self):
+        """Admit waiters from the head of the queue while they fit"""
+        while self._has_waiters():
+            _, _, future, ticket = self._waiters[0]
+            if self._running + ticket.cost > self.max_items:
+                break
+            heapq.heappop(self._waiters)
+            self._queued -= ticket.queued_cost
+            self._running += ticket.cost
+            future.set_result(None)
+        self._update_gauges()
+
+    def _release(self, ticket: Ticket):
+        if ticket.cost == 0:
+            return
+        self._running -= ticket.cost
+        self._forget_client(ticket)
+        self.throughput.record(ticket.items)
+        self._dispatch()
+
+    def _forget_client(self, ticket: Ticket):
+        remaining = self._outstanding.get(ticket.client, 0) - ticket.client_cost
+        if remaining > 0:
+            self._outstanding[ticket.client] = remaining
+        else:
+            self._outstanding.pop(ticket.client, None)
+
+    def _reject(self, reason: str, backlog_items: int, message: str):
+        ADMISSION_DECISIONS.inc(controller=self.name, outcome=reason)
+        raise AdmissionRejected(reason, retry_after_seconds(backlog_items, self.throughput.rate()), message)
+
+    def _update_gauges(self):
+        ADMISSION_ITEMS.set(self._running, controller=self.name, state='running')
+        ADMISSION_ITEMS.set(self._queued, controller=self.name, state='queued')
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """StreamingResponse that releases its admission ticket however the stream ends"""
+
+    def __init__(self, content, ticket: Ticket, **kwargs):
+        super().__init__(content, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.ticket.release()
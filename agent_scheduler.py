@@ -0,0 +1,153 @@
+"""
+Agent Scheduler - token-budgeted, risk-prioritized chunks for specialist agents
+
+A large partition (e.g. a full Maharashtra Factories Rules audit) is too
+big for one agent request: it is slow, can overflow the model's context
+and keeps a single agent busy for the whole act. plan_chunks() splits a
+partition into chunks whose estimated prompt size stays within a token
+budget, with Critical items first, then High, Medium and Low.
+
+Chunks from every act share one PrioritySemaphore, which hands free agent
+slots to the most severe waiting chunk first (FIFO within a risk level),
+so critical findings come back before low-risk ones across the whole batch.
+
+Configuration (environment variables):
+AGENT_CHUNK_TOKEN_BUDGET - estimated prompt tokens per agent call (default 4000)
+AGENT_CHUNK_MAX_ITEMS    - hard cap on items per agent call (default 25)
+"""
+
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional
+import asyncio
+import heapq
+import itertools
+import os
+
+from risk_scoring import level_code
+
+AGENT_CHUNK_TOKEN_BUDGET = int(os.environ.get("AGENT_CHUNK_TOKEN_BUDGET", "4000"))
+AGENT_CHUNK_MAX_ITEMS = int(os.environ.get("AGENT_CHUNK_MAX_ITEMS", "25"))
+
+# Item fields sent to the agent as free text
+TEXT_FIELDS = (
+    'question_text',
+    'legal_text',
+    'intern_comment',
+    'intern_evidence',
+    'missing_evidence_reason',
+    'applicability_reason',
+    'evidence_url',
+)
+
+# Rough prompt cost of an item's IDs, verdict and formatting
+ITEM_OVERHEAD_TOKENS = 20
+
+# English statute text averages about four characters per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_item_tokens(item: Dict) -> int:
+    """Estimated prompt tokens for one audit item"""
+    chars = sum(len(item.get(field) or '') for field in TEXT_FIELDS)
+    return ITEM_OVERHEAD_TOKENS + chars // CHARS_PER_TOKEN
+
+
+def item_priority(item: Dict) -> int:
+    """Dispatch priority of an item (0 = Critical ... unknown levels last)"""
+    return level_code(item.get('risk_level'))
+
+
+def plan_chunks(
+    items: List[Dict],
+    token_budget: Optional[int] = None,
+    max_items: Optional[int] = None
+) -> List[List[Dict]]:
+    """
+    Split a partition into agent-sized chunks, most severe items first
+
+    Items are ordered by risk level (stable, so submission order is kept
+    within a level) and packed greedily until the next item would exceed
+    the token budget or the item cap. An item larger than the whole budget
+    gets a chunk of its own. The plan depends only on the items, so the
+    same partition always produces the same chunks.
+
+    Returns:
+        Chunks in dispatch order; chunk[0] holds the chunk's most severe item
+    """
+    token_budget = token_budget or AGENT_CHUNK_TOKEN_BUDGET
+    max_items = max_items or AGENT_CHUNK_MAX_ITEMS
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for item in sorted(items, key=item_priority):
+        tokens = estimate_item_tokens(item)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_items):
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class PrioritySemaphore:
+    """
+    asyncio semaphore that serves waiters by priority
+
+    Lower values go first; waiters with equal priority are served in
+    arrival order. Use `async with semaphore.slot(priority):`, or plain
+    `async with semaphore:` for priority 0. Like asyncio primitives it is
+    bound to the event loop it is first used on.
+    """
+
+    def __init__(self, value: int):
+        if value < 1:
+            raise ValueError("PrioritySemaphore needs at least one slot")
+        self._value = value
+        self._waiters: List[list] = []
+        self._order = itertools.count()
+
+    def locked(self) -> bool:
+        return self._value == 0
+
+    async def acquire(self, priority: int = 0) -> bool:
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Cancelled just after being handed a slot: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        return True
+
+    def release(self):
+        # Hand the slot straight to the best live waiter, if any
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
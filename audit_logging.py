@@ -0,0 +1,326 @@
+"""
+Audit Logging - structured, sampled, non-blocking logs for the audit services
+
+Every log call used to format its message and write it to stderr in the
+thread that made it, inside async handlers; on large batches logging cost
+as much as scoring. configure_logging() routes the root logger through a
+bounded in-memory queue instead:
+
+- the calling thread only captures the record and the log context; a
+  background writer thread formats it (JSON or text) and writes it
+- when the queue is full, records below WARNING are dropped and counted
+  (audit_log_records_dropped_total) rather than blocking the event loop;
+  warnings and errors are always queued
+- the writer is started on first use in each process, so it also comes
+  back in workers forked by serve.py --prefork
+
+configure_logging() replaces the root logger's handlers, so the apps call
+it from their startup hooks (and __main__ blocks), never on import: a test,
+benchmark or script that imports an app module keeps its own logging.
+
+Structured events carry an event name and fields, formatted lazily:
+
+    event(logger, 'act_scored', "📘 {act}: {score}% over {items} items",
+          act=name, score=score, items=n)
+
+logs the text line under the text format and
+{"event": "act_scored", "act": ..., "score": ..., "items": ...} under JSON.
+log_context(batch_id=..., session_id=...) binds fields to every record
+logged by the current task (and tasks and to_thread calls it starts).
+
+Per-item events are debug-only and sampled: sampled_items() picks a stable
+AUDIT_LOG_ITEM_SAMPLE_RATE share of items by audit_item_id (the same items
+in every stage and process), and returns nothing unless DEBUG is enabled,
+so the hot path pays one level check per batch stage.
+
+Configuration (environment variables):
+AUDIT_LOG_LEVEL            - root log level (default INFO)
+AUDIT_LOG_FORMAT           - json or text (default json)
+AUDIT_LOG_QUEUE_SIZE       - records buffered for the writer thread (default 10000)
+AUDIT_LOG_FLUSH_SECONDS    - how often the writer thread writes buffered records (default 0.1)
+AUDIT_LOG_ITEM_SAMPLE_RATE - share of items that get per-item debug events (default 0.01)
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from collections import deque
+from logging.handlers import QueueHandler
+from typing import Any, Dict, Iterable, List, Mapping, Optional, TextIO
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import zlib
+
+import fast_json
+from metrics import Counter
+
+AUDIT_LOG_LEVEL = os.environ.get("AUDIT_LOG_LEVEL", "INFO").upper()
+AUDIT_LOG_FORMAT = os.environ.get("AUDIT_LOG_FORMAT", "json").lower()
+AUDIT_LOG_QUEUE_SIZE = int(os.environ.get("AUDIT_LOG_QUEUE_SIZE", "10000"))
+AUDIT_LOG_FLUSH_SECONDS = float(os.environ.get("AUDIT_LOG_FLUSH_SECONDS", "0.1"))
+AUDIT_LOG_ITEM_SAMPLE_RATE = float(os.environ.get("AUDIT_LOG_ITEM_SAMPLE_RATE", "0.01"))
+
+# Resolution of the per-item sampling hash
+_SAMPLE_BUCKETS = 10000
+
+LOG_RECORDS_DROPPED = Counter(
+    'audit_log_records_dropped_total',
+    'Log records dropped because the log queue was full'
+)
+
+_log_context: ContextVar[Mapping[str, Any]] = ContextVar('audit_log_context', default={})
+
+
+# ============================================
+# CONTEXT AND EVENTS
+# ============================================
+
+@contextmanager
+def log_context(**fields):
+    """Add fields (e.g. batch_id, session_id) to every record logged in this block"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def current_context() -> Mapping[str, Any]:
+    return _log_context.get()
+
+
+class EventMessage:
+    """Log message of a structured event, formatted only when a handler needs the text"""
+
+    __slots__ = ('event', 'template', 'fields')
+
+    def __init__(self, event: str, template: str, fields: Dict[str, Any]):
+        self.event = event
+        self.template = template
+        self.fields = fields
+
+    def __str__(self) -> str:
+        if not self.template:
+            return self.event + ''.join(f" {key}={value}" for key, value in self.fields.items())
+        return self.template.format(**self.fields)
+
+
+def event(logger: logging.Logger, name: str, template: str = '', level: int = logging.INFO, **fields):
+    """Log a structured event; `template` is str.format()-ed with the fields for text output"""
+    if logger.isEnabledFor(level):
+        logger.log(level, EventMessage(name, template, fields))
+
+
+def sampled(audit_item_id: Any, rate: Optional[float] = None) -> bool:
+    """Whether an item is in the per-item event sample (stable across stages and processes)"""
+    rate = AUDIT_LOG_ITEM_SAMPLE_RATE if rate is None else rate
+    if rate >= 1:
+        return True
+    return zlib.crc32(str(audit_item_id).encode('utf-8')) % _SAMPLE_BUCKETS < rate * _SAMPLE_BUCKETS
+
+
+def sampled_items(logger: logging.Logger, items: Iterable[Mapping], rate: Optional[float] = None) -> List[Mapping]:
+    """Items that should get per-item debug events (none unless DEBUG is enabled)"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return []
+    return [item for item in items if sampled(item.get('audit_item_id'), rate)]
+
+
+# ============================================
+# FORMATTERS
+# ============================================
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, context, event fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        context = getattr(record, 'context', None)
+        if context:
+            entry.update(context)
+        msg = record.msg
+        if isinstance(msg, EventMessage):
+            entry['event'] = msg.event
+            entry.update(msg.fields)
+            if msg.template:
+                entry['message'] = str(msg)
+        else:
+            entry['message'] = record.getMessage()
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        try:
+            return fast_json.dumps(entry).decode('utf-8')
+        except TypeError:
+            return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """LEVEL:logger:message, followed by the log context as key=value pairs"""
+
+    def __init__(self):
+        super().__init__('%(levelname)s:%(name)s:%(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = getattr(record, 'context', None)
+        if context:
+            line += ' [' + ' '.join(f"{key}={value}" for key, value in context.items()) + ']'
+        return line
+
+
+# ============================================
+# QUEUE HANDLER
+# ============================================
+
+class AuditQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks and leaves formatting to a writer thread
+
+    prepare() only attaches the log context and renders %-style messages
+    and tracebacks (their arguments may change once the call returns);
+    structured events are passed on unformatted. Records go into a deque,
+    which needs no lock or wake-up per record; the writer thread drains it
+    into `target` every AUDIT_LOG_FLUSH_SECONDS, so a burst of records costs
+    the event loop one GIL hand-off rather than one per record. The writer
+    is started on the first record a process logs.
+    """
+
+    def __init__(
+        self,
+        target: logging.Handler,
+        maxsize: int = AUDIT_LOG_QUEUE_SIZE,
+        flush_seconds: float = AUDIT_LOG_FLUSH_SECONDS
+    ):
+        super().__init__(deque())
+        self.target = target
+        self.maxsize = maxsize
+        self.flush_seconds = flush_seconds
+        self._writer: Optional[threading.Thread] = None
+        self._writer_pid: Optional[int] = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only this handler sees the record, so it is updated in place
+        context = _log_context.get()
+        if context:
+            record.context = context
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self._writer_pid != os.getpid():
+            self.start()
+        # A full queue sheds debug and info records; warnings and errors may overfill it
+        if len(self.queue) >= self.maxsize and record.levelno < logging.WARNING:
+            LOG_RECORDS_DROPPED.inc()
+            return
+        self.queue.append(record)
+
+    def start(self):
+        """Start this process's writer thread (a forked child starts its own)"""
+        with self._start_lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._writer = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._writer.start()
+            self._writer_pid = os.getpid()
+
+    def stop(self):
+        """Write out everything queued and stop the writer thread"""
+        with self._start_lock:
+            if self._writer is not None and self._writer_pid == os.getpid():
+                self._stopping.set()
+                self._writer.join()
+            self._writer = None
+            self._writer_pid = None
+        self._drain()
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_seconds):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        queued = self.queue
+        while queued:
+            try:
+                record = queued.popleft()
+            except IndexError:
+                break
+            self.target.handle(record)
+
+    def _after_fork(self):
+        # The parent's writer thread and lock holder do not exist in the child,
+        # and records still queued are the parent's to write
+        self.queue.clear()
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._writer = None
+        self._writer_pid = None
+
+
+class StderrHandler(logging.StreamHandler):
+    """StreamHandler writing to sys.stderr as it is when each record is written"""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self) -> TextIO:
+        # Looked up per record: test runners and daemons swap (and close) sys.stderr
+        return sys.stderr
+
+
+_handler: Optional[AuditQueueHandler] = None
+
+
+def configure_logging(
+    level: str = AUDIT_LOG_LEVEL,
+    fmt: str = AUDIT_LOG_FORMAT,
+    stream: Optional[TextIO] = None
+) -> AuditQueueHandler:
+    """
+    Send every log record through the queue handler
+
+    Replaces the root logger's handlers; calling it again reconfigures the
+    same handler. Records are written to `stream`, or to whatever sys.stderr
+    is at the time each record is written.
+    """
+    global _handler
+    target = logging.StreamHandler(stream) if stream is not None else StderrHandler()
+    target.setFormatter(JSONFormatter() if fmt == 'json' else TextFormatter())
+
+    root = logging.getLogger()
+    if _handler is not None:
+        _handler.stop()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    _handler = AuditQueueHandler(target)
+    root.addHandler(_handler)
+    root.setLevel(level)
+    return _handler
+
+
+def shutdown_logging():
+    """Flush queued records (e.g. at app shutdown)"""
+    if _handler is not None:
+        _handler.stop()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,166 @@
+"""
+Audit Records - compact records for audit items and findings
+
+The orchestrator used to carry every audit item and every finding as a
+plain dict: ~15 keys per hydrated item, and per finding a fresh dict plus
+its own copy of a recommendation string shared by every item of the same
+category. On 10k+ item batches that is most of the memory a request uses.
+
+AuditItem and Finding are __slots__ records instead:
+- no per-instance dict, so a record is a fixed block of pointers
+- status, verdict, category, risk level and workflow type values are
+  interned, so every record of a batch points at the same few strings
+- they read like the dicts they replace (record['category'],
+  record.get('risk_level'), **record, dict(record)), so scoring, routing,
+  caching and agent clients work on either
+
+fast_json and the finding cache encode records as JSON objects. Keys an
+item record has no slot for are kept in a small side dict, so callers
+that pass extra fields (e.g. risk_profile) lose nothing.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+import sys
+
+_UNSET = object()
+
+
+def intern_code(value: Any) -> Any:
+    """Interned copy of a short enum-like string (other values are returned as is)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record(Mapping):
+    """
+    Base for slotted records that behave as read/write mappings
+
+    Unset slots count as missing keys, like keys a dict never had.
+    """
+
+    __slots__ = ('_extra',)
+
+    # Slots readable as keys, and the subset whose values are interned
+    FIELDS: frozenset = frozenset()
+    CODED_FIELDS: frozenset = frozenset()
+
+    def __init__(self, values: Optional[Mapping] = None, **fields):
+        self._extra = None
+        for source in (values or {}), fields:
+            for key, value in source.items():
+                self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self.FIELDS:
+            setattr(self, key, intern_code(value) if key in self.CODED_FIELDS else value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Hot path (scoring, routing, cache keys): no exception for missing keys
+        if key in self.FIELDS:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        if key in self.FIELDS:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def to_dict(self) -> Dict[str, Any]:
+        values = {}
+        for key in self.__slots__:
+            value = getattr(self, key, _UNSET)
+            if value is not _UNSET:
+                values[key] = value
+        if self._extra is not None:
+            values.update(self._extra)
+        return values
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class AuditItem(Record):
+    """One audit item of a batch (AuditItemData plus server-side fields)"""
+
+    __slots__ = ('audit_item_id', 'question_text', 'legal_text', 'risk_level', 'category', 'workflow_type',
+                 'intern_verdict', 'intern_comment', 'evidence_url', 'intern_evidence',
+                 'missing_evidence_reason', 'applicability_reason', 'is_applicable',
+                 'penalty_amount', 'evidence_documents')
+
+    FIELDS = frozenset(__slots__)
+    CODED_FIELDS = frozenset(('risk_level', 'category', 'workflow_type', 'intern_verdict'))
+
+    @classmethod
+    def from_mapping(cls, item: Mapping) -> 'AuditItem':
+        """Record with the same keys and values as `item` (the fast path of AuditItem(item))"""
+        record = cls.__new__(cls)
+        record._extra = None
+        fields = cls.FIELDS
+        for key, value in item.items():
+            if key in fields:
+                setattr(record, key, value)
+            else:
+                record[key] = value
+        for key in cls.CODED_FIELDS:
+            value = getattr(record, key, None)
+            if value.__class__ is str:
+                setattr(record, key, sys.intern(value))
+        return record
+
+
+class Finding(Record):
+    """One finding of a specialist agent (the shape of the mock agent's findings)"""
+
+    __slots__ = ('item_id', 'status', 'category', 'severity', 'comment', 'recommendation')
+
+    FIELDS = frozenset(__slots__)
+    CODED_FIELDS = frozenset(('status', 'category', 'severity'))
+
+    def __init__(self, item_id, status, category, severity, comment, recommendation):
+        # Positional constructor: the mock agent builds one per item
+        self._extra = None
+        self.item_id = item_id
+        self.status = intern_code(status)
+        self.category = intern_code(category)
+        self.severity = intern_code(severity)
+        self.comment = comment
+        self.recommendation = recommendation
+
+
+def as_dict(values: Mapping) -> Dict[str, Any]:
+    """New plain dict with the same items (records take the fast path)"""
+    if isinstance(values, Record):
+        return values.to_dict()
+    return dict(values)
+
+
+def to_jsonable(obj: Any) -> Dict[str, Any]:
+    """json/orjson `default` hook: records become plain dicts"""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
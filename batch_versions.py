@@ -0,0 +1,272 @@
+"""
+Batch Versions - stored copies of submitted batches for delta resubmission
+
+Every full submission of a batch is stored here and given a version
+number. A client that changes a few answers can then send only the edit:
+
+    {
+        "batch_id": "...",
+        "base_version": 3,
+        "changed_items": [{...}, ...],      # added or changed items
+        "removed_item_ids": ["...", ...],
+        "submitted_at": "..."               # header fields are optional
+    }
+
+apply_delta() rebuilds the full batch from the stored copy and bumps the
+version. A delta whose base_version is not the current version is rejected
+(StaleBaseError), so two clients editing the same batch cannot silently
+overwrite each other; the client resubmits against the current version or
+sends the full batch again. Re-sending the delta that produced the current
+version is accepted and returns that version unchanged, so retries are
+safe.
+
+Items keep their original order; added items go to the end. Items are
+stored one row each: a delta writes only the rows it adds, changes or
+removes, and a full resubmission rewrites only the rows that differ from
+the stored copy. Request size, validation and writes follow the size of
+the edit, but the full batch apply_delta() returns is rebuilt by reading
+every stored item, so that read is O(batch size).
+
+Configuration (environment variables):
+BATCH_VERSION_STORE_PATH - SQLite file for stored batches (default ./audit_batches.db)
+"""
+
+from typing import List, Dict, Optional, Any, Tuple
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+
+from idempotency import payload_fingerprint
+
+BATCH_VERSION_STORE_PATH = os.environ.get("BATCH_VERSION_STORE_PATH", "audit_batches.db")
+
+# Batch fields a delta may replace (everything but the item list)
+HEADER_FIELDS = ('session_id', 'company_name', 'location', 'submitted_at')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch_versions (
+    batch_id           TEXT PRIMARY KEY,
+    version            INTEGER NOT NULL,
+    header             TEXT NOT NULL,
+    fingerprint        TEXT,
+    delta_fingerprint  TEXT,
+    updated_at         TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS batch_items (
+    batch_id       TEXT NOT NULL,
+    audit_item_id  TEXT NOT NULL,
+    position       INTEGER NOT NULL,
+    item           TEXT NOT NULL,
+    PRIMARY KEY (batch_id, audit_item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_batch_items_position ON batch_items (batch_id, position);
+"""
+
+
+class StaleBaseError(ValueError):
+    """A delta's base_version is not the stored version of its batch"""
+
+    def __init__(self, batch_id: str, base_version: int, current_version: Optional[int]):
+        self.batch_id = batch_id
+        self.base_version = base_version
+        self.current_version = current_version
+        if current_version is None:
+            message = f"Batch {batch_id} has no stored version to apply a delta to"
+        else:
+            message = f"Batch {batch_id} is at version {current_version}, delta is based on {base_version}"
+        super().__init__(message)
+
+
+class BatchVersionStore:
+    """
+    Thread-safe SQLite store of the latest full copy of each batch
+
+    Same connection model as JobStore: one shared connection behind a lock,
+    WAL mode, reconnecting after a fork. Items are stored one row each so
+    writes touch only the rows that change.
+    """
+
+    def __init__(self, path: str = BATCH_VERSION_STORE_PATH):
+        self.path = path
+        self._connect()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # === Writes ===
+
+    def put(self, batch: Dict[str, Any]) -> int:
+        """
+        Store a full batch and return its version
+
+        Submitting the same content again keeps the current version, so
+        duplicate submissions do not invalidate deltas based on it.
+        """
+        batch_id = batch['batch_id']
+        fingerprint = payload_fingerprint(batch)
+        items = batch.get('audit_items') or []
+
+        with self._lock, self._conn:
+            current = self._conn.execute(
+                "SELECT version, fingerprint FROM batch_versions WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+            if current is not None and current['fingerprint'] == fingerprint:
+                return current['version']
+
+            version = current['version'] + 1 if current is not None else 1
+            self._replace_items(batch_id, items)
+            self._write_header(batch_id, version, _header(batch), fingerprint, None)
+        return version
+
+    def apply_delta(self, delta: Dict[str, Any]) -> Tuple[Dict[str, Any], int, List[str]]:
+        """
+        Apply a delta to the stored batch
+
+        Returns:
+            (full batch, new version, ids of the items added or changed)
+
+        Raises:
+            StaleBaseError: the batch is unknown or base_version is not current
+        """
+        batch_id = delta['batch_id']
+        base_version = delta['base_version']
+        delta_fingerprint = payload_fingerprint(delta)
+        changed = {item['audit_item_id']: item for item in delta.get('changed_items') or []}
+        removed = [item_id for item_id in delta.get('removed_item_ids') or [] if item_id not in changed]
+
+        with self._lock, self._conn:
+            current = self._conn.execute(
+                "SELECT version, header, delta_fingerprint FROM batch_versions WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+            if current is None:
+                raise StaleBaseError(batch_id, base_version, None)
+
+            if current['version'] == base_version + 1 and current['delta_fingerprint'] == delta_fingerprint:
+                # Retry of the delta that produced the current version
+                version = current['version']
+                header = json.loads(current['header'])
+            elif current['version'] != base_version:
+                raise StaleBaseError(batch_id, base_version, current['version'])
+            else:
+                version = base_version + 1
+                header = {**json.loads(current['header']),
+                          **{field: delta[field] for field in HEADER_FIELDS if delta.get(field) is not None}}
+                self._apply_items(batch_id, changed, removed)
+                self._write_header(batch_id, version, header, None, delta_fingerprint)
+
+            items = [
+                json.loads(row['item'])
+                for row in self._conn.execute(
+                    "SELECT item FROM batch_items WHERE batch_id = ? ORDER BY position", (batch_id,)
+                )
+            ]
+
+        return {'batch_id': batch_id, **header, 'audit_items': items}, version, list(changed)
+
+    def _replace_items(self, batch_id: str, items: List[Dict[str, Any]]):
+        """Make the stored items match a full item list, writing only the rows that differ"""
+        stored = {
+            row['audit_item_id']: (row['position'], row['item'])
+            for row in self._conn.execute(
+                "SELECT audit_item_id, position, item FROM batch_items WHERE batch_id = ?", (batch_id,)
+            )
+        }
+        # Later duplicates of an audit_item_id win, as with INSERT OR REPLACE
+        latest = {}
+        for item in items:
+            latest.pop(item['audit_item_id'], None)
+            latest[item['audit_item_id']] = item
+        rows = {
+            item_id: (position, json.dumps(item))
+            for position, (item_id, item) in zip(_positions(latest, stored), latest.items())
+        }
+        removed = [item_id for item_id in stored if item_id not in rows]
+        if removed:
+            self._conn.executemany(
+                "DELETE FROM batch_items WHERE batch_id = ? AND audit_item_id = ?",
+                [(batch_id, item_id) for item_id in removed]
+            )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO batch_items (batch_id, audit_item_id, position, item) VALUES (?, ?, ?, ?)",
+            [(batch_id, item_id, position, item)
+             for item_id, (position, item) in rows.items() if stored.get(item_id) != (position, item)]
+        )
+
+    def _apply_items(self, batch_id: str, changed: Dict[str, Dict], removed: List[str]):
+        if removed:
+            self._conn.executemany(
+                "DELETE FROM batch_items WHERE batch_id = ? AND audit_item_id = ?",
+                [(batch_id, item_id) for item_id in removed]
+            )
+        if not changed:
+            return
+
+        next_position = self._conn.execute(
+            "SELECT COALESCE(MAX(position), -1) + 1 FROM batch_items WHERE batch_id = ?", (batch_id,)
+        ).fetchone()[0]
+        # Changed items keep their position; added ones are appended
+        self._conn.executemany(
+            "INSERT INTO batch_items (batch_id, audit_item_id, position, item) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (batch_id, audit_item_id) DO UPDATE SET item = excluded.item",
+            [(batch_id, item_id, next_position + offset, json.dumps(item))
+             for offset, (item_id, item) in enumerate(changed.items())]
+        )
+
+    def _write_header(
+        self,
+        batch_id: str,
+        version: int,
+        header: Dict[str, Any],
+        fingerprint: Optional[str],
+        delta_fingerprint: Optional[str]
+    ):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO batch_versions "
+            "(batch_id, version, header, fingerprint, delta_fingerprint, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (batch_id, version, json.dumps(header), fingerprint, delta_fingerprint, datetime.now().isoformat())
+        )
+
+    # === Reads ===
+
+    def get_version(self, batch_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM batch_versions WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+        return row['version'] if row else None
+
+
+def _header(batch: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in batch.items() if key not in ('batch_id', 'audit_items')}
+
+
+def _positions(items: Dict[str, Dict], stored: Dict[str, Tuple[int, str]]) -> List[int]:
+    """
+    Positions for an item list: the stored ones while they stay in order
+
+    Removing items or appending new ones then leaves the other rows'
+    positions alone; any reordering falls back to numbering from 0.
+    """
+    positions = []
+    last = -1
+    for item_id in items:
+        position = stored[item_id][0] if item_id in stored else last + 1
+        if position <= last:
+            return list(range(len(items)))
+        positions.append(position)
+        last = position
+    return positions
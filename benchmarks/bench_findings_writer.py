@@ -0,0 +1,227 @@
+"""
+Benchmark - writing agent findings to audit_agent_submissions
+
+Runs findings_writer.FindingsWriter against PostgRESTStandIn, an in-process
+stand-in for PostgREST's upsert endpoint (httpx.MockTransport) that keeps
+rows in a dict keyed by the on_conflict columns, merges the posted columns
+into existing rows like Prefer: resolution=merge-duplicates, and adds
+--latency-ms of simulated round trip to every request. Scenarios, each
+writing --findings rows for one session:
+
+  per_row        batch size 1: one request per finding, the shape of a
+                 writer without buffering (the baseline)
+  batched        the default FINDINGS_WRITER_BATCH_SIZE
+  batched_flaky  as batched, with every --fail-every th request answered
+                 503 to exercise retries
+  rewrite        the batched rows written a second time: the table must
+                 not grow and the intern's columns must survive
+  orchestrator   run_master_audit_async() on a --findings item batch with
+                 the mock agents, reporting the requests made and the
+                 persist stage time after synthesis
+
+Reported per scenario: requests (including retries), retries, wall time,
+rows in the stand-in table and whether every row matches what was written.
+
+Usage:
+python benchmarks/bench_findings_writer.py [--findings 5000] [--latency-ms 20] [--fail-every 3] [--output results.json]
+"""
+
+from pathlib import Path
+from urllib.parse import parse_qs
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx
+
+REST_URL = 'http://postgrest.test'
+
+# The orchestrator enables persistence when a REST URL is configured
+_data_dir = Path(tempfile.mkdtemp())
+os.environ.update({
+    'SUPABASE_REST_URL': REST_URL,
+    'SESSION_STORE_PATH': str(_data_dir / 'sessions.db'),
+    'JOB_STORE_PATH': str(_data_dir / 'jobs.db'),
+    'BATCH_VERSION_STORE_PATH': str(_data_dir / 'batches.db'),
+    'FINDING_CACHE_PATH': '',
+    'EVIDENCE_PREFETCH': '0',
+    'FINDINGS_WRITER_BACKOFF_SECONDS': os.environ.get('FINDINGS_WRITER_BACKOFF_SECONDS', '0.01'),
+})
+
+from harness import make_batch, write_results
+from findings_writer import FindingsWriter, FINDINGS_WRITER_BATCH_SIZE, SUBMISSION_COLUMNS
+
+
+class PostgRESTStandIn:
+    """Upsert endpoint of PostgREST over an in-memory table"""
+
+    def __init__(self, latency_ms: float = 0.0, fail_every: int = 0):
+        self.latency = latency_ms / 1000
+        self.fail_every = fail_every
+        self.tables = {}
+        self.requests = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        number = self.requests
+        await asyncio.sleep(self.latency)
+        if request.method != 'POST':
+            return httpx.Response(405)
+        if self.fail_every and number % self.fail_every == 0:
+            return httpx.Response(503, json={'message': 'stand-in outage'})
+
+        params = {key: values[0] for key, values in parse_qs(request.url.query.decode()).items()}
+        if 'merge-duplicates' not in request.headers.get('prefer', '') or 'on_conflict' not in params:
+            return httpx.Response(400, json={'message': 'stand-in only supports upserts'})
+        conflict = params['on_conflict'].split(',')
+        columns = params.get('columns', '').split(',')
+        table = self.tables.setdefault(request.url.path.rsplit('/', 1)[-1], {})
+        for row in json.loads(request.content):
+            key = tuple(row[column] for column in conflict)
+            table.setdefault(key, {}).update({column: row.get(column) for column in columns})
+        return httpx.Response(201)
+
+
+def make_rows(n: int, rng: random.Random):
+    statuses = ('Compliant', 'Non-Compliant', 'Partially Compliant', 'Not Applicable')
+    risks = ('Critical', 'High', 'Medium', 'Low')
+    return [
+        {
+            'audit_item_id': f"ITEM-{i:06d}",
+            'ai_agent_name': 'Bench_Agent',
+            'status': rng.choice(statuses),
+            'risk_level': rng.choice(risks),
+            'ai_score': round(rng.uniform(0, 100), 1),
+            'comment': 'Register checked against wage slips',
+        }
+        for i in range(n)
+    ]
+
+
+def table_matches(stand_in: PostgRESTStandIn, session_id: str, rows) -> bool:
+    table = stand_in.tables.get('audit_agent_submissions', {})
+    return all(
+        table.get((session_id, row['audit_item_id']), {}).get('status') == row['status']
+        for row in rows
+    )
+
+
+async def write_scenario(name: str, rows, batch_size: int, latency_ms: float, fail_every: int = 0,
+                         stand_in: PostgRESTStandIn = None) -> dict:
+    stand_in = stand_in or PostgRESTStandIn(latency_ms, fail_every)
+    session_id = 'SESSION-000001'
+    async with httpx.AsyncClient(transport=stand_in.transport()) as client:
+        writer = FindingsWriter(base_url=REST_URL, batch_size=batch_size, client=client)
+        requests_before = stand_in.requests
+        started = time.perf_counter()
+        writer.add(session_id, rows)
+        outcome = await writer.flush()
+        seconds = time.perf_counter() - started
+        await writer.aclose()
+    requests = stand_in.requests - requests_before
+    return {
+        'scenario': name,
+        'findings': len(rows),
+        'batch_size': batch_size,
+        'requests': requests,
+        'retries': requests - -(-len(rows) // batch_size),
+        'seconds': round(seconds, 3),
+        'written': outcome['written'],
+        'failed': outcome['failed'],
+        'table_rows': len(stand_in.tables.get('audit_agent_submissions', {})),
+        'matches': table_matches(stand_in, session_id, rows),
+        '_stand_in': stand_in,
+    }
+
+
+async def orchestrator_scenario(n_items: int, latency_ms: float) -> dict:
+    import MASTER_AUDIT_ORCHESTRATOR_EXAMPLE as orchestrator
+
+    orchestrator.get_router()
+    stand_in = PostgRESTStandIn(latency_ms)
+    batch = make_batch(n_items, random.Random(42))
+    # Items sampled more than once share a (session_id, audit_item_id) row
+    distinct_items = len({item['audit_item_id'] for item in batch['audit_items']})
+    async with httpx.AsyncClient(transport=stand_in.transport()) as client:
+        orchestrator._findings_writers[asyncio.get_running_loop()] = FindingsWriter(base_url=REST_URL, client=client)
+        stage = orchestrator.STAGE_SECONDS
+        persist_runs, persist_seconds = stage.count(stage='persist'), stage.sum(stage='persist')
+        started = time.perf_counter()
+        report = await orchestrator.run_master_audit_async(batch)
+        seconds = time.perf_counter() - started
+        await orchestrator.close_findings_writer()
+    table = stand_in.tables.get('audit_agent_submissions', {})
+    return {
+        'scenario': 'orchestrator',
+        'findings': report['total_findings'],
+        'batch_size': FINDINGS_WRITER_BATCH_SIZE,
+        'requests': stand_in.requests,
+        'retries': 0,
+        'seconds': round(seconds, 3),
+        'persist_stages': stage.count(stage='persist') - persist_runs,
+        'persist_seconds': round(stage.sum(stage='persist') - persist_seconds, 4),
+        'written': len(table),
+        'failed': 0,
+        'table_rows': len(table),
+        'matches': len(table) == distinct_items,
+    }
+
+
+async def run(args) -> list:
+    rows = make_rows(args.findings, random.Random(7))
+    results = [
+        await write_scenario('per_row', rows, 1, args.latency_ms),
+        await write_scenario('batched', rows, FINDINGS_WRITER_BATCH_SIZE, args.latency_ms),
+        await write_scenario('batched_flaky', rows, FINDINGS_WRITER_BATCH_SIZE, args.latency_ms, args.fail_every),
+    ]
+
+    # Write the same findings again over a table that also has intern columns
+    stand_in = results[1]['_stand_in']
+    for row in stand_in.tables['audit_agent_submissions'].values():
+        row['user_status'] = 'Compliant'
+    rewrite = await write_scenario('rewrite', rows, FINDINGS_WRITER_BATCH_SIZE, args.latency_ms, stand_in=stand_in)
+    rewrite['matches'] = rewrite['matches'] and all(
+        row.get('user_status') == 'Compliant' and set(SUBMISSION_COLUMNS) <= set(row)
+        for row in stand_in.tables['audit_agent_submissions'].values()
+    )
+    results.append(rewrite)
+    results.append(await orchestrator_scenario(args.findings, args.latency_ms))
+    for row in results:
+        row.pop('_stand_in', None)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--findings', type=int, default=5000)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='simulated round trip per request')
+    parser.add_argument('--fail-every', type=int, default=3, help='batched_flaky: answer every Nth request 503')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'scenario':<14} {'findings':>8} {'batch':>6} {'requests':>9} {'retries':>8} {'seconds':>8} "
+          f"{'written':>8} {'failed':>7} {'table rows':>11} {'matches':>8}")
+    for row in results:
+        print(f"{row['scenario']:<14} {row['findings']:>8} {row['batch_size']:>6} {row['requests']:>9} "
+              f"{row['retries']:>8} {row['seconds']:>8} {row['written']:>8} {row['failed']:>7} "
+              f"{row['table_rows']:>11} {str(row['matches']):>8}")
+        if 'persist_seconds' in row:
+            print(f"{'':<14} persist stage after synthesis: {row['persist_stages']} run(s), "
+                  f"{row['persist_seconds']}s")
+
+    write_results(args.output, 'findings_writer', {'parameters': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
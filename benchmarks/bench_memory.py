@@ -0,0 +1,155 @@
+"""
+Benchmark - peak memory of /run-master-audit on large batches
+
+Each measurement runs in a fresh interpreter:
+
+  1. build a synthetic batch (full items, as the web client sends them)
+     and encode it as a request body
+  2. parse the body with the endpoint's validator (master_audit_batch) and
+     drop it
+  3. run run_master_audit_async() with the mock agent and encode the
+     report with fast_json, as the endpoint does
+
+Peak RSS (VmHWM, reset through /proc/self/clear_refs before each step) is
+reported for step 2 and step 3, both relative to the RSS before step 2,
+along with the RSS still held while the batch and report are alive and
+the wall time of step 3. The parse peak belongs to pydantic-core; the
+pipeline peak and the retained memory are what the orchestrator's own
+data structures cost. The finding cache and session store are on, as in
+production, but point at temporary files.
+
+--baseline REF measures the same script against a git revision (checked
+out into a temporary worktree) for a before/after comparison.
+
+Usage:
+python benchmarks/bench_memory.py [--sizes 10000 50000] [--baseline HEAD~1] [--output results.json]
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def rss_kib(field: str) -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def measure(size: int) -> dict:
+    """Runs inside the child interpreter, with the tree under test on sys.path"""
+    import asyncio
+    import gc
+    import logging
+    import random
+    import time
+
+    logging.disable(logging.INFO)
+
+    import fast_json
+    import MASTER_AUDIT_ORCHESTRATOR_EXAMPLE as orchestrator
+    from harness import make_batch
+
+    orchestrator.get_router()
+    body = fast_json.dumps(make_batch(size, random.Random(42)))
+    gc.collect()
+
+    before = rss_kib('VmRSS')
+    reset_peak()
+    batch = orchestrator.master_audit_batch.validate_json(body)
+    del body
+    parse_peak = rss_kib('VmHWM')
+
+    reset_peak()
+    started = time.perf_counter()
+    report = asyncio.run(orchestrator.run_master_audit_async(batch))
+    encoded = fast_json.dumps(report)
+    seconds = time.perf_counter() - started
+    pipeline_peak = rss_kib('VmHWM')
+
+    gc.collect()
+    return {
+        'items': size,
+        'findings': report['total_findings'],
+        'response_bytes': len(encoded),
+        'rss_before_mib': round(before / 1024, 1),
+        'parse_peak_mib': round((parse_peak - before) / 1024, 1),
+        'pipeline_peak_mib': round((pipeline_peak - before) / 1024, 1),
+        'retained_mib': round((rss_kib('VmRSS') - before) / 1024, 1),
+        'seconds': round(seconds, 3),
+    }
+
+
+def reset_peak():
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+
+
+def run_child(tree: Path, size: int) -> dict:
+    data_dir = Path(tempfile.mkdtemp())
+    env = {
+        **os.environ,
+        'JOB_STORE_PATH': str(data_dir / 'jobs.db'),
+        'SESSION_STORE_PATH': str(data_dir / 'sessions.db'),
+        'BATCH_VERSION_STORE_PATH': str(data_dir / 'batches.db'),
+        'FINDING_CACHE_PATH': '',
+        'EVIDENCE_PREFETCH': '0',
+    }
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', str(tree), '--sizes', str(size)],
+        env=env, cwd=str(tree), check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--baseline', metavar='REF', help='also measure this git revision')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--child', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path[:0] = [str(args.child), str(args.child / 'benchmarks')]
+        print(json.dumps(measure(args.sizes[0])))
+        return
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from harness import write_results
+
+    trees = {'current': REPO_ROOT}
+    worktree = None
+    if args.baseline:
+        worktree = Path(tempfile.mkdtemp()) / 'baseline'
+        subprocess.run(['git', 'worktree', 'add', '--detach', str(worktree), args.baseline],
+                       cwd=REPO_ROOT, check=True, capture_output=True)
+        trees = {args.baseline: worktree, **trees}
+
+    results = []
+    try:
+        print(f"{'tree':<12} {'items':>7} {'parse peak MiB':>15} {'pipeline peak MiB':>18} "
+              f"{'retained MiB':>13} {'response KiB':>13} {'seconds':>8}")
+        for size in args.sizes:
+            for name, tree in trees.items():
+                row = {'tree': name, **run_child(tree, size)}
+                results.append(row)
+                print(f"{name:<12} {size:>7} {row['parse_peak_mib']:>15} {row['pipeline_peak_mib']:>18} "
+                      f"{row['retained_mib']:>13} {row['response_bytes'] // 1024:>13} {row['seconds']:>8}")
+    finally:
+        if worktree is not None:
+            subprocess.run(['git', 'worktree', 'remove', '--force', str(worktree)], cwd=REPO_ROOT, check=False)
+
+    write_results(args.output, 'memory', {'parameters': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
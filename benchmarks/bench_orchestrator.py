@@ -0,0 +1,214 @@
+"""
+Benchmark - orchestrator stages and in-process load test of the batch endpoints
+
+Micro-benchmarks (best of --repeat, per batch size):
+  partition_audit_items, invoke_specialist_agent (mock agent, largest act),
+  synthesize_results, score_batch and analyze_audit_batch (the work behind
+  /submit-audit-batch).
+
+Load test (per batch size x concurrency level):
+  /run-master-audit   - request latency with a simulated-latency stand-in agent
+  /submit-audit-batch - submit-to-completed latency (submit, then poll /batch-status)
+Requests go through httpx's ASGI transport, so no server or network is needed.
+
+Usage:
+python benchmarks/bench_orchestrator.py [--sizes 100 1000 10000] [--concurrency 1 8 32]
+    [--requests 64] [--agent-latency-ms 50] [--skip-load] [--output results.json]
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Keep the benchmark's job, session and batch stores away from the real ones
+_bench_dir = Path(tempfile.mkdtemp())
+os.environ.setdefault("JOB_STORE_PATH", str(_bench_dir / "bench_jobs.db"))
+os.environ.setdefault("SESSION_STORE_PATH", str(_bench_dir / "bench_sessions.db"))
+os.environ.setdefault("BATCH_VERSION_STORE_PATH", str(_bench_dir / "bench_batches.db"))
+# Synthetic evidence URLs point nowhere; don't try to download them
+os.environ.setdefault("EVIDENCE_PREFETCH", "0")
+
+import httpx
+
+import MASTER_AUDIT_ORCHESTRATOR_EXAMPLE as orchestrator
+import python_ai_agent_example as batch_service
+from act_catalogue import ACTS_BY_PARTITION, OTHER_PARTITION, get_catalogue
+from harness import best_of, latency_summary, make_batch, write_results
+from risk_scoring import score_batch
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class SimulatedAgent:
+    """
+    Stand-in specialist agent with realistic latency
+
+    Sleeps for a base latency plus a per-item cost with log-normal jitter,
+    then returns the mock agent's result.
+    """
+
+    def __init__(self, base_ms: float = 50.0, per_item_ms: float = 0.5, jitter: float = 0.3, seed: int = 7):
+        self.base_ms = base_ms
+        self.per_item_ms = per_item_ms
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    async def __call__(self, agent_name, items, context):
+        delay_ms = (self.base_ms + self.per_item_ms * len(items)) * self.rng.lognormvariate(0, self.jitter)
+        await asyncio.sleep(delay_ms / 1000)
+        return orchestrator.invoke_specialist_agent(agent_name, items, context)
+
+
+# ============================================
+# MICRO-BENCHMARKS
+# ============================================
+
+def run_micro(sizes, repeat: int, rng: random.Random):
+    rows = []
+    for size in sizes:
+        batch = make_batch(size, rng)
+        items = get_catalogue().hydrate(batch['audit_items'])
+        context = {'batch_id': batch['batch_id'], 'company_name': batch['company_name']}
+
+        partitions = orchestrator.partition_audit_items(items)
+        largest = max((p for p in partitions if p != OTHER_PARTITION), key=lambda p: len(partitions[p]))
+        agent_name = ACTS_BY_PARTITION[largest]['agent']
+        act_results = {
+            ACTS_BY_PARTITION[p]['name']: orchestrator.invoke_specialist_agent(ACTS_BY_PARTITION[p]['agent'], part, context)
+            for p, part in partitions.items() if p != OTHER_PARTITION and part
+        }
+
+        stages = {
+            'partition_audit_items': lambda: orchestrator.partition_audit_items(items),
+            'invoke_specialist_agent': lambda: orchestrator.invoke_specialist_agent(agent_name, partitions[largest], context),
+            'synthesize_results': lambda: orchestrator.synthesize_results(batch, act_results=act_results),
+            'score_batch': lambda: score_batch(items),
+            'analyze_audit_batch': lambda: batch_service.analyze_audit_batch(batch),
+        }
+        for stage, fn in stages.items():
+            seconds = best_of(fn, repeat)
+            rows.append({
+                'stage': stage,
+                'items': size,
+                'ms': round(seconds * 1000, 3),
+                'us_per_item': round(seconds / size * 1e6, 3),
+            })
+            print(f"  {stage:<26} {size:>7} items {rows[-1]['ms']:>10} ms {rows[-1]['us_per_item']:>9} us/item")
+    return rows
+
+
+# ============================================
+# LOAD TEST
+# ============================================
+
+async def _drive(n_requests: int, concurrency: int, send):
+    """Run send(i) n_requests times with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await send(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    return latencies, time.perf_counter() - start
+
+
+async def load_master_audit(size: int, concurrency: int, n_requests: int, rng: random.Random):
+    bodies = [make_batch(size, rng, batch_no=i, compact=True) for i in range(n_requests)]
+    transport = httpx.ASGITransport(app=orchestrator.app)
+
+    async with orchestrator.app.router.lifespan_context(orchestrator.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            async def send(i):
+                response = await client.post("/run-master-audit", json=bodies[i])
+                response.raise_for_status()
+
+            return await _drive(n_requests, concurrency, send)
+
+
+async def load_submit_batch(size: int, concurrency: int, n_requests: int, rng: random.Random, run_id: int):
+    bodies = [make_batch(size, rng, batch_no=run_id * 100000 + i, compact=True) for i in range(n_requests)]
+    transport = httpx.ASGITransport(app=batch_service.app)
+
+    async with batch_service.app.router.lifespan_context(batch_service.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            async def send(i):
+                response = await client.post("/submit-audit-batch", json=bodies[i])
+                response.raise_for_status()
+                status_url = response.json()['status_url']
+                while True:
+                    status = (await client.get(status_url)).json()['status']
+                    if status in ('completed', 'failed'):
+                        return
+                    await asyncio.sleep(0.005)
+
+            return await _drive(n_requests, concurrency, send)
+
+
+def run_load(sizes, levels, n_requests: int, agent_latency_ms: float, rng: random.Random):
+    orchestrator.agent_client = SimulatedAgent(base_ms=agent_latency_ms)
+    rows = []
+    run_id = 0
+    for endpoint in ('/run-master-audit', '/submit-audit-batch'):
+        for size in sizes:
+            for concurrency in levels:
+                run_id += 1
+                if endpoint == '/run-master-audit':
+                    latencies, wall = asyncio.run(load_master_audit(size, concurrency, n_requests, rng))
+                else:
+                    latencies, wall = asyncio.run(load_submit_batch(size, concurrency, n_requests, rng, run_id))
+                row = {
+                    'endpoint': endpoint,
+                    'items': size,
+                    'concurrency': concurrency,
+                    **latency_summary(latencies, wall),
+                }
+                row['items_per_second'] = round(row['throughput_rps'] * size, 1)
+                rows.append(row)
+                print(f"  {endpoint:<20} {size:>6} items c={concurrency:<3} "
+                      f"p50={row['p50_ms']:>9} p95={row['p95_ms']:>9} p99={row['p99_ms']:>9} ms "
+                      f"{row['throughput_rps']:>8} req/s")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=64, help='requests per load-test cell')
+    parser.add_argument('--agent-latency-ms', type=float, default=50.0, help='stand-in agent base latency')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--skip-load', action='store_true', help='run only the micro-benchmarks')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print("Micro-benchmarks:")
+    micro = run_micro(args.sizes, args.repeat, rng)
+
+    load = []
+    if not args.skip_load:
+        print("Load test:")
+        load = run_load(args.sizes, args.concurrency, args.requests, args.agent_latency_ms, rng)
+
+    write_results(args.output, 'orchestrator', {
+        'parameters': vars(args),
+        'micro': micro,
+        'load': load,
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Benchmark - throughput and memory per worker count under serve.py
+
+Starts `python serve.py <app> --workers N` in two modes:
+
+  spawn    uvicorn's supervisor starts N fresh interpreters, each importing
+           the app and loading the act data itself
+  prefork  serve.py --prefork loads everything once and forks N workers
+           that share it copy-on-write
+
+then drives a closed-loop load at --concurrency and reads every worker's
+/proc/<pid>/smaps_rollup:
+
+  batch         POST /submit-audit-batch with a new batch each time and
+                poll /batch-status until the job is done (latency is submit
+                to completed); sessions are drawn from a pool of --sessions
+  orchestrator  GET /catalogue/search with queries sampled from question texts
+
+Memory columns: Pss is the worker's fair share of pages it shares with its
+siblings and the parent, Private is what only that worker uses, and total
+Pss adds up every process of the server (the real footprint). Both modes
+use the act data snapshots (built once into a temporary directory) and
+throwaway stores.
+
+The load generator runs on the same host, so on small machines it competes
+with the workers for CPU; compare modes at the same worker count.
+
+Usage:
+python benchmarks/bench_prefork.py [--apps batch orchestrator] [--workers 1 2 4 8] [--requests 400]
+    [--concurrency 16] [--batch-size 50] [--output results.json]
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx
+
+from bench_search import make_queries
+from bench_startup import STARTUP_COMPLETE, build_snapshots, free_port
+from harness import latency_summary, make_batch, write_results
+
+MODES = ('spawn', 'prefork')
+
+
+# ============================================
+# SERVER
+# ============================================
+
+def start_server(app: str, mode: str, workers: int, snapshot_dir: Path, timeout: float):
+    """Start serve.py and wait until every worker has started; returns (process, base_url)"""
+    port = free_port()
+    data_dir = Path(tempfile.mkdtemp())
+    env = {
+        **os.environ,
+        'JOB_STORE_PATH': str(data_dir / 'jobs.db'),
+        'SESSION_STORE_PATH': str(data_dir / 'sessions.db'),
+        'BATCH_VERSION_STORE_PATH': str(data_dir / 'batches.db'),
+        'EVIDENCE_CACHE_DIR': str(data_dir / 'evidence'),
+        'FINDING_CACHE_PATH': '',
+        'JOB_POLL_SECONDS': '0.05',
+        'LOG_LEVEL': 'warning',
+    }
+    command = [sys.executable, str(REPO_ROOT / 'serve.py'), app, '--port', str(port),
+               '--workers', str(workers), '--snapshot-dir', str(snapshot_dir), '--log-level', 'info']
+    if mode == 'prefork':
+        command.append('--prefork')
+
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    deadline = time.perf_counter() + timeout
+    ready = 0
+    for line in process.stderr:
+        if STARTUP_COMPLETE in line:
+            ready += 1
+            if ready == workers:
+                break
+        if time.perf_counter() > deadline:
+            break
+    if ready < workers:
+        stop_server(process)
+        raise RuntimeError(f"{app} ({mode}, {workers} workers) did not start")
+    # Keep draining the log so workers never block on a full pipe
+    threading.Thread(target=lambda: process.stderr.read(), daemon=True).start()
+    return process, f"http://127.0.0.1:{port}"
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def descendants(pid: int) -> list:
+    children = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children += [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+    return children + [grandchild for child in children for grandchild in descendants(child)]
+
+
+def memory_kib(pid: int) -> dict:
+    """Rss, Pss and Private (clean + dirty) from /proc/<pid>/smaps_rollup, in KiB"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def server_memory(process: subprocess.Popen) -> dict:
+    """Average per-worker memory and the total Pss of the whole server, in MiB"""
+    supervisor, workers = None, []
+    for pid in [process.pid] + descendants(process.pid):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read()
+            usage = memory_kib(pid)
+        except OSError:
+            continue
+        if pid == process.pid:
+            supervisor = usage
+        elif b'resource_tracker' not in cmdline:
+            workers.append(usage)
+    total_pss = sum(usage['pss'] for usage in workers) + (supervisor['pss'] if supervisor else 0)
+    # uvicorn serves a single worker from the supervisor process itself
+    if not workers and supervisor:
+        workers = [supervisor]
+
+    def average(key):
+        return round(sum(usage[key] for usage in workers) / len(workers) / 1024, 1) if workers else None
+
+    return {
+        'worker_rss_mib': average('rss'),
+        'worker_pss_mib': average('pss'),
+        'worker_private_mib': average('private'),
+        'total_pss_mib': round(total_pss / 1024, 1),
+    }
+
+
+# ============================================
+# LOAD
+# ============================================
+
+async def run_load(base_url: str, make_request, n_requests: int, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        counter = iter(range(n_requests))
+        latencies = []
+
+        async def user():
+            for i in counter:
+                started = time.perf_counter()
+                await make_request(client, i)
+                latencies.append(time.perf_counter() - started)
+
+        # Warm connections and lazy paths in every worker before timing
+        await asyncio.gather(*(make_request(client, -1 - i) for i in range(concurrency)))
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        return latency_summary(latencies, time.perf_counter() - started)
+
+
+def batch_workload(args, rng: random.Random):
+    # Built up front so the client does not compete with the server mid-run
+    batches = {}
+    for i in range(-args.concurrency, args.requests):
+        batch = make_batch(args.batch_size, rng, batch_no=i % 10 ** 6)
+        batch['session_id'] = f"SESSION-{rng.randrange(args.sessions):04d}"
+        batches[i] = batch
+
+    async def request(client: httpx.AsyncClient, i: int):
+        batch = batches.pop(i)
+        response = await client.post('/submit-audit-batch', json=batch)
+        response.raise_for_status()
+        while True:
+            status = (await client.get(f"/batch-status/{batch['batch_id']}")).json()
+            if status['status'] in ('completed', 'failed'):
+                return
+            await asyncio.sleep(0.02)
+
+    return request
+
+
+def search_workload(args, rng: random.Random):
+    queries = [query for query, _, _ in make_queries(args.requests + args.concurrency, rng)]
+
+    async def request(client: httpx.AsyncClient, i: int):
+        response = await client.get('/catalogue/search', params={'q': queries[i], 'limit': 10})
+        response.raise_for_status()
+
+    return request
+
+
+WORKLOADS = {
+    'batch': batch_workload,
+    'orchestrator': search_workload,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--apps', nargs='+', default=['batch', 'orchestrator'], choices=sorted(WORKLOADS))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--sessions', type=int, default=64, help='distinct session ids in the batch workload')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    snapshot_dir = Path(tempfile.mkdtemp())
+    build_snapshots(snapshot_dir)
+
+    results = []
+    print(f"{'app':<13} {'mode':<8} {'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'worker Pss':>11} {'worker Private':>15} {'total Pss':>10}")
+    for app in args.apps:
+        for workers in args.workers:
+            for mode in args.modes:
+                # Same requests for both modes
+                rng = random.Random(42)
+                workload = WORKLOADS[app](args, rng)
+                process, base_url = start_server(app, mode, workers, snapshot_dir, args.timeout)
+                try:
+                    load = asyncio.run(run_load(base_url, workload, args.requests, args.concurrency))
+                    memory = server_memory(process)
+                finally:
+                    stop_server(process)
+                row = {'app': app, 'mode': mode, 'workers': workers, **load, **memory}
+                results.append(row)
+                print(f"{app:<13} {mode:<8} {workers:>7} {row['throughput_rps']:>8} {row['p50_ms']:>8} "
+                      f"{row['p95_ms']:>8} {row['worker_pss_mib']:>8} MiB {row['worker_private_mib']:>11} MiB "
+                      f"{row['total_pss_mib']:>6} MiB")
+
+    write_results(args.output, 'prefork', {'parameters': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
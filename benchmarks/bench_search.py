@@ -0,0 +1,100 @@
+"""
+Benchmark - act catalogue search index (act_search.py)
+
+Measures index build time, snapshot save/load time and query latency
+percentiles. Queries are 2-6 word samples from real question texts, so the
+term mix matches what users type; each query runs unfiltered and with an
+act + risk level filter, plus a related() lookup per item.
+
+Usage:
+python benchmarks/bench_search.py [--queries 2000] [--repeat 3] [--output results.json]
+"""
+
+from pathlib import Path
+import argparse
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from act_catalogue import get_catalogue
+from act_search import ActSearchIndex, tokenize
+from harness import best_of, latency_summary, percentile, write_results
+
+
+def make_queries(n_queries: int, rng: random.Random) -> list:
+    """(query, act partition, risk level) samples from catalogue question texts"""
+    entries = [entry for entry in get_catalogue().entries.values() if entry.question_text]
+    queries = []
+    for _ in range(n_queries):
+        entry = rng.choice(entries)
+        words = entry.question_text.split()
+        size = min(len(words), rng.randint(2, 6))
+        start = rng.randint(0, len(words) - size)
+        queries.append((' '.join(words[start:start + size]), entry.partition, entry.risk_level))
+    return queries
+
+
+def time_each(fn, args_list) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for args in args_list:
+        t = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - t)
+    summary = latency_summary(latencies, time.perf_counter() - started)
+    ordered = sorted(latencies)
+    summary['p50_us'] = round(percentile(ordered, 50) * 1e6, 1)
+    summary['p99_us'] = round(percentile(ordered, 99) * 1e6, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    get_catalogue()
+    build_seconds = best_of(ActSearchIndex.build, args.repeat)
+    index = ActSearchIndex.build()
+
+    snapshot = Path(tempfile.mkdtemp()) / 'act_search.npz'
+    save_seconds = best_of(lambda: index.save(snapshot), args.repeat)
+    load_seconds = best_of(lambda: ActSearchIndex.load(snapshot), args.repeat)
+
+    rng = random.Random(42)
+    queries = make_queries(args.queries, rng)
+    item_ids = [rng.choice(index.item_ids.tolist()) for _ in range(args.queries)]
+
+    results = {
+        'documents': len(index),
+        'terms': len(index.terms),
+        'postings': len(index.doc_ids),
+        'snapshot_bytes': snapshot.stat().st_size,
+        'build_ms': round(build_seconds * 1000, 2),
+        'snapshot_save_ms': round(save_seconds * 1000, 2),
+        'snapshot_load_ms': round(load_seconds * 1000, 2),
+        'avg_query_terms': round(sum(len(set(tokenize(q))) for q, _, _ in queries) / len(queries), 2),
+        'search': time_each(lambda q, act, level: index.search(q, 10), queries),
+        'search_filtered': time_each(lambda q, act, level: index.search(q, 10, act, level), queries),
+        'related': time_each(lambda item_id: index.related(item_id, 5), [(i,) for i in item_ids]),
+    }
+
+    print(f"Index: {results['documents']} items, {results['terms']} terms, {results['postings']} postings, "
+          f"{results['snapshot_bytes'] / 1024:.0f} KiB snapshot")
+    print(f"Build {results['build_ms']} ms, snapshot save {results['snapshot_save_ms']} ms, "
+          f"load {results['snapshot_load_ms']} ms")
+    print(f"{'query':<16} {'p50 us':>8} {'p99 us':>8} {'queries/s':>11}")
+    for name in ('search', 'search_filtered', 'related'):
+        row = results[name]
+        print(f"{name:<16} {row['p50_us']:>8} {row['p99_us']:>8} {row['throughput_rps']:>11}")
+
+    write_results(args.output, 'search', {'parameters': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
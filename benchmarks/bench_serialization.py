@@ -0,0 +1,112 @@
+"""
+Benchmark - request validation and report serialization for /run-master-audit
+
+Compares the per-item cost of the two ways the endpoint has handled a batch:
+
+  before: json body -> MasterAuditRequest -> .dict() (model_dump) -> report dict
+          -> MasterAuditResponse(**report) -> response_model re-validation
+          -> jsonable_encoder -> json.dumps
+  after:  json body -> TypeAdapter(MasterAuditBatch).validate_json -> report dict
+          -> fast_json.dumps
+
+The agents are left out (the report is built directly from the batch), so
+the numbers are pure validation and encoding overhead.
+
+Usage:
+python benchmarks/bench_serialization.py [--sizes 100 1000 10000] [--repeat 5] [--output results.json]
+"""
+
+from pathlib import Path
+from datetime import datetime
+import argparse
+import json
+import random
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+
+import fast_json
+from harness import best_of, make_batch, write_results
+from MASTER_AUDIT_ORCHESTRATOR_EXAMPLE import MasterAuditRequest, MasterAuditResponse, master_audit_batch
+
+def make_body(n_items: int, rng: random.Random) -> bytes:
+    """Full-fat request body (clients sending statute text) with n_items items"""
+    return json.dumps(make_batch(n_items, rng)).encode('utf-8')
+
+
+def make_report(batch: dict) -> dict:
+    """Report of the size the orchestrator returns for this batch"""
+    findings = [
+        {
+            'item_id': item['audit_item_id'],
+            'status': item.get('intern_verdict'),
+            'category': item.get('category'),
+            'severity': item.get('risk_level'),
+            'comment': item.get('intern_comment'),
+            'recommendation': f"Review {item.get('category')} compliance for {batch['company_name']}",
+        }
+        for item in batch['audit_items']
+    ]
+    return {
+        'batch_id': batch['batch_id'],
+        'session_id': batch['session_id'],
+        'company_name': batch['company_name'],
+        'location': batch['location'],
+        'submitted_at': batch['submitted_at'],
+        'act_scores': {'Code on Wages, 2019': {'score': 80.0, 'critical': 1, 'high': 2, 'items_analyzed': len(findings)}},
+        'overall_compliance_score': 80.0,
+        'total_findings': len(findings),
+        'critical_findings': 1,
+        'high_risk_findings': 2,
+        'medium_risk_findings': 0,
+        'low_risk_findings': 0,
+        'findings': findings,
+        'recommendations': ['Address non-compliance findings'],
+        'agents_invoked': ['Code on Wages, 2019'],
+        'processing_timestamp': datetime.now().isoformat(),
+    }
+
+
+def before(body: bytes) -> bytes:
+    request = MasterAuditRequest(**json.loads(body))
+    report = make_report(request.model_dump())
+    response = MasterAuditResponse(**report)
+    validated = MasterAuditResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode('utf-8')
+
+
+def after(body: bytes) -> bytes:
+    batch = master_audit_batch.validate_json(body)
+    return fast_json.dumps(make_report(batch))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    results = []
+    print(f"{'items':>8} {'before us/item':>15} {'after us/item':>14} {'speedup':>8}")
+    for size in args.sizes:
+        body = make_body(size, rng)
+        t_before = best_of(lambda: before(body), args.repeat)
+        t_after = best_of(lambda: after(body), args.repeat)
+        results.append({
+            'items': size,
+            'before_us_per_item': round(t_before / size * 1e6, 2),
+            'after_us_per_item': round(t_after / size * 1e6, 2),
+            'speedup': round(t_before / t_after, 2),
+        })
+        row = results[-1]
+        print(f"{size:>8} {row['before_us_per_item']:>15} {row['after_us_per_item']:>14} {row['speedup']:>7}x")
+
+    write_results(args.output, 'serialization', {'parameters': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark - cold start of the services under serve.py
+
+Starts `python serve.py <app> --workers N` as a fresh process and measures:
+
+  first_request_ms  spawn -> first successful GET /metrics
+  all_workers_ms    spawn -> every worker has logged "Application startup complete"
+
+for each app, worker count and act data source: "json" parses
+src/data/*.json in every worker, "snapshot" opens the prebuilt catalogue
+and search index snapshots (act_snapshot.py). Stores and caches go to a
+temporary directory so runs do not touch local data.
+
+Usage:
+python benchmarks/bench_startup.py [--apps orchestrator batch] [--workers 1 4 16] [--repeat 3] [--output results.json]
+"""
+
+from pathlib import Path
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from harness import write_results
+
+STARTUP_COMPLETE = "Application startup complete"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def build_snapshots(directory: Path):
+    subprocess.run(
+        [sys.executable, str(REPO_ROOT / 'act_snapshot.py'), 'build',
+         '--output', str(directory / 'act_catalogue.snap'),
+         '--search-output', str(directory / 'act_search.npz')],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def measure(app: str, workers: int, source: str, snapshot_dir: Path, timeout: float) -> dict:
+    port = free_port()
+    data_dir = Path(tempfile.mkdtemp())
+    env = {
+        **os.environ,
+        'JOB_STORE_PATH': str(data_dir / 'jobs.db'),
+        'SESSION_STORE_PATH': str(data_dir / 'sessions.db'),
+        'BATCH_VERSION_STORE_PATH': str(data_dir / 'batches.db'),
+        'EVIDENCE_CACHE_DIR': str(data_dir / 'evidence'),
+        'FINDING_CACHE_PATH': '',
+    }
+    for name in ('ACT_SNAPSHOT_PATH', 'ACT_SEARCH_SNAPSHOT'):
+        env.pop(name, None)
+    command = [sys.executable, str(REPO_ROOT / 'serve.py'), app, '--port', str(port), '--workers', str(workers)]
+    if source == 'snapshot':
+        command += ['--snapshot-dir', str(snapshot_dir)]
+    else:
+        command += ['--no-snapshot']
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    all_up = threading.Event()
+    timings = {}
+
+    def watch_log():
+        ready = 0
+        for line in process.stderr:
+            if STARTUP_COMPLETE in line:
+                ready += 1
+                if ready == workers:
+                    timings['all_workers'] = time.perf_counter() - started
+                    all_up.set()
+
+    threading.Thread(target=watch_log, daemon=True).start()
+
+    url = f"http://127.0.0.1:{port}/metrics"
+    try:
+        deadline = started + timeout
+        while 'first_request' not in timings:
+            if time.perf_counter() > deadline or process.poll() is not None:
+                raise RuntimeError(f"{app} with {workers} workers did not start")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        timings['first_request'] = time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        all_up.wait(max(0.0, deadline - time.perf_counter()))
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    return {
+        'first_request_ms': round(timings['first_request'] * 1000, 1),
+        'all_workers_ms': round(timings['all_workers'] * 1000, 1) if 'all_workers' in timings else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--apps', nargs='+', default=['orchestrator', 'batch'])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--sources', nargs='+', default=['json', 'snapshot'], choices=['json', 'snapshot'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    snapshot_dir = Path(tempfile.mkdtemp())
+    if 'snapshot' in args.sources:
+        build_snapshots(snapshot_dir)
+
+    results = []
+    print(f"{'app':<13} {'workers':>7} {'source':<9} {'first request ms':>17} {'all workers ms':>15}")
+    for app in args.apps:
+        for workers in args.workers:
+            for source in args.sources:
+                runs = [measure(app, workers, source, snapshot_dir, args.timeout) for _ in range(args.repeat)]
+                # Best of the runs, like the other benchmarks
+                first = min(run['first_request_ms'] for run in runs)
+                complete = [run['all_workers_ms'] for run in runs if run['all_workers_ms'] is not None]
+                row = {
+                    'app': app,
+                    'workers': workers,
+                    'source': source,
+                    'first_request_ms': first,
+                    'all_workers_ms': min(complete) if complete else None,
+                }
+                results.append(row)
+                print(f"{app:<13} {workers:>7} {source:<9} {first:>17} {str(row['all_workers_ms']):>15}")
+
+    write_results(args.output, 'startup', {'parameters': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark harness - synthetic audit batches from the real act data, timing
+helpers and machine-readable result files shared by the benchmark scripts.
+
+Batches sample real checklist items from src/data/*.json (via the act
+catalogue), so item IDs, risk levels, categories and statute text have the
+same mix and sizes as production audits.
+"""
+
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Optional, Callable, Sequence
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from act_catalogue import get_catalogue
+
+# Verdict mix seen in submitted sessions (None = left unanswered)
+VERDICT_MIX = {
+    'Compliant': 0.60,
+    'Non-Compliant': 0.20,
+    'Delayed': 0.08,
+    'Not Applicable': 0.07,
+    None: 0.05,
+}
+
+COMMENTS = [
+    'Checked register on site',
+    'Document produced, signature missing',
+    'Supervisor confirmed verbally, no record',
+    'Licence displayed at main gate',
+    '',
+]
+
+
+def make_items(
+    n_items: int,
+    rng: random.Random,
+    compact: bool = False,
+    acts: Optional[Sequence[str]] = None
+) -> List[Dict]:
+    """
+    Sample n_items audit items from the catalogue
+
+    Args:
+        compact: Send only IDs, verdicts and evidence (catalogue fills the rest)
+        acts: Restrict sampling to these partitions (e.g. ['wages', 'safety'])
+    """
+    entries = [
+        entry for entry in get_catalogue().entries.values()
+        if acts is None or entry.partition in acts
+    ]
+    verdicts = list(VERDICT_MIX)
+    weights = list(VERDICT_MIX.values())
+
+    items = []
+    for _ in range(n_items):
+        entry = rng.choice(entries)
+        verdict = rng.choices(verdicts, weights)[0]
+        workflow_type = entry.workflow_type or 'manual_observation'
+        item = {
+            'audit_item_id': entry.audit_item_id,
+            'intern_verdict': verdict,
+            'intern_comment': rng.choice(COMMENTS),
+            'is_applicable': verdict != 'Not Applicable',
+        }
+        if workflow_type == 'ai_evidence':
+            item['evidence_url'] = f"https://storage.example.com/evidence/{entry.audit_item_id}.pdf"
+        if not compact:
+            item.update({
+                'question_text': entry.question_text,
+                'legal_text': entry.legal_text,
+                'risk_level': entry.risk_level,
+                'category': entry.category,
+                'workflow_type': workflow_type,
+            })
+        items.append(item)
+    return items
+
+
+def make_batch(
+    n_items: int,
+    rng: random.Random,
+    batch_no: int = 1,
+    compact: bool = False,
+    acts: Optional[Sequence[str]] = None
+) -> Dict:
+    """Synthetic AuditBatchRequest / MasterAuditRequest payload"""
+    return {
+        'batch_id': f"BENCH-{batch_no:06d}",
+        'session_id': f"SESSION-{batch_no:06d}",
+        'company_name': f"Bench Industries {batch_no}",
+        'location': 'Pune, Maharashtra',
+        'submitted_at': datetime.now().isoformat(),
+        'audit_items': make_items(n_items, rng, compact, acts),
+    }
+
+
+# ============================================
+# TIMING
+# ============================================
+
+def best_of(fn: Callable, repeat: int = 5) -> float:
+    """Fastest of `repeat` runs of fn(), in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def latency_summary(latencies: Sequence[float], wall_seconds: float) -> Dict:
+    """p50/p95/p99 in milliseconds plus throughput"""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        'throughput_rps': round(len(ordered) / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+
+# ============================================
+# RESULTS
+# ============================================
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': datetime.now().isoformat(),
+    }
+
+
+def write_results(path: Optional[str], benchmark: str, results: Dict):
+    """Write results as JSON (skipped when path is None)"""
+    if not path:
+        return
+    with open(path, 'w') as f:
+        json.dump({'benchmark': benchmark, 'environment': environment(), **results}, f, indent=2)
+    print(f"Results written to {path}")
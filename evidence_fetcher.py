@@ -0,0 +1,451 @@
+"""
+Evidence Fetcher - concurrent evidence downloads with a content-addressed disk cache
+
+Items with workflow_type == "ai_evidence" point at uploaded documents
+(evidence_url, possibly several comma-separated URLs). Before an act's
+items go to its specialist agent, EvidenceFetcher downloads those documents
+with bounded concurrency over one pooled httpx client and attaches the
+local copy to each item as item['evidence_documents'].
+
+Cache layout under EVIDENCE_CACHE_DIR:
+  objects/ab/abcdef...  - document bodies, named by SHA-256 of the content,
+                          so a licence PDF shared by many sessions (or
+                          uploaded under several URLs) is stored once
+  index.db              - SQLite map of URL -> content hash, ETag and
+                          Last-Modified, so a known URL is not downloaded
+                          again; after EVIDENCE_CACHE_TTL_SECONDS it is
+                          revalidated with a conditional GET
+
+Concurrent requests for the same URL share one download. Failures are
+logged and reported as missing documents; they never fail the audit.
+
+evidence_url comes straight from the request body, so only http(s) URLs on
+EVIDENCE_ALLOWED_HOSTS are fetched (by default the Supabase project host,
+where uploads are stored). Redirects are followed one hop at a time and
+every hop is checked again, so an allowed host cannot bounce a request to
+a metadata endpoint or an internal port. Other URLs count as blocked.
+
+tests/test_evidence_fetcher.py runs the fetcher against an httpx.MockTransport
+stand-in. To try it by hand, serve a directory of sample documents with
+`python -m http.server 8765` and run
+`EVIDENCE_ALLOWED_HOSTS=127.0.0.1 python evidence_fetcher.py http://127.0.0.1:8765/licence.pdf`.
+
+Installation:
+pip install httpx
+
+Configuration (environment variables):
+EVIDENCE_PREFETCH             - set to 0 to skip evidence prefetch (default 1)
+EVIDENCE_CACHE_DIR            - cache directory (default ./evidence_cache)
+EVIDENCE_FETCH_CONCURRENCY    - max simultaneous downloads (default 16)
+EVIDENCE_FETCH_TIMEOUT        - per-request timeout in seconds (default 30)
+EVIDENCE_MAX_BYTES            - largest document accepted (default 26214400, 25 MB)
+EVIDENCE_CACHE_TTL_SECONDS    - reuse a URL without revalidating for this long (default 86400)
+EVIDENCE_URL_IGNORED_PARAMS   - query parameters dropped from cache keys (default token)
+EVIDENCE_ALLOWED_HOSTS        - hosts evidence may be fetched from, comma-separated; a leading
+                                dot also allows subdomains (default: the host of VITE_SUPABASE_URL)
+EVIDENCE_MAX_REDIRECTS        - redirects followed per download (default 5)
+"""
+
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, TYPE_CHECKING
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from metrics import Counter, Histogram
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+EVIDENCE_PREFETCH = os.environ.get("EVIDENCE_PREFETCH", "1") != "0"
+EVIDENCE_CACHE_DIR = Path(os.environ.get("EVIDENCE_CACHE_DIR", "evidence_cache"))
+EVIDENCE_FETCH_CONCURRENCY = int(os.environ.get("EVIDENCE_FETCH_CONCURRENCY", "16"))
+EVIDENCE_FETCH_TIMEOUT = float(os.environ.get("EVIDENCE_FETCH_TIMEOUT", "30"))
+EVIDENCE_MAX_BYTES = int(os.environ.get("EVIDENCE_MAX_BYTES", str(25 * 1024 * 1024)))
+EVIDENCE_CACHE_TTL_SECONDS = float(os.environ.get("EVIDENCE_CACHE_TTL_SECONDS", "86400"))
+EVIDENCE_URL_IGNORED_PARAMS = frozenset(
+    param.strip() for param in os.environ.get("EVIDENCE_URL_IGNORED_PARAMS", "token").split(",") if param.strip()
+)
+EVIDENCE_ALLOWED_HOSTS = frozenset(
+    host.strip().lower()
+    for host in os.environ.get(
+        "EVIDENCE_ALLOWED_HOSTS", urlsplit(os.environ.get("VITE_SUPABASE_URL", "")).hostname or ""
+    ).split(",")
+    if host.strip()
+)
+EVIDENCE_MAX_REDIRECTS = int(os.environ.get("EVIDENCE_MAX_REDIRECTS", "5"))
+
+ALLOWED_SCHEMES = ('http', 'https')
+
+# Outcomes
+CACHED = "cached"
+DOWNLOADED = "downloaded"
+NOT_MODIFIED = "not_modified"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+EVIDENCE_FETCHES = Counter(
+    'evidence_fetches_total',
+    'Evidence document lookups by outcome (cached, downloaded, not_modified, failed, blocked)',
+    ['outcome']
+)
+EVIDENCE_BYTES = Counter(
+    'evidence_downloaded_bytes_total',
+    'Evidence bytes downloaded'
+)
+EVIDENCE_FETCH_SECONDS = Histogram(
+    'evidence_fetch_seconds',
+    'Evidence download duration (network requests only)'
+)
+
+# Downloaded bytes collected before they are handed to a thread for writing
+_WRITE_BUFFER_BYTES = 1024 * 1024
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence_urls (
+    url_key        TEXT PRIMARY KEY,
+    sha256         TEXT NOT NULL,
+    size           INTEGER NOT NULL,
+    content_type   TEXT,
+    etag           TEXT,
+    last_modified  TEXT,
+    fetched_at     REAL NOT NULL
+)
+"""
+
+
+def split_evidence_urls(value: Optional[str]) -> List[str]:
+    """URLs in an evidence_url field (the frontend joins several with ', ')"""
+    if not value:
+        return []
+    return [url.strip() for url in value.split(',') if url.strip().startswith(('http://', 'https://'))]
+
+
+class BlockedURLError(ValueError):
+    """An evidence URL (or a redirect) points outside the allowed hosts"""
+
+
+def host_allowed(url: str, allowed_hosts: Iterable[str] = EVIDENCE_ALLOWED_HOSTS) -> bool:
+    """Whether a URL is http(s) on an allowed host ('.example.com' also allows subdomains)"""
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if parts.scheme not in ALLOWED_SCHEMES or not host:
+        return False
+    for allowed in allowed_hosts:
+        if host == allowed.lstrip('.') or (allowed.startswith('.') and host.endswith(allowed)):
+            return True
+    return False
+
+
+def url_key(url: str) -> str:
+    """Cache key for a URL: fragment and volatile query parameters removed"""
+    parts = urlsplit(url)
+    query = urlencode([
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name not in EVIDENCE_URL_IGNORED_PARAMS
+    ])
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+
+class EvidenceFetcher:
+    """
+    Bounded-concurrency evidence downloader backed by the disk cache
+
+    Use as an async context manager (or call aclose()) to release the
+    pooled connections. Bound to the event loop it is first used on.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = EVIDENCE_CACHE_DIR,
+        concurrency: int = EVIDENCE_FETCH_CONCURRENCY,
+        timeout: float = EVIDENCE_FETCH_TIMEOUT,
+        max_bytes: int = EVIDENCE_MAX_BYTES,
+        ttl_seconds: float = EVIDENCE_CACHE_TTL_SECONDS,
+        allowed_hosts: Iterable[str] = EVIDENCE_ALLOWED_HOSTS,
+        max_redirects: int = EVIDENCE_MAX_REDIRECTS,
+        client: Optional["httpx.AsyncClient"] = None
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.allowed_hosts = frozenset(host.lower() for host in allowed_hosts)
+        self.max_redirects = max_redirects
+
+        # Index queries run on worker threads, one at a time
+        self._index_lock = threading.Lock()
+        self._index = sqlite3.connect(str(self.cache_dir / "index.db"), check_same_thread=False)
+        with self._index:
+            self._index.execute("PRAGMA journal_mode=WAL")
+            self._index.execute(_INDEX_SCHEMA)
+
+        # httpx is imported on first use so processes that never fetch
+        # evidence do not pay for it at startup
+        import httpx
+
+        self._owns_client = client is None
+        # Redirects are followed by _download(), which checks every hop
+        self._client = client or httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=False,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._owns_client:
+            await self._client.aclose()
+        with self._index_lock:
+            self._index.close()
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256
+
+    async def fetch(self, url: str) -> Optional[Dict]:
+        """
+        Local copy of one evidence document
+
+        Returns:
+            {'url', 'sha256', 'path', 'size', 'content_type', 'source'}
+            or None if the document could not be fetched
+        """
+        key = url_key(url)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url, key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def prefetch(self, items: Iterable[Dict]) -> int:
+        """
+        Fetch evidence for every ai_evidence item and attach it in place
+
+        Sets item['evidence_documents'] to the fetched documents (missing
+        ones left out). Returns the number of documents attached.
+        """
+        wanted = [
+            (item, split_evidence_urls(item.get('evidence_url')))
+            for item in items
+            if item.get('workflow_type') == 'ai_evidence'
+        ]
+        urls = {url for _, item_urls in wanted for url in item_urls}
+        if not urls:
+            return 0
+
+        documents = dict(zip(urls, await asyncio.gather(*(self.fetch(url) for url in urls))))
+        attached = 0
+        for item, item_urls in wanted:
+            found = [documents[url] for url in item_urls if documents[url] is not None]
+            item['evidence_documents'] = found
+            attached += len(found)
+        return attached
+
+    async def _fetch(self, url: str, key: str) -> Optional[Dict]:
+        if not host_allowed(url, self.allowed_hosts):
+            logger.warning(f"📎 Evidence URL not on EVIDENCE_ALLOWED_HOSTS, skipped: {url}")
+            EVIDENCE_FETCHES.inc(outcome=BLOCKED)
+            return None
+
+        row = await asyncio.to_thread(self._lookup, key)
+        if row is not None:
+            sha256, size, content_type, etag, last_modified, fetched_at = row
+            if time.time() - fetched_at < self.ttl_seconds:
+                EVIDENCE_FETCHES.inc(outcome=CACHED)
+                return self._document(url, sha256, size, content_type, CACHED)
+            validators = {}
+            if etag:
+                validators['If-None-Match'] = etag
+            if last_modified:
+                validators['If-Modified-Since'] = last_modified
+        else:
+            validators = {}
+
+        import httpx
+
+        try:
+            async with self._semaphore:
+                with EVIDENCE_FETCH_SECONDS.time():
+                    result = await self._download(url, validators)
+        except BlockedURLError as e:
+            logger.warning(f"📎 Evidence fetch for {url} blocked: {e}")
+            EVIDENCE_FETCHES.inc(outcome=BLOCKED)
+            return None
+        except (httpx.HTTPError, OSError, ValueError) as e:
+            reason = f"HTTP {e.response.status_code}" if isinstance(e, httpx.HTTPStatusError) else str(e) or type(e).__name__
+            logger.warning(f"📎 Evidence fetch failed for {url}: {reason}")
+            EVIDENCE_FETCHES.inc(outcome=FAILED)
+            return None
+
+        if result is None:
+            # 304: the cached copy is still current
+            await asyncio.to_thread(self._touch, key)
+            EVIDENCE_FETCHES.inc(outcome=NOT_MODIFIED)
+            return self._document(url, row[0], row[1], row[2], NOT_MODIFIED)
+
+        sha256, size, content_type, etag, last_modified = result
+        await asyncio.to_thread(self._store, key, sha256, size, content_type, etag, last_modified)
+        EVIDENCE_FETCHES.inc(outcome=DOWNLOADED)
+        EVIDENCE_BYTES.inc(size)
+        return self._document(url, sha256, size, content_type, DOWNLOADED)
+
+    # === Index (called through asyncio.to_thread) ===
+
+    def _lookup(self, key: str) -> Optional[tuple]:
+        """Index row of a URL whose object is still on disk, else None"""
+        with self._index_lock:
+            row = self._index.execute(
+                "SELECT sha256, size, content_type, etag, last_modified, fetched_at FROM evidence_urls WHERE url_key = ?",
+                (key,)
+            ).fetchone()
+        if row is None or not self.object_path(row[0]).exists():
+            return None
+        return row
+
+    def _touch(self, key: str):
+        with self._index_lock, self._index:
+            self._index.execute("UPDATE evidence_urls SET fetched_at = ? WHERE url_key = ?", (time.time(), key))
+
+    def _store(self, key: str, sha256: str, size: int, content_type: Optional[str],
+               etag: Optional[str], last_modified: Optional[str]):
+        with self._index_lock, self._index:
+            self._index.execute(
+                "INSERT OR REPLACE INTO evidence_urls "
+                "(url_key, sha256, size, content_type, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, sha256, size, content_type, etag, last_modified, time.time())
+            )
+
+    async def _download(self, url: str, headers: Dict[str, str]):
+        """
+        Stream a document into the object store; None on 304 Not Modified
+
+        Redirects are followed here one hop at a time, and every target is
+        checked against the allowed hosts before it is requested.
+        """
+        for _ in range(self.max_redirects + 1):
+            async with self._client.stream("GET", url, headers=headers, follow_redirects=False) as response:
+                if response.status_code == 304:
+                    return None
+                if response.is_redirect and 'location' in response.headers:
+                    url = str(response.url.join(response.headers['location']))
+                    if not host_allowed(url, self.allowed_hosts):
+                        raise BlockedURLError(f"redirect to {url} is not on EVIDENCE_ALLOWED_HOSTS")
+                    continue
+                response.raise_for_status()
+                return await self._save(response)
+        raise ValueError(f"more than {self.max_redirects} redirects")
+
+    async def _save(self, response: "httpx.Response"):
+        """
+        Write a successful response body to the object store
+
+        Chunks are hashed and written on a worker thread, up to
+        _WRITE_BUFFER_BYTES at a time, so large documents downloaded in
+        parallel do not block the event loop on disk writes.
+        """
+        declared = response.headers.get('content-length')
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise ValueError(f"document is {declared} bytes (limit {self.max_bytes})")
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = await asyncio.to_thread(tempfile.mkstemp, dir=self.objects_dir, suffix=".part")
+        tmp = os.fdopen(fd, 'wb')
+        try:
+            pending: List[bytes] = []
+            pending_size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ValueError(f"document exceeds {self.max_bytes} bytes")
+                pending.append(chunk)
+                pending_size += len(chunk)
+                if pending_size >= _WRITE_BUFFER_BYTES:
+                    await asyncio.to_thread(_write_chunks, tmp, digest, pending)
+                    pending, pending_size = [], 0
+            await asyncio.to_thread(_write_chunks, tmp, digest, pending, True)
+
+            sha256 = digest.hexdigest()
+            await asyncio.to_thread(self._commit, tmp_name, sha256)
+        except BaseException:
+            await asyncio.to_thread(_discard, tmp, tmp_name)
+            raise
+
+        return (
+            sha256,
+            size,
+            response.headers.get('content-type'),
+            response.headers.get('etag'),
+            response.headers.get('last-modified')
+        )
+
+    def _commit(self, tmp_name: str, sha256: str):
+        """Move a finished download into place (dropped if the content is already stored)"""
+        final = self.object_path(sha256)
+        if final.exists():
+            os.unlink(tmp_name)
+        else:
+            final.parent.mkdir(exist_ok=True)
+            os.replace(tmp_name, final)
+
+    def _document(self, url: str, sha256: str, size: int, content_type: Optional[str], source: str) -> Dict:
+        return {
+            'url': url,
+            'sha256': sha256,
+            'path': str(self.object_path(sha256)),
+            'size': size,
+            'content_type': content_type,
+            'source': source,
+        }
+
+
+def _write_chunks(tmp, digest, chunks: List[bytes], close: bool = False):
+    for chunk in chunks:
+        digest.update(chunk)
+        tmp.write(chunk)
+    if close:
+        tmp.close()
+
+
+def _discard(tmp, tmp_name: str):
+    tmp.close()
+    if os.path.exists(tmp_name):
+        os.unlink(tmp_name)
+
+
+async def _main(urls: List[str], cache_dir: Path):
+    async with EvidenceFetcher(cache_dir=cache_dir) as fetcher:
+        started = time.perf_counter()
+        documents = await asyncio.gather(*(fetcher.fetch(url) for url in urls))
+        for url, document in zip(urls, documents):
+            print(json.dumps(document or {'url': url, 'source': FAILED}))
+        logger.info(f"Fetched {len(urls)} URLs in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch evidence documents into the local cache")
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--cache-dir', type=Path, default=EVIDENCE_CACHE_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    asyncio.run(_main(args.urls, args.cache_dir))
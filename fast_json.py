@@ -0,0 +1,53 @@
+"""
+Fast JSON - orjson-backed encoding for large audit reports
+
+Reports with thousands of findings are plain dicts and audit_records
+records by the time they leave the orchestrator, so they are encoded
+straight to bytes here instead of being rebuilt as pydantic models and
+passed through jsonable_encoder. Falls back to the standard json module
+when orjson is not installed.
+
+Installation:
+pip install orjson
+"""
+
+from typing import Any
+import json
+
+from fastapi.responses import Response
+
+from audit_records import to_jsonable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=to_jsonable, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def _default(obj: Any) -> Any:
+    try:
+        return to_jsonable(obj)
+    except TypeError:
+        return str(obj)
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips FastAPI's response_model validation and jsonable_encoder"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
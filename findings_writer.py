@@ -0,0 +1,406 @@
+"""
+Findings Writer - bulk upserts of agent results into audit_agent_submissions
+
+src/services/reportService.js and AuditReport.jsx read agent results from
+the audit_agent_submissions table (ai_agent_name, ai_score, status,
+risk_level, ai_analysis). FindingsWriter is the orchestrator's persistence
+stage for them:
+
+- add() buffers an act's rows as soon as the act finishes, keyed by
+  (session_id, audit_item_id), so an item written twice is sent once
+- every FINDINGS_WRITER_BATCH_SIZE buffered rows go out as one PostgREST
+  upsert (POST ...?on_conflict=session_id,audit_item_id with
+  Prefer: resolution=merge-duplicates) in the background, while other
+  agents are still running
+- flush(), called after synthesis, sends the rest and waits for every
+  upsert in flight
+
+Concurrent audits share one writer per event loop (its pooled client and
+request limit) but each gets its own FindingsBatch from writer.batch():
+rows are buffered per batch, and the batch's flush() sends only its own
+rows, waits only for the upserts it started and reports only its own
+written / failed counts, so one audit never waits on another's writes.
+
+5,000 findings take 5 requests at the default batch size, over one pooled
+keep-alive client per event loop. Only the agent columns are sent, so on
+conflict the intern's answers on the row (user_status, user_comment,
+evidence_url, ...) are left as they are, and writing the same results again
+changes nothing. Requests that fail with a connection error, a timeout,
+408/429 or a 5xx are retried with exponential backoff (honouring
+Retry-After); rows that still fail, or that cannot be encoded or sent at
+all, are logged and counted, never failing the audit. Upserts need the unique index from
+ADD_AGENT_SUBMISSIONS_UPSERT_KEY.sql.
+
+The writer talks to PostgREST directly, like inspect_supabase.py, so it
+works against Supabase, a local PostgREST on a local Postgres, or any
+stand-in (benchmarks/bench_findings_writer.py has one):
+
+    postgrest postgrest.conf   # db-uri = postgres://localhost/audits
+    SUPABASE_REST_URL=http://localhost:3000 python findings_writer.py --findings 5000
+
+Installation:
+pip install httpx
+
+Configuration (environment variables):
+FINDINGS_PERSIST                - set to 0 to skip writing findings (default 1; needs a REST URL)
+SUPABASE_REST_URL               - PostgREST base URL, overrides VITE_SUPABASE_URL
+VITE_SUPABASE_URL               - project URL (REST API at <url>/rest/v1)
+SUPABASE_SERVICE_ROLE_KEY       - API key for writes (falls back to VITE_SUPABASE_ANON_KEY)
+FINDINGS_WRITER_BATCH_SIZE      - rows per upsert request (default 1000)
+FINDINGS_WRITER_CONCURRENCY     - upsert requests in flight at once (default 4)
+FINDINGS_WRITER_RETRIES         - retries per request after the first attempt (default 4)
+FINDINGS_WRITER_TIMEOUT         - per-request timeout in seconds (default 30)
+FINDINGS_WRITER_BACKOFF_SECONDS - first retry delay, doubled per retry up to 30s (default 0.5)
+"""
+
+from typing import List, Dict, Optional, Any, Iterable, Set, Tuple, TYPE_CHECKING
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import time
+import uuid
+import weakref
+
+import fast_json
+from audit_logging import event
+from metrics import Counter, Histogram
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+FINDINGS_PERSIST = os.environ.get("FINDINGS_PERSIST", "1") != "0"
+FINDINGS_WRITER_BATCH_SIZE = int(os.environ.get("FINDINGS_WRITER_BATCH_SIZE", "1000"))
+FINDINGS_WRITER_CONCURRENCY = int(os.environ.get("FINDINGS_WRITER_CONCURRENCY", "4"))
+FINDINGS_WRITER_RETRIES = int(os.environ.get("FINDINGS_WRITER_RETRIES", "4"))
+FINDINGS_WRITER_TIMEOUT = float(os.environ.get("FINDINGS_WRITER_TIMEOUT", "30"))
+FINDINGS_WRITER_BACKOFF_SECONDS = float(os.environ.get("FINDINGS_WRITER_BACKOFF_SECONDS", "0.5"))
+
+SUBMISSIONS_TABLE = "audit_agent_submissions"
+
+# Idempotency key of a result (unique index in ADD_AGENT_SUBMISSIONS_UPSERT_KEY.sql)
+CONFLICT_COLUMNS = ("session_id", "audit_item_id")
+
+# Columns written by the agents; everything else on the row belongs to the intern
+SUBMISSION_COLUMNS = CONFLICT_COLUMNS + (
+    "ai_agent_name", "status", "risk_level", "ai_score", "ai_analysis", "ai_status"
+)
+
+AI_STATUS_COMPLETED = "Completed"
+
+# Responses worth another attempt (PostgREST returns 503 while reloading its schema cache)
+RETRY_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+MAX_BACKOFF_SECONDS = 30.0
+
+# Outcomes
+WRITTEN = "written"
+RETRIED = "retried"
+FAILED = "failed"
+
+FINDINGS_WRITER_ROWS = Counter(
+    'findings_writer_rows_total',
+    'audit_agent_submissions rows upserted or given up on, by outcome (written, failed)',
+    ['outcome']
+)
+FINDINGS_WRITER_REQUESTS = Counter(
+    'findings_writer_requests_total',
+    'Upsert requests by outcome (written, retried, failed)',
+    ['outcome']
+)
+FINDINGS_WRITER_REQUEST_SECONDS = Histogram(
+    'findings_writer_request_seconds',
+    'Duration of one upsert request'
+)
+
+
+def rest_base_url() -> Optional[str]:
+    """PostgREST base URL from the environment, or None when none is configured"""
+    url = os.environ.get("SUPABASE_REST_URL")
+    if url:
+        return url.rstrip("/")
+    project = os.environ.get("VITE_SUPABASE_URL")
+    if project:
+        return project.rstrip("/") + "/rest/v1"
+    return None
+
+
+def persistence_enabled() -> bool:
+    return FINDINGS_PERSIST and rest_base_url() is not None
+
+
+def submission_row(session_id: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """The agent columns of an audit_agent_submissions row (from session_rows())"""
+    return {
+        'session_id': session_id,
+        'audit_item_id': row.get('audit_item_id'),
+        'ai_agent_name': row.get('ai_agent_name'),
+        'status': row.get('status'),
+        'risk_level': row.get('risk_level'),
+        'ai_score': row.get('ai_score'),
+        'ai_analysis': row.get('ai_analysis') or row.get('comment'),
+        'ai_status': AI_STATUS_COMPLETED,
+    }
+
+
+def _retry_after(response: Optional["httpx.Response"]) -> Optional[float]:
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return min(float(value), MAX_BACKOFF_SECONDS) if value else None
+    except ValueError:
+        return None
+
+
+class FindingsBatch:
+    """
+    Rows of one audit on a shared FindingsWriter
+
+    Buffers its own rows, keyed by (session_id, audit_item_id), and tracks
+    the upserts it started, so flush() waits for and counts only those.
+    """
+
+    def __init__(self, writer: "FindingsWriter"):
+        self._writer = writer
+        self._buffer: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self._sending: Set[asyncio.Task] = set()
+        # Rows written / given up on since the last flush()
+        self._written = 0
+        self._failed = 0
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def add(self, session_id: str, rows: Iterable[Dict[str, Any]]):
+        """
+        Buffer a session's result rows (shaped like session_rows())
+
+        Starts a background upsert for every full batch; call flush() to
+        send the remainder.
+        """
+        for row in rows:
+            record = submission_row(session_id, row)
+            self._buffer[(session_id, record['audit_item_id'])] = record
+        while len(self._buffer) >= self._writer.batch_size:
+            self._start(self._take(self._writer.batch_size))
+
+    async def flush(self) -> Dict[str, int]:
+        """
+        Send this batch's buffered rows and wait for the upserts it started
+
+        Returns:
+            {'written': rows, 'failed': rows} since the previous flush
+        """
+        self.send_buffered()
+        while self._sending:
+            await asyncio.gather(*self._sending)
+        outcome = {WRITTEN: self._written, FAILED: self._failed}
+        self._written = self._failed = 0
+        return outcome
+
+    def send_buffered(self):
+        """Start upserts for every buffered row without waiting (for an audit that will not flush)"""
+        while self._buffer:
+            self._start(self._take(self._writer.batch_size))
+
+    def _take(self, n: int) -> List[Dict[str, Any]]:
+        keys = list(itertools.islice(self._buffer, n))
+        return [self._buffer.pop(key) for key in keys]
+
+    def _start(self, rows: List[Dict[str, Any]]):
+        task = asyncio.ensure_future(self._send(rows))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+        self._writer._track(task)
+
+    async def _send(self, rows: List[Dict[str, Any]]):
+        if await self._writer._upsert(rows):
+            self._written += len(rows)
+        else:
+            self._failed += len(rows)
+
+
+class FindingsWriter:
+    """
+    Buffered, batched, retried upserts into audit_agent_submissions
+
+    add() / flush() work on the writer's own FindingsBatch; concurrent
+    audits should each take one from batch(). Use as an async context
+    manager (or call aclose()) to send what is still buffered in any batch
+    and release the pooled connections. Bound to the event loop it is
+    first used on.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        batch_size: int = FINDINGS_WRITER_BATCH_SIZE,
+        concurrency: int = FINDINGS_WRITER_CONCURRENCY,
+        retries: int = FINDINGS_WRITER_RETRIES,
+        timeout: float = FINDINGS_WRITER_TIMEOUT,
+        backoff_seconds: float = FINDINGS_WRITER_BACKOFF_SECONDS,
+        client: Optional["httpx.AsyncClient"] = None
+    ):
+        base_url = base_url or rest_base_url()
+        if not base_url:
+            raise ValueError("No PostgREST URL: set SUPABASE_REST_URL or VITE_SUPABASE_URL")
+        self.url = f"{base_url.rstrip('/')}/{SUBMISSIONS_TABLE}"
+        self.batch_size = max(1, batch_size)
+        self.retries = max(0, retries)
+        self.backoff_seconds = backoff_seconds
+
+        # httpx is imported on first use so processes that never persist
+        # findings do not pay for it at startup
+        import httpx
+
+        api_key = api_key or os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get("VITE_SUPABASE_ANON_KEY")
+        headers = {
+            'Content-Type': 'application/json',
+            'Prefer': 'resolution=merge-duplicates,return=minimal',
+        }
+        if api_key:
+            headers.update({'apikey': api_key, 'Authorization': f"Bearer {api_key}"})
+        self._headers = headers
+        self._params = {'on_conflict': ','.join(CONFLICT_COLUMNS), 'columns': ','.join(SUBMISSION_COLUMNS)}
+
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Every upsert in flight and every batch not yet garbage collected, for aclose()
+        self._sending: Set[asyncio.Task] = set()
+        self._batches: "weakref.WeakSet[FindingsBatch]" = weakref.WeakSet()
+        self._default = self.batch()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        for batch in list(self._batches):
+            await batch.flush()
+        while self._sending:
+            await asyncio.gather(*self._sending)
+        if self._owns_client:
+            await self._client.aclose()
+
+    def batch(self) -> FindingsBatch:
+        """A FindingsBatch for one audit's rows on this writer"""
+        batch = FindingsBatch(self)
+        self._batches.add(batch)
+        return batch
+
+    @property
+    def buffered(self) -> int:
+        return self._default.buffered
+
+    def add(self, session_id: str, rows: Iterable[Dict[str, Any]]):
+        """Buffer rows on the writer's own batch (see FindingsBatch.add)"""
+        self._default.add(session_id, rows)
+
+    async def flush(self) -> Dict[str, int]:
+        """Send and count the writer's own batch (see FindingsBatch.flush)"""
+        return await self._default.flush()
+
+    def _track(self, task: asyncio.Task):
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _upsert(self, rows: List[Dict[str, Any]]) -> bool:
+        """Upsert rows with retries; True when written, False (logged and counted) when given up on"""
+        try:
+            body = fast_json.dumps(rows)
+        except (TypeError, ValueError) as e:
+            error = f"rows could not be encoded: {e}"
+        else:
+            error = await self._post(body)
+            if error is None:
+                FINDINGS_WRITER_REQUESTS.inc(outcome=WRITTEN)
+                FINDINGS_WRITER_ROWS.inc(len(rows), outcome=WRITTEN)
+                return True
+
+        FINDINGS_WRITER_REQUESTS.inc(outcome=FAILED)
+        FINDINGS_WRITER_ROWS.inc(len(rows), outcome=FAILED)
+        event(logger, 'findings_write_failed', "💾 Could not write {rows} findings to {table}: {error}",
+              level=logging.ERROR, rows=len(rows), table=SUBMISSIONS_TABLE, error=error)
+        return False
+
+    async def _post(self, body: bytes) -> Optional[str]:
+        """POST one upsert body, retrying; None on success, else the last error"""
+        import httpx
+
+        error = None
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                response = None
+                retry = True
+                started = time.perf_counter()
+                try:
+                    response = await self._client.post(self.url, params=self._params, headers=self._headers, content=body)
+                except httpx.TransportError as e:
+                    error = str(e) or type(e).__name__
+                except httpx.HTTPError as e:
+                    # Not a network failure (e.g. a response that cannot be decoded): do not retry
+                    error = str(e) or type(e).__name__
+                    retry = False
+                else:
+                    if response.status_code < 300:
+                        return None
+                    error = f"HTTP {response.status_code}: {response.text[:200]}"
+                    retry = response.status_code in RETRY_STATUSES
+                finally:
+                    FINDINGS_WRITER_REQUEST_SECONDS.observe(time.perf_counter() - started)
+
+                if not retry:
+                    break
+                if attempt < self.retries:
+                    FINDINGS_WRITER_REQUESTS.inc(outcome=RETRIED)
+                    delay = _retry_after(response)
+                    if delay is None:
+                        # Full jitter, so writers that failed together do not retry together
+                        delay = random.uniform(0, min(self.backoff_seconds * 2 ** attempt, MAX_BACKOFF_SECONDS))
+                    await asyncio.sleep(delay)
+        return error
+
+
+async def _main(findings: int, session_id: str, base_url: Optional[str]):
+    statuses = ('Compliant', 'Non-Compliant', 'Partially Compliant', 'Not Applicable')
+    risks = ('Critical', 'High', 'Medium', 'Low')
+    rows = [
+        {
+            'audit_item_id': f"ITEM-{i:06d}",
+            'ai_agent_name': 'Load_Test_Agent',
+            'status': statuses[i % len(statuses)],
+            'risk_level': risks[i % len(risks)],
+            'ai_score': float(i % 101),
+            'comment': 'Synthetic finding written by findings_writer.py',
+        }
+        for i in range(findings)
+    ]
+    async with FindingsWriter(base_url=base_url) as writer:
+        started = time.perf_counter()
+        writer.add(session_id, rows)
+        outcome = await writer.flush()
+        seconds = time.perf_counter() - started
+    requests = FINDINGS_WRITER_REQUESTS
+    print(f"{outcome[WRITTEN]} rows written, {outcome[FAILED]} failed in {seconds:.2f}s "
+          f"({requests.value(outcome=WRITTEN) + requests.value(outcome=FAILED):.0f} requests, "
+          f"{requests.value(outcome=RETRIED):.0f} retries) for session {session_id}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic findings to audit_agent_submissions")
+    parser.add_argument('--findings', type=int, default=5000)
+    parser.add_argument('--session-id', default=None, help='session to write to (default: a new UUID)')
+    parser.add_argument('--rest-url', default=None, help='PostgREST base URL (default: from the environment)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.findings, args.session_id or str(uuid.uuid4()), args.rest_url))
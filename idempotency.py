@@ -0,0 +1,131 @@
+"""
+Idempotency - batch_id + payload dedupe with in-flight request coalescing
+
+The frontend retries submissions, so the same batch can arrive several
+times while the first copy is still being processed. IdempotencyCache keys
+each submission on its batch_id plus a hash of the payload:
+
+- a duplicate of a submission still in flight waits for that computation
+  instead of starting another (coalesced)
+- a duplicate of a finished submission gets the stored result (replayed)
+- a changed payload under the same batch_id is a new submission
+
+Failed computations are forgotten straight away so a retry runs again.
+Entries live in a bounded LRU with a TTL; the cache belongs to one event
+loop and is not thread-safe.
+
+Configuration (environment variables):
+IDEMPOTENCY_CACHE_SIZE  - max remembered submissions per cache (default 256)
+IDEMPOTENCY_TTL_SECONDS - how long finished results are replayed (default 600)
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import time
+
+from metrics import Counter
+
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "256"))
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "600"))
+
+# Outcomes
+COMPUTED = "computed"
+COALESCED = "coalesced"
+REPLAYED = "replayed"
+
+# Payload fields that differ between retries of the same submission
+VOLATILE_FIELDS = ('submitted_at',)
+
+IDEMPOTENT_REQUESTS = Counter(
+    'idempotency_requests_total',
+    'Submissions by idempotency outcome (computed, coalesced, replayed)',
+    ['cache', 'outcome']
+)
+
+
+def payload_fingerprint(payload: Dict[str, Any]) -> str:
+    """Hash of a submission payload, ignoring VOLATILE_FIELDS and key order"""
+    material = {key: value for key, value in payload.items() if key not in VOLATILE_FIELDS}
+    encoded = json.dumps(material, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class IdempotencyCache:
+    """
+    Bounded LRU of submissions keyed on (batch_id, payload fingerprint)
+
+    Each computation runs as its own task, so a client that disconnects
+    does not cancel the work other duplicates are waiting on.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = IDEMPOTENCY_CACHE_SIZE,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> [task, finished_at (None while in flight)]
+        self._entries: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, batch_id: str, payload: Dict[str, Any]) -> Tuple[str, str]:
+        return (batch_id, payload_fingerprint(payload))
+
+    async def run(
+        self,
+        batch_id: str,
+        payload: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, str]:
+        """
+        Return (result, outcome) for a submission, computing it at most once
+
+        compute is only called when no live entry exists for the key.
+        """
+        key = self.key(batch_id, payload)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and time.monotonic() - entry[1] >= self.ttl_seconds:
+            del self._entries[key]
+            entry = None
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+            outcome = REPLAYED if entry[0].done() else COALESCED
+            IDEMPOTENT_REQUESTS.inc(cache=self.name, outcome=outcome)
+            return await asyncio.shield(entry[0]), outcome
+
+        task = asyncio.ensure_future(compute())
+        self._entries[key] = [task, None]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        task.add_done_callback(functools.partial(self._settle, key))
+
+        IDEMPOTENT_REQUESTS.inc(cache=self.name, outcome=COMPUTED)
+        return await asyncio.shield(task), COMPUTED
+
+    def discard(self, batch_id: str, payload: Dict[str, Any]):
+        """Forget a submission so the next copy is computed again"""
+        self.discard_key(self.key(batch_id, payload))
+
+    def discard_key(self, key: Tuple[str, str]):
+        """discard() by a key taken with key(), e.g. before the payload was modified in place"""
+        self._entries.pop(key, None)
+
+    def _settle(self, key: Tuple[str, str], task: "asyncio.Future"):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is not task:
+            return
+        if task.cancelled() or task.exception() is not None:
+            del self._entries[key]
+        else:
+            entry[1] = time.monotonic()
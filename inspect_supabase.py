@@ -1,69 +1,383 @@
-import os
+"""
+Supabase Inspector - concurrent schema introspection and bulk table export
+
+Talks to the Supabase REST API (PostgREST) directly with one pooled httpx
+client, so it also works against a plain PostgREST server or any
+PostgREST-compatible stand-in.
+
+inspect (default):
+    Reads every table's columns and primary key from PostgREST's OpenAPI
+    description in one request, then probes all candidate tables
+    concurrently for row counts and a sample row. The discovered schema is
+    cached in SCHEMA_CACHE_PATH; pass --refresh to rebuild it.
+
+export TABLE:
+    Streams a whole table to JSONL using keyset pagination on its primary
+    key (key > last seen, ordered by key). Integer and UUID keys are split
+    into key ranges that are paged in parallel; other keys are paged
+    sequentially. Rows come out ordered by key.
+
+Installation:
+pip install httpx python-dotenv
+
+Usage:
+python inspect_supabase.py [--refresh]
+python inspect_supabase.py export audit_agent_submissions --output submissions.jsonl [--parallel 8]
+python inspect_supabase.py --rest-url http://localhost:3000 export audits --output audits.jsonl
+
+Configuration (environment variables, .env supported):
+VITE_SUPABASE_URL      - project URL (REST API at <url>/rest/v1)
+VITE_SUPABASE_ANON_KEY - API key (optional for a local PostgREST)
+SUPABASE_REST_URL      - PostgREST base URL, overrides VITE_SUPABASE_URL
+SCHEMA_CACHE_PATH      - schema cache file (default ./.supabase_schema.json)
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+import argparse
+import asyncio
 import json
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import os
+import sys
+import time
+import uuid
+
+import httpx
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+
+SCHEMA_CACHE_PATH = Path(os.environ.get("SCHEMA_CACHE_PATH", ".supabase_schema.json"))
+
+# Tables probed even when the OpenAPI description is unavailable
+CANDIDATE_TABLES = [
+    "audit_results",
+    "audit_submissions",
+    "audit_items",
+    "checklist_responses",
+    "audits",
+    "audit_sessions",
+    "audit_agent_submissions",
+    "ai_review_reports",
+]
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PARALLEL = 4
+
+
+def rest_base_url(override: Optional[str] = None) -> str:
+    url = override or os.environ.get("SUPABASE_REST_URL")
+    if url:
+        return url.rstrip("/")
+    project = os.environ.get("VITE_SUPABASE_URL")
+    if not project:
+        print("❌ Error: Missing VITE_SUPABASE_URL (or SUPABASE_REST_URL) in .env")
+        sys.exit(1)
+    return project.rstrip("/") + "/rest/v1"
+
+
+def make_client(base_url: str, concurrency: int) -> httpx.AsyncClient:
+    key = os.environ.get("VITE_SUPABASE_ANON_KEY")
+    headers = {"Accept": "application/json"}
+    if key:
+        headers.update({"apikey": key, "Authorization": f"Bearer {key}"})
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=60,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    )
+
+
+# ============================================
+# SCHEMA INTROSPECTION
+# ============================================
+
+async def fetch_openapi_schema(client: httpx.AsyncClient) -> Dict[str, Dict]:
+    """
+    Columns and primary keys of every exposed table from PostgREST's root
+
+    Returns {} when the server does not publish an OpenAPI description.
+    """
+    try:
+        response = await client.get("/", headers={"Accept": "application/openapi+json"})
+        response.raise_for_status()
+        definitions = response.json().get("definitions") or {}
+    except (httpx.HTTPError, ValueError):
+        return {}
+
+    tables = {}
+    for table, definition in definitions.items():
+        properties = definition.get("properties") or {}
+        tables[table] = {
+            "columns": {
+                name: prop.get("format") or prop.get("type")
+                for name, prop in properties.items()
+            },
+            "primary_key": [
+                name for name, prop in properties.items()
+                if "<pk/>" in (prop.get("description") or "")
+            ],
+        }
+    return tables
+
+
+async def probe_table(client: httpx.AsyncClient, table: str) -> Optional[Dict]:
+    """Row count and a sample row for one table (None if it does not exist)"""
+    try:
+        response = await client.get(
+            f"/{table}",
+            params={"select": "*", "limit": "1"},
+            headers={"Prefer": "count=exact"}
+        )
+    except httpx.HTTPError:
+        return None
+    if response.status_code >= 400:
+        return None
+
+    total = response.headers.get("content-range", "").rpartition("/")[2]
+    rows = response.json()
+    return {
+        "rows": int(total) if total.isdigit() else None,
+        "sample": rows[0] if rows else None,
+    }
+
+
+def looks_like_audit_data(columns: List[str]) -> bool:
+    has_session = any("session" in c or "batch" in c for c in columns)
+    has_question = any("question" in c or "item" in c for c in columns)
+    has_answer = any("status" in c or "verdict" in c or "answer" in c for c in columns)
+    return has_session and has_question and has_answer
+
+
+async def discover_schema(client: httpx.AsyncClient) -> Dict[str, Dict]:
+    """Introspect all candidate tables concurrently"""
+    tables = await fetch_openapi_schema(client)
+    names = sorted(set(CANDIDATE_TABLES) | set(tables))
+    probes = await asyncio.gather(*(probe_table(client, name) for name in names))
+
+    schema = {}
+    for name, probe in zip(names, probes):
+        if probe is None:
+            continue
+        info = tables.get(name, {"columns": {}, "primary_key": []})
+        if not info["columns"] and probe["sample"]:
+            info["columns"] = {column: None for column in probe["sample"]}
+        if not info["primary_key"] and "id" in info["columns"]:
+            info["primary_key"] = ["id"]
+        schema[name] = {**info, "rows": probe["rows"]}
+    return schema
+
+
+def load_schema_cache(base_url: str) -> Optional[Dict[str, Dict]]:
+    if not SCHEMA_CACHE_PATH.exists():
+        return None
+    try:
+        cached = json.loads(SCHEMA_CACHE_PATH.read_text())
+    except ValueError:
+        return None
+    return cached["tables"] if cached.get("base_url") == base_url else None
 
-load_dotenv()
 
-# --- CONFIGURATION ---
-url = os.environ.get("VITE_SUPABASE_URL")
-key = os.environ.get("VITE_SUPABASE_ANON_KEY")
+def save_schema_cache(base_url: str, schema: Dict[str, Dict]):
+    SCHEMA_CACHE_PATH.write_text(json.dumps({
+        "base_url": base_url,
+        "discovered_at": datetime.now().isoformat(),
+        "tables": schema,
+    }, indent=2))
 
-if not url or not key:
-    print("❌ Error: Missing SUPABASE_URL or SUPABASE_KEY in .env")
-    exit(1)
 
-print(f"🔌 Connecting to Supabase: {url}")
-supabase: Client = create_client(url, key)
+async def get_schema(client: httpx.AsyncClient, base_url: str, refresh: bool = False) -> Dict[str, Dict]:
+    schema = None if refresh else load_schema_cache(base_url)
+    if schema is None:
+        schema = await discover_schema(client)
+        save_schema_cache(base_url, schema)
+    return schema
 
-# --- THE INSPECTOR ---
-def inspect_database():
+
+async def inspect_database(base_url: str, refresh: bool = False):
+    print(f"🔌 Connecting to PostgREST: {base_url}")
     print("\n🔍 INSPECTING DATABASE TABLES...")
-    
-    # List of likely table names to check
-    potential_tables = [
-        "audit_results", 
-        "audit_submissions", 
-        "audit_items", 
-        "checklist_responses", 
-        "audits"
-    ]
-    
-    found_table = False
-
-    for table in potential_tables:
-        try:
-            # Fetch 1 row to see the columns
-            response = supabase.table(table).select("*").limit(1).execute()
-            
-            print(f"\n📄 Table Found: '{table}'")
-            found_table = True
-            
-            if response.data and len(response.data) > 0:
-                # Get keys from the first row
-                columns = list(response.data[0].keys())
-                print(f"   ✅ Columns: {columns}")
-                
-                # Check for critical columns
-                has_session = any("session" in c or "batch" in c for c in columns)
-                has_question = any("question" in c or "item" in c for c in columns)
-                has_answer = any("status" in c or "verdict" in c or "answer" in c for c in columns)
-                
-                if has_session and has_question and has_answer:
-                    print("   🌟 PERFECT MATCH: This table looks like it holds audit data.")
-                else:
-                    print("   ⚠️  Warning: Might be missing key columns.")
-            else:
-                print("   ⚠️  Table exists but is empty (cannot fetch columns).")
-                
-        except Exception:
-            # Table doesn't exist, ignore
-            pass
-
-    if not found_table:
+
+    started = time.perf_counter()
+    async with make_client(base_url, concurrency=len(CANDIDATE_TABLES)) as client:
+        cached = not refresh and load_schema_cache(base_url) is not None
+        schema = await get_schema(client, base_url, refresh)
+
+    for table, info in sorted(schema.items()):
+        columns = list(info["columns"])
+        rows = info["rows"] if info["rows"] is not None else "?"
+        print(f"\n📄 Table Found: '{table}' ({rows} rows, key: {', '.join(info['primary_key']) or 'none'})")
+        if columns:
+            print(f"   ✅ Columns: {columns}")
+            if looks_like_audit_data(columns):
+                print("   🌟 PERFECT MATCH: This table looks like it holds audit data.")
+        else:
+            print("   ⚠️  Table exists but is empty (cannot fetch columns).")
+
+    if not schema:
         print("\n❌ NO AUDIT TABLES FOUND.")
         print("   We need to create a table to store the audit results.")
         print("   Please check your Supabase Dashboard -> Table Editor.")
 
+    source = f"cache {SCHEMA_CACHE_PATH}" if cached else "live"
+    print(f"\n⏱️  {len(schema)} tables in {time.perf_counter() - started:.2f}s ({source})")
+
+
+# ============================================
+# BULK EXPORT
+# ============================================
+
+def _uuid_bounds(parallel: int) -> List[Optional[str]]:
+    """Evenly spaced UUID split points (None = open end)"""
+    step = (1 << 128) // parallel
+    return [None] + [str(uuid.UUID(int=step * i)) for i in range(1, parallel)] + [None]
+
+
+def key_ranges(first, last, parallel: int) -> List[Tuple[Optional[object], Optional[object]]]:
+    """
+    Split a key space into [lower, upper) ranges that can be paged in parallel
+
+    Integer keys are split between their min and max, UUID keys across the
+    UUID space; anything else is one open range.
+    """
+    if parallel > 1 and isinstance(first, int) and isinstance(last, int) and last > first:
+        step = max(1, (last - first + 1) // parallel)
+        bounds = [None] + [first + step * i for i in range(1, parallel) if first + step * i <= last] + [None]
+    elif parallel > 1 and isinstance(first, str) and isinstance(last, str):
+        try:
+            uuid.UUID(first), uuid.UUID(last)
+        except ValueError:
+            return [(None, None)]
+        bounds = _uuid_bounds(parallel)
+    else:
+        return [(None, None)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+async def _edge_key(client: httpx.AsyncClient, table: str, key: str, direction: str):
+    response = await client.get(f"/{table}", params={"select": key, "order": f"{key}.{direction}", "limit": "1"})
+    response.raise_for_status()
+    rows = response.json()
+    return rows[0][key] if rows else None
+
+
+async def export_range(
+    client: httpx.AsyncClient,
+    table: str,
+    key: str,
+    lower,
+    upper,
+    part: Path,
+    page_size: int,
+    progress: Dict[str, int]
+) -> int:
+    """Keyset-page one key range into a part file; returns rows written"""
+    written = 0
+    last = None
+    with open(part, "w") as out:
+        while True:
+            params = [("select", "*"), ("order", f"{key}.asc"), ("limit", str(page_size))]
+            if last is not None:
+                params.append((key, f"gt.{last}"))
+            elif lower is not None:
+                params.append((key, f"gte.{lower}"))
+            if upper is not None:
+                params.append((key, f"lt.{upper}"))
+
+            response = await client.get(f"/{table}", params=params)
+            response.raise_for_status()
+            rows = response.json()
+            for row in rows:
+                out.write(json.dumps(row, separators=(",", ":")) + "\n")
+            written += len(rows)
+            progress["rows"] += len(rows)
+
+            if len(rows) < page_size:
+                return written
+            last = rows[-1][key]
+
+
+async def export_table(
+    base_url: str,
+    table: str,
+    output: Path,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    parallel: int = DEFAULT_PARALLEL,
+    key: Optional[str] = None,
+    refresh: bool = False
+):
+    print(f"🔌 Connecting to PostgREST: {base_url}")
+    started = time.perf_counter()
+
+    async with make_client(base_url, concurrency=max(parallel, 2)) as client:
+        info = (await get_schema(client, base_url, refresh)).get(table)
+        if info is None:
+            print(f"❌ Table '{table}' not found (run with --refresh if it was just created)")
+            sys.exit(1)
+
+        key = key or (info["primary_key"][0] if info["primary_key"] else None)
+        if key is None:
+            print(f"❌ Table '{table}' has no primary key; pass --key with a unique, sortable column")
+            sys.exit(1)
+
+        first, last = await asyncio.gather(
+            _edge_key(client, table, key, "asc"),
+            _edge_key(client, table, key, "desc")
+        )
+        ranges = key_ranges(first, last, parallel)
+        parts = [output.with_name(f"{output.name}.part{i}") for i in range(len(ranges))]
+        print(f"📦 Exporting '{table}' (~{info['rows'] or '?'} rows) by {key} in {len(ranges)} parallel ranges")
+
+        progress = {"rows": 0}
+        await asyncio.gather(*(
+            export_range(client, table, key, lower, upper, part, page_size, progress)
+            for (lower, upper), part in zip(ranges, parts)
+        ))
+
+    # Ranges are in key order, so concatenating keeps the export sorted
+    with open(output, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                while True:
+                    block = f.read(1 << 20)
+                    if not block:
+                        break
+                    out.write(block)
+            part.unlink()
+
+    elapsed = time.perf_counter() - started
+    rate = progress["rows"] / elapsed if elapsed else 0
+    print(f"✅ Wrote {progress['rows']} rows to {output} in {elapsed:.2f}s ({rate:.0f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect Supabase tables and export them for offline analytics")
+    parser.add_argument("--rest-url", help="PostgREST base URL (default: VITE_SUPABASE_URL/rest/v1)")
+    parser.add_argument("--refresh", action="store_true", help="ignore the cached schema")
+    commands = parser.add_subparsers(dest="command")
+
+    export = commands.add_parser("export", help="export a whole table to JSONL")
+    export.add_argument("table")
+    export.add_argument("--output", type=Path, required=True)
+    export.add_argument("--key", help="pagination column (default: primary key)")
+    export.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    export.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL)
+
+    args = parser.parse_args()
+    base_url = rest_base_url(args.rest_url)
+
+    if args.command == "export":
+        asyncio.run(export_table(
+            base_url, args.table, args.output, args.page_size, args.parallel, args.key, args.refresh
+        ))
+    else:
+        asyncio.run(inspect_database(base_url, args.refresh))
+
+
 if __name__ == "__main__":
-    inspect_database()
\ No newline at end of file
+    main()
@@ -0,0 +1,307 @@
+"""
+Batch Job Store - local persistent store for asynchronous audit batches
+
+A small SQLite-backed table of batch jobs used by python_ai_agent_example.py.
+Each submission becomes a job row (queued -> processing -> completed/failed)
+indexed by job_id, batch_id and session_id, so status polling is a single
+indexed lookup and queued work survives a restart.
+
+With several worker processes (serve.py --workers N) every job carries a
+shard, shard_for(session_id, N), and only the worker owning that shard
+runs it: all batches of a session are processed by the same process, and
+claim() makes sure a job is never started twice.
+
+Jobs also record their item count, the submitting client and a queue
+priority (see admission.py). create_job() can enforce item budgets on the
+backlog of queued and processing jobs; the check and the insert run in
+one write transaction, so concurrent submissions to different worker
+processes cannot overshoot a budget together.
+
+Configuration (environment variables):
+JOB_STORE_PATH - SQLite file for the job store (default ./audit_jobs.db)
+"""
+
+from typing import List, Dict, Optional, Any, Tuple
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+import uuid
+import zlib
+
+JOB_STORE_PATH = os.environ.get("JOB_STORE_PATH", "audit_jobs.db")
+
+# Job lifecycle
+STATUS_QUEUED = "queued"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch_jobs (
+    job_id      TEXT PRIMARY KEY,
+    batch_id    TEXT NOT NULL,
+    session_id  TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL,
+    shard       INTEGER NOT NULL DEFAULT 0,
+    item_count  INTEGER NOT NULL DEFAULT 0,
+    client_id   TEXT NOT NULL DEFAULT '',
+    priority    INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Columns added after the first release, for stores created before them
+_ADDED_COLUMNS = {
+    'shard': "INTEGER NOT NULL DEFAULT 0",
+    'item_count': "INTEGER NOT NULL DEFAULT 0",
+    'client_id': "TEXT NOT NULL DEFAULT ''",
+    'priority': "INTEGER NOT NULL DEFAULT 0",
+}
+
+# Created after the column migrations below
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_batch_jobs_batch_id ON batch_jobs (batch_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_batch_jobs_session_id ON batch_jobs (session_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_batch_jobs_status ON batch_jobs (status);
+CREATE INDEX IF NOT EXISTS idx_batch_jobs_shard ON batch_jobs (shard, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_batch_jobs_client ON batch_jobs (client_id, status);
+"""
+
+# Columns returned by status lookups (payload is left out on purpose)
+_STATUS_COLUMNS = "job_id, batch_id, session_id, status, result, error, created_at, updated_at"
+
+
+def shard_for(session_id: str, shards: int) -> int:
+    """Stable shard of a session (the same in every process, unlike hash())"""
+    if shards <= 1:
+        return 0
+    return zlib.crc32(session_id.encode('utf-8')) % shards
+
+
+class BacklogFullError(Exception):
+    """A new job would push the backlog of queued and processing items over a budget"""
+
+    def __init__(self, scope: str, pending_items: int, limit: int):
+        super().__init__(f"{pending_items} items already queued or processing "
+                         f"({'for this client, ' if scope == 'client' else ''}budget {limit})")
+        self.scope = scope
+        self.pending_items = pending_items
+        self.limit = limit
+
+
+class JobStore:
+    """
+    Thread-safe SQLite job store
+
+    One connection is shared by worker threads behind a lock; WAL mode
+    keeps status reads cheap while a job is being written. Async callers
+    go through asyncio.to_thread: with several worker processes on one
+    file, a write may wait up to 30 s for another process's lock.
+    A forked child reconnects, since SQLite connections must not cross a
+    fork.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._connect()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(batch_jobs)")}
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE batch_jobs ADD COLUMN {column} {definition}")
+            self._conn.executescript(_INDEXES)
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # === Writes ===
+
+    def create_job(
+        self,
+        batch: Dict[str, Any],
+        shard: int = 0,
+        client_id: str = '',
+        priority: int = 0,
+        max_pending_items: Optional[int] = None,
+        max_client_items: Optional[int] = None
+    ) -> str:
+        """
+        Store a new queued job for a batch payload and return its job_id
+
+        With max_pending_items / max_client_items, raises BacklogFullError
+        instead when the items already queued or processing (overall, or
+        for client_id) plus this batch would exceed the budget. A batch
+        larger than a budget is accepted once nothing else is pending.
+        """
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        item_count = len(batch.get('audit_items') or [])
+        payload = json.dumps(batch)
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so the budget check holds until the insert
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if max_pending_items is not None:
+                    self._check_budget('global', self._pending_items(), item_count, max_pending_items)
+                if max_client_items is not None:
+                    self._check_budget('client', self._pending_items(client_id), item_count, max_client_items)
+                self._conn.execute(
+                    "INSERT INTO batch_jobs (job_id, batch_id, session_id, status, payload, created_at, updated_at, "
+                    "shard, item_count, client_id, priority) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, batch['batch_id'], batch['session_id'], STATUS_QUEUED,
+                     payload, now, now, shard, item_count, client_id, priority)
+                )
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        return job_id
+
+    @staticmethod
+    def _check_budget(scope: str, pending: int, items: int, limit: int):
+        if pending + min(items, limit) > limit:
+            raise BacklogFullError(scope, pending, limit)
+
+    def mark_processing(self, job_id: str):
+        self._set_status(job_id, STATUS_PROCESSING)
+
+    def claim(self, job_id: str) -> bool:
+        """Move a queued job to processing; False if it was not queued (another worker got it)"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE batch_jobs SET status = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (STATUS_PROCESSING, datetime.now().isoformat(), job_id, STATUS_QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, result: Dict[str, Any]):
+        self._set_status(job_id, STATUS_COMPLETED, result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str):
+        self._set_status(job_id, STATUS_FAILED, error=error)
+
+    def requeue_unfinished(self, shard: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Reset jobs interrupted by a shutdown back to queued
+
+        Returns every queued (job_id, priority), like queued_jobs(), so
+        workers can pick them up again after a restart. With a shard, only that shard's jobs are
+        touched (the other workers own the rest).
+        """
+        where, params = ("status = ?", (STATUS_PROCESSING,)) if shard is None else \
+            ("status = ? AND shard = ?", (STATUS_PROCESSING, shard))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE batch_jobs SET status = ?, updated_at = ? WHERE {where}",
+                (STATUS_QUEUED, datetime.now().isoformat(), *params)
+            )
+        return self.queued_jobs(shard)
+
+    def _set_status(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE batch_jobs SET status = ?, result = COALESCE(?, result), error = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                (status, result, error, datetime.now().isoformat(), job_id)
+            )
+
+    # === Reads ===
+
+    def queued_jobs(self, shard: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(job_id, priority) of queued jobs, oldest first, optionally for one shard"""
+        with self._lock:
+            if shard is None:
+                rows = self._conn.execute(
+                    "SELECT job_id, priority FROM batch_jobs WHERE status = ? ORDER BY created_at", (STATUS_QUEUED,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT job_id, priority FROM batch_jobs WHERE shard = ? AND status = ? ORDER BY created_at",
+                    (shard, STATUS_QUEUED)
+                ).fetchall()
+        return [(row['job_id'], row['priority']) for row in rows]
+
+    def pending_items(self, client_id: Optional[str] = None) -> int:
+        """Items in queued and processing jobs, overall or for one client"""
+        with self._lock:
+            return self._pending_items(client_id)
+
+    def _pending_items(self, client_id: Optional[str] = None) -> int:
+        if client_id is None:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(item_count), 0) FROM batch_jobs WHERE status IN (?, ?)",
+                (STATUS_QUEUED, STATUS_PROCESSING)
+            ).fetchone()
+        else:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(item_count), 0) FROM batch_jobs WHERE client_id = ? AND status IN (?, ?)",
+                (client_id, STATUS_QUEUED, STATUS_PROCESSING)
+            ).fetchone()
+        return row[0]
+
+    def completed_items_since(self, since: datetime) -> int:
+        """Items in jobs that completed at or after `since` (for throughput estimates)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(item_count), 0) FROM batch_jobs WHERE status = ? AND updated_at >= ?",
+                (STATUS_COMPLETED, since.isoformat())
+            ).fetchone()
+        return row[0]
+
+    def get_payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM batch_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row['payload']) if row else None
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_STATUS_COLUMNS} FROM batch_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return _row_to_job(row)
+
+    def get_latest_for_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent job submitted for a batch_id"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_STATUS_COLUMNS} FROM batch_jobs WHERE batch_id = ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (batch_id,)
+            ).fetchone()
+        return _row_to_job(row)
+
+    def list_for_session(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Jobs for a session, newest first, without their results"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, batch_id, session_id, status, error, created_at, updated_at "
+                "FROM batch_jobs WHERE session_id = ? ORDER BY created_at DESC LIMIT ?",
+                (session_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _row_to_job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    job = dict(row)
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
@@ -0,0 +1,253 @@
+"""
+Metrics - in-process Prometheus counters, gauges and histograms
+
+A small metrics registry for the FastAPI services, rendered in the
+Prometheus text exposition format on each app's /metrics endpoint. It
+covers the handful of metric types the services need without adding
+prometheus_client as a dependency.
+
+Labels are passed as keyword arguments on every update:
+
+    STAGE_SECONDS = Histogram('master_audit_stage_seconds', 'Time per stage', ['stage'])
+    with STAGE_SECONDS.time(stage='partitioning'):
+        ...
+    ITEMS_ROUTED.inc(len(items), partition='wages')
+
+All metrics are thread-safe, so worker threads (asyncio.to_thread, the
+agent thread pool) can update them directly. Values are per process; with
+several uvicorn workers, scrape each worker or aggregate in Prometheus.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+from fastapi.responses import Response
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; suits everything from sub-millisecond stages to slow agents
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Items per batch
+BATCH_SIZE_BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+# Batch size classes used as a label on per-request histograms
+_SIZE_CLASSES = ((100, "1-100"), (1000, "101-1000"), (10000, "1001-10000"))
+
+
+def batch_size_label(n_items: int) -> str:
+    """Low-cardinality label for a batch size"""
+    for upper, label in _SIZE_CLASSES:
+        if n_items <= upper:
+            return label
+    return "10001+"
+
+
+class Registry:
+    """Collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames and self.kind != "histogram":
+            # Unlabelled counters and gauges are exported as 0 before first use
+            self._values[()] = 0
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}") from e
+
+    def _pairs(self, key: Tuple[str, ...]) -> List[Tuple[str, str]]:
+        return list(zip(self.labelnames, key))
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self._pairs(key))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Increment for the duration of the block"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY
+    ):
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [bucket counts..., sum, count]
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-1] if state else 0
+
+    def sum(self, **labels) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-2] if state else 0.0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            pairs = self._pairs(key)
+            cumulative = 0
+            for upper, hits in zip(self.buckets, state):
+                cumulative += hits
+                labels = _format_labels(pairs + [("le", _format_value(upper))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {state[-1]}")
+        return lines
+
+
+def metrics_response(registry: Registry = REGISTRY) -> Response:
+    """Prometheus scrape response for a /metrics endpoint"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -3,22 +3,134 @@ Python AI Agent - Example Implementation
 FastAPI endpoint for receiving audit batch submissions
 
 Install dependencies:
-pip install fastapi uvicorn pydantic
+pip install fastapi uvicorn pydantic numpy
+
+Batches are processed asynchronously: /submit-audit-batch queues a job in
+the local job store (see job_store.py) and returns 202; a pool of
+BATCH_WORKERS workers processes jobs, and /batch-status/{batch_id} reports
+progress and the final result. Resubmitting a batch that is already
+queued, running or done (same batch_id and items) returns the existing
+job instead of queueing it again (see idempotency.py).
+
+Each accepted batch is stored with a version number (see batch_versions.py).
+/submit-audit-batch/delta takes that version plus only the added, changed
+and removed items, rebuilds the full batch server-side and queues it.
+
+Run locally with `python python_ai_agent_example.py`; in production use
+`python serve.py batch --workers N --prefork` (see serve.py).
+
+Under `serve.py --prefork` each worker process owns one shard of the job
+store (WORKER_INDEX of WORKER_COUNT, shard = crc32(session_id) % count):
+a batch submitted to any worker is stored with its session's shard and
+run by the owning worker, which polls for such jobs every
+JOB_POLL_SECONDS (default 0.5). A process started without WORKER_COUNT
+owns every job and requeues all unfinished ones on startup, so never run
+several of them on one job store (serve.py refuses --workers > 1 without
+--prefork for this app).
+
+Admission control (see admission.py): /submit-audit-batch and its delta
+variant refuse a batch with 429 and a Retry-After header when the items
+already queued or processing would exceed ADMISSION_MAX_ITEMS +
+ADMISSION_QUEUE_ITEMS overall, or ADMISSION_CLIENT_MAX_ITEMS for the
+submitting client (X-Client-Id, or its address). The backlog is counted in
+the job store, so the budgets hold across every worker process. Queued
+jobs are run by priority: Critical-heavy batches first, then smaller ones.
+
+Logs are structured events tagged with batch_id, session_id and job_id,
+written by a background thread (see audit_logging.py; AUDIT_LOG_FORMAT=text
+for plain lines when running locally).
+
+GET /metrics serves Prometheus metrics (see metrics.py): per-stage timings
+(audit_batch_stage_seconds), analysis time by batch size, job outcomes,
+queue depth and in-flight gauges.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
-from datetime import datetime
+from typing import List, Dict, Optional, Literal, Any
+from datetime import datetime, timedelta
+import asyncio
+import itertools
 import logging
+import os
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from act_catalogue import get_catalogue
+from audit_logging import configure_logging, event, log_context
+from admission import (
+    ADMISSION_CLIENT_MAX_ITEMS, ADMISSION_MAX_ITEMS, ADMISSION_QUEUE_ITEMS, CLIENT_BUDGET, SATURATED,
+    THROUGHPUT_WINDOW_SECONDS, AdmissionRejected, batch_priority, client_id, retry_after_seconds, too_busy
+)
+from batch_versions import BatchVersionStore, StaleBaseError
+from idempotency import IdempotencyCache, COMPUTED
+from metrics import Counter, Gauge, Histogram, BATCH_SIZE_BUCKETS, batch_size_label, metrics_response
+from risk_scoring import score_batch
+from job_store import JobStore, BacklogFullError, shard_for, STATUS_QUEUED, STATUS_PROCESSING, STATUS_COMPLETED, STATUS_FAILED
+
+# Logging is configured at startup (queued, structured; see audit_logging.py)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Audit AI Agent", version="1.0.0")
 
+# Number of concurrent batch workers
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "4"))
+# How often a sharded worker process looks for jobs submitted through its siblings
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "0.5"))
+
+job_store = JobStore()
+batch_versions = BatchVersionStore()
+submissions = IdempotencyCache('audit_batch')
+# (priority, arrival, job_id): Critical-heavy and small batches first (see admission.batch_priority)
+job_queue: Optional[asyncio.PriorityQueue] = None
+job_order = itertools.count()
+worker_tasks: List[asyncio.Task] = []
+# Job shard owned by this process and the number of shards (set at startup)
+worker_shard = 0
+worker_shards = 1
+# Job ids sitting in job_queue, so polling does not queue them twice
+local_jobs = set()
+
+# Metrics (served on /metrics)
+STAGE_SECONDS = Histogram(
+    'audit_batch_stage_seconds',
+    'Time spent in each batch processing stage',
+    ['stage']
+)
+ANALYSIS_SECONDS = Histogram(
+    'audit_batch_analysis_seconds',
+    'Batch analysis duration by batch size',
+    ['batch_size']
+)
+BATCH_ITEMS = Histogram(
+    'audit_batch_items',
+    'Items per submitted batch',
+    buckets=BATCH_SIZE_BUCKETS
+)
+JOBS_FINISHED = Counter(
+    'audit_batch_jobs_total',
+    'Batch jobs finished, by final status',
+    ['status']
+)
+QUEUE_DEPTH = Gauge(
+    'audit_batch_queue_depth',
+    'Batch jobs waiting for a worker'
+)
+JOBS_IN_PROGRESS = Gauge(
+    'audit_batch_jobs_in_progress',
+    'Batch jobs being analyzed by a worker'
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'audit_batch_requests_in_flight',
+    'Batch service requests being processed',
+    ['endpoint']
+)
+BATCHES_REJECTED = Counter(
+    'audit_batch_rejected_total',
+    'Batches refused with 429 because the backlog was over budget (global or client)',
+    ['scope']
+)
+
 # Enable CORS for frontend communication
 app.add_middleware(
     CORSMiddleware,
@@ -31,11 +143,13 @@ app.add_middleware(
 # Pydantic models for request validation
 class AuditItem(BaseModel):
     audit_item_id: str
-    question_text: str
-    legal_text: str
-    risk_level: str
-    category: str
-    workflow_type: Literal["manual_observation", "ai_evidence"]
+    
+    # Catalogue fields - filled in server-side from the act catalogue when omitted
+    question_text: Optional[str] = None
+    legal_text: Optional[str] = None
+    risk_level: Optional[str] = None
+    category: Optional[str] = None
+    workflow_type: Optional[Literal["manual_observation", "ai_evidence"]] = None
     
     # Manual observation fields
     intern_verdict: Optional[str] = None
@@ -60,10 +174,23 @@ class AuditBatchRequest(BaseModel):
     audit_items: List[AuditItem]
 
 
+class AuditBatchDelta(BaseModel):
+    """Edit to a previously submitted batch (see batch_versions.py)"""
+    batch_id: str
+    base_version: int
+    session_id: Optional[str] = None
+    company_name: Optional[str] = None
+    location: Optional[str] = None
+    submitted_at: Optional[str] = None
+    changed_items: List[AuditItem] = []
+    removed_item_ids: List[str] = []
+
+
 class AuditBatchResponse(BaseModel):
     status: str
     batch_id: str
-    overall_compliance_score: float
+    # None when every item is Not Applicable (see risk_scoring.py)
+    overall_compliance_score: Optional[float]
     critical_findings: int
     high_risk_findings: int
     recommendations: List[str]
@@ -72,6 +199,14 @@ class AuditBatchResponse(BaseModel):
     processing_timestamp: str
 
 
+class BatchJobAccepted(BaseModel):
+    status: str
+    job_id: str
+    batch_id: str
+    batch_version: int
+    status_url: str
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -83,130 +218,375 @@ async def root():
     }
 
 
-@app.post("/submit-audit-batch", response_model=AuditBatchResponse)
-async def submit_audit_batch(request: AuditBatchRequest):
+def analyze_audit_batch(batch: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Process audit batch submission and generate AI analysis
+    Generate AI analysis for one audit batch
     
     This is a DEMO implementation. Replace with your actual AI logic.
+    Runs on a worker thread, so it may block (LLM calls, document parsing).
+    
+    Args:
+        batch: AuditBatchRequest as a plain dict
+    
+    Returns:
+        AuditBatchResponse as a plain dict
     """
-    try:
-        logger.info(f"Received batch submission: {request.batch_id}")
-        logger.info(f"Company: {request.company_name}")
-        logger.info(f"Items to process: {len(request.audit_items)}")
-        
-        # === YOUR AI PROCESSING LOGIC HERE ===
-        # 1. Analyze evidence URLs (if ai_evidence workflow)
-        # 2. Cross-check verdicts with legal requirements
-        # 3. Generate compliance scores
-        # 4. Identify critical gaps
-        # 5. Create recommendations
-        
-        # Example: Simple analysis
-        total_items = len(request.audit_items)
-        compliant_items = sum(
-            1 for item in request.audit_items 
-            if item.intern_verdict == "Compliant"
-        )
-        non_compliant_items = sum(
-            1 for item in request.audit_items 
-            if item.intern_verdict == "Non-Compliant"
+    started = time.perf_counter()
+    with STAGE_SECONDS.time(stage='hydration'):
+        audit_items = get_catalogue().hydrate(batch['audit_items'])
+    
+    event(logger, 'batch_processing', "Processing batch {batch_id}: {items} items for {company}",
+          batch_id=batch['batch_id'], items=len(audit_items), company=batch['company_name'])
+    
+    # === YOUR AI PROCESSING LOGIC HERE ===
+    # 1. Analyze evidence URLs (if ai_evidence workflow)
+    # 2. Cross-check verdicts with legal requirements
+    # 3. Generate compliance scores
+    # 4. Identify critical gaps
+    # 5. Create recommendations
+    
+    # Example: weighted riskWeights.json model, one vectorized pass
+    with STAGE_SECONDS.time(stage='scoring'):
+        scores = score_batch(audit_items)
+    total_items = scores['total_items']
+    compliant_items = scores['compliant_items']
+    non_compliant_items = scores['non_compliant_items']
+    critical_findings = scores['critical_findings']
+    high_risk_findings = scores['high_risk_findings']
+    overall_score = scores['overall_compliance_score']
+    
+    # Generate recommendations
+    recommendations = []
+    if critical_findings > 0:
+        recommendations.append(
+            f"⚠️ URGENT: {critical_findings} critical compliance issues require immediate attention"
         )
-        
-        # Count risk levels
-        critical_findings = sum(
-            1 for item in request.audit_items 
-            if item.risk_level == "Critical" and item.intern_verdict == "Non-Compliant"
+    if high_risk_findings > 0:
+        recommendations.append(
+            f"Address {high_risk_findings} high-risk findings within 30 days"
         )
-        high_risk_findings = sum(
-            1 for item in request.audit_items 
-            if item.risk_level == "High" and item.intern_verdict == "Non-Compliant"
+    if overall_score is not None and overall_score < 70:
+        recommendations.append(
+            "Overall compliance is below acceptable threshold. Schedule comprehensive review."
         )
-        
-        # Calculate compliance score
-        overall_score = (compliant_items / total_items * 100) if total_items > 0 else 0
-        
-        # Generate recommendations
-        recommendations = []
-        if critical_findings > 0:
-            recommendations.append(
-                f"⚠️ URGENT: {critical_findings} critical compliance issues require immediate attention"
-            )
-        if high_risk_findings > 0:
-            recommendations.append(
-                f"Address {high_risk_findings} high-risk findings within 30 days"
-            )
-        if overall_score < 70:
-            recommendations.append(
-                "Overall compliance is below acceptable threshold. Schedule comprehensive review."
-            )
-        if non_compliant_items > 0:
-            recommendations.append(
-                f"Develop action plan for {non_compliant_items} non-compliant items"
-            )
-        
-        # Generate summary
-        summary = f"""
-        Audit Analysis for {request.company_name} ({request.location})
-        
-        Total Items Assessed: {total_items}
-        Compliant: {compliant_items} ({compliant_items/total_items*100:.1f}%)
-        Non-Compliant: {non_compliant_items}
-        
-        Overall Compliance Score: {overall_score:.2f}%
-        
-        Critical Issues: {critical_findings}
-        High-Risk Issues: {high_risk_findings}
-        """.strip()
-        
-        logger.info(f"Batch {request.batch_id} processed successfully")
-        logger.info(f"Overall compliance score: {overall_score:.2f}%")
-        
-        # Return AI analysis response
-        return AuditBatchResponse(
-            status="success",
-            batch_id=request.batch_id,
-            overall_compliance_score=round(overall_score, 2),
-            critical_findings=critical_findings,
-            high_risk_findings=high_risk_findings,
-            recommendations=recommendations,
-            summary=summary,
-            processed_items=total_items,
-            processing_timestamp=datetime.now().isoformat()
+    if non_compliant_items > 0:
+        recommendations.append(
+            f"Develop action plan for {non_compliant_items} non-compliant items"
         )
+    
+    # Generate summary
+    score_text = f"{overall_score:.2f}%" if overall_score is not None else "n/a (no applicable items)"
+    compliant_pct = compliant_items / total_items * 100 if total_items > 0 else 0
+    summary = f"""
+    Audit Analysis for {batch['company_name']} ({batch['location']})
+    
+    Total Items Assessed: {total_items}
+    Compliant: {compliant_items} ({compliant_pct:.1f}%)
+    Non-Compliant: {non_compliant_items}
+    
+    Overall Compliance Score: {score_text}
+    
+    Critical Issues: {critical_findings}
+    High-Risk Issues: {high_risk_findings}
+    """.strip()
+    
+    event(logger, 'batch_processed', "Batch {batch_id} processed: overall compliance score {score}",
+          batch_id=batch['batch_id'], score=score_text)
+    
+    ANALYSIS_SECONDS.observe(time.perf_counter() - started, batch_size=batch_size_label(total_items))
+    
+    return AuditBatchResponse(
+        status="success",
+        batch_id=batch['batch_id'],
+        overall_compliance_score=overall_score,
+        critical_findings=critical_findings,
+        high_risk_findings=high_risk_findings,
+        recommendations=recommendations,
+        summary=summary,
+        processed_items=total_items,
+        processing_timestamp=datetime.now().isoformat()
+    ).dict()
+
+
+# ============================================
+# BATCH WORKER POOL
+# ============================================
+
+def enqueue_local(job_id: str, priority: int = 0):
+    if job_id not in local_jobs:
+        local_jobs.add(job_id)
+        job_queue.put_nowait((priority, next(job_order), job_id))
+
+
+async def batch_worker(worker_id: int):
+    """Pull queued jobs and run the analysis off the event loop"""
+    while True:
+        _, _, job_id = await job_queue.get()
+        local_jobs.discard(job_id)
+        QUEUE_DEPTH.set(job_queue.qsize())
+        submission = None
+        try:
+            if not await asyncio.to_thread(job_store.claim, job_id):
+                # Already taken by another worker process (or no longer queued)
+                continue
+            with STAGE_SECONDS.time(stage='load_payload'):
+                batch = await asyncio.to_thread(job_store.get_payload, job_id)
+            if batch is None:
+                logger.warning(f"Worker {worker_id}: job {job_id} vanished from the store")
+                continue
+            # Taken before analyze_audit_batch hydrates the items in place,
+            # while the payload still matches what was submitted
+            submission = submissions.key(batch['batch_id'], batch)
+            
+            with JOBS_IN_PROGRESS.track_inprogress(), \
+                    log_context(batch_id=batch['batch_id'], session_id=batch['session_id'], job_id=job_id):
+                result = await asyncio.to_thread(analyze_audit_batch, batch)
+            with STAGE_SECONDS.time(stage='store_result'):
+                await asyncio.to_thread(job_store.complete, job_id, result)
+            JOBS_FINISHED.inc(status=STATUS_COMPLETED)
+        except Exception as e:
+            logger.error(f"Worker {worker_id}: job {job_id} failed: {str(e)}")
+            await asyncio.to_thread(job_store.fail, job_id, str(e))
+            JOBS_FINISHED.inc(status=STATUS_FAILED)
+            if submission is not None:
+                # Let a retry of this batch queue a fresh job
+                submissions.discard_key(submission)
+        finally:
+            job_queue.task_done()
+
+
+async def poll_shard_jobs():
+    """Queue this shard's jobs that were submitted through other worker processes"""
+    while True:
+        await asyncio.sleep(JOB_POLL_SECONDS)
+        try:
+            jobs = await asyncio.to_thread(job_store.queued_jobs, worker_shard)
+        except Exception as e:
+            logger.error(f"Polling shard {worker_shard} failed: {str(e)}")
+            continue
+        for job_id, priority in jobs:
+            enqueue_local(job_id, priority)
+        QUEUE_DEPTH.set(job_queue.qsize())
+
+
+@app.on_event("startup")
+async def start_batch_workers():
+    """Set up logging, load the catalogue, resume unfinished jobs and start the worker pool"""
+    global job_queue, worker_shard, worker_shards
+    configure_logging()
+    job_queue = asyncio.PriorityQueue()
+    local_jobs.clear()
+    # Set per process by serve.py --prefork; a single process owns every job
+    worker_shards = max(1, int(os.environ.get("WORKER_COUNT", "1")))
+    worker_shard = int(os.environ.get("WORKER_INDEX", "0")) % worker_shards
+    
+    # Load the act catalogue before the first batch arrives
+    get_catalogue()
+    
+    shard = worker_shard if worker_shards > 1 else None
+    for job_id, priority in await asyncio.to_thread(job_store.requeue_unfinished, shard):
+        enqueue_local(job_id, priority)
+    if job_queue.qsize():
+        logger.info(f"Resumed {job_queue.qsize()} unfinished batch jobs")
+    QUEUE_DEPTH.set(job_queue.qsize())
+    
+    for worker_id in range(BATCH_WORKERS):
+        worker_tasks.append(asyncio.create_task(batch_worker(worker_id)))
+    if worker_shards > 1:
+        worker_tasks.append(asyncio.create_task(poll_shard_jobs()))
+        logger.info(f"Started {BATCH_WORKERS} batch workers for job shard {worker_shard + 1}/{worker_shards}")
+    else:
+        logger.info(f"Started {BATCH_WORKERS} batch workers")
+
+
+@app.on_event("shutdown")
+async def stop_batch_workers():
+    """Stop workers; jobs still processing are requeued on next startup"""
+    for task in worker_tasks:
+        task.cancel()
+    await asyncio.gather(*worker_tasks, return_exceptions=True)
+    worker_tasks.clear()
+
+
+@app.post("/submit-audit-batch", response_model=BatchJobAccepted, status_code=202)
+async def submit_audit_batch(request: AuditBatchRequest, response: Response, http_request: Request):
+    """
+    Queue an audit batch for AI analysis
+    
+    Returns 202 straight away with a job id; poll /batch-status/{batch_id}
+    for progress and the final AuditBatchResponse. A duplicate of a batch
+    already queued, running or completed gets the existing job id back
+    with Idempotent-Replayed: true; a batch whose job failed is queued again.
+    429 with Retry-After when the backlog is over its item budget.
+    """
+    # Body validation happens in FastAPI before this handler runs
+    try:
+        with REQUESTS_IN_FLIGHT.track_inprogress(endpoint='/submit-audit-batch'):
+            BATCH_ITEMS.observe(len(request.audit_items))
+            with STAGE_SECONDS.time(stage='serialization'):
+                payload = request.dict(exclude_none=True)
+            version = await asyncio.to_thread(batch_versions.put, payload)
+            return await queue_batch(payload, version, response, client_id(http_request))
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error processing batch {request.batch_id}: {str(e)}")
+        logger.error(f"Error queueing batch {request.batch_id}: {str(e)}")
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to process audit batch: {str(e)}"
+            detail=f"Failed to queue audit batch: {str(e)}"
         )
 
 
+@app.post("/submit-audit-batch/delta", response_model=BatchJobAccepted, status_code=202)
+async def submit_audit_batch_delta(request: AuditBatchDelta, response: Response, http_request: Request):
+    """
+    Queue a batch rebuilt from an edit to its last submitted version
+    
+    base_version is the batch_version returned for the previous submission;
+    only added/changed items and removed item ids are sent. Returns 409
+    with the current version when base_version is stale, and 404 when the
+    batch was never submitted in full, and 429 like /submit-audit-batch.
+    """
+    with REQUESTS_IN_FLIGHT.track_inprogress(endpoint='/submit-audit-batch/delta'):
+        try:
+            with STAGE_SECONDS.time(stage='delta'):
+                payload, version, changed_ids = await asyncio.to_thread(
+                    batch_versions.apply_delta, request.dict(exclude_none=True)
+                )
+        except StaleBaseError as e:
+            logger.warning(str(e))
+            raise HTTPException(
+                status_code=404 if e.current_version is None else 409,
+                detail={"error": str(e), "current_version": e.current_version}
+            )
+        
+        logger.info(
+            f"Batch {request.batch_id}: delta v{request.base_version} -> v{version} "
+            f"({len(changed_ids)} changed, {len(request.removed_item_ids)} removed)"
+        )
+        BATCH_ITEMS.observe(len(payload['audit_items']))
+        try:
+            return await queue_batch(payload, version, response, client_id(http_request))
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error queueing batch {request.batch_id}: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to queue audit batch: {str(e)}"
+            )
+
+
+async def queue_batch(payload: Dict[str, Any], version: int, response: Response, client: str) -> BatchJobAccepted:
+    """Queue a full batch payload as a job, or return the job of an identical one"""
+    batch_id = payload['batch_id']
+    
+    async def enqueue():
+        shard = shard_for(payload['session_id'], worker_shards)
+        priority = batch_priority(payload['audit_items'], get_catalogue())
+        with STAGE_SECONDS.time(stage='enqueue'):
+            job_id = await asyncio.to_thread(
+                job_store.create_job, payload, shard, client, priority,
+                max_pending_items=ADMISSION_MAX_ITEMS + ADMISSION_QUEUE_ITEMS if ADMISSION_MAX_ITEMS > 0 else None,
+                max_client_items=ADMISSION_CLIENT_MAX_ITEMS if ADMISSION_MAX_ITEMS > 0 else None
+            )
+            if shard == worker_shard:
+                enqueue_local(job_id, priority)
+        QUEUE_DEPTH.set(job_queue.qsize())
+        owner = '' if shard == worker_shard else f", runs on job shard {shard + 1}/{worker_shards}"
+        logger.info(f"Queued batch {batch_id} as job {job_id} ({len(payload['audit_items'])} items{owner})")
+        return job_id
+    
+    try:
+        job_id, outcome = await submissions.run(batch_id, payload, enqueue)
+        job = await asyncio.to_thread(job_store.get_job, job_id) if outcome != COMPUTED else None
+        if job and job['status'] == STATUS_FAILED:
+            # The job failed in another worker process, which cannot clear this process's entry
+            submissions.discard(batch_id, payload)
+            job_id, outcome = await submissions.run(batch_id, payload, enqueue)
+            job = await asyncio.to_thread(job_store.get_job, job_id) if outcome != COMPUTED else None
+    except BacklogFullError as e:
+        raise await backlog_full(batch_id, e)
+    response.headers['Idempotent-Replayed'] = 'false' if outcome == COMPUTED else 'true'
+    if outcome != COMPUTED:
+        logger.info(f"Batch {batch_id} already submitted as job {job_id} ({outcome})")
+    
+    return BatchJobAccepted(
+        status=job['status'] if job else STATUS_QUEUED,
+        job_id=job_id,
+        batch_id=batch_id,
+        batch_version=version,
+        status_url=f"/batch-status/{batch_id}"
+    )
+
+
+async def backlog_full(batch_id: str, error: BacklogFullError) -> HTTPException:
+    """429 for a batch refused by the job store, with a Retry-After from recent throughput"""
+    since = datetime.now() - timedelta(seconds=THROUGHPUT_WINDOW_SECONDS)
+    completed = await asyncio.to_thread(job_store.completed_items_since, since)
+    retry_after = retry_after_seconds(error.pending_items, completed / THROUGHPUT_WINDOW_SECONDS)
+    BATCHES_REJECTED.inc(scope=error.scope)
+    logger.warning(f"Rejected batch {batch_id}: {str(error)}, retry after {retry_after}s")
+    reason = CLIENT_BUDGET if error.scope == 'client' else SATURATED
+    return too_busy(AdmissionRejected(reason, retry_after, f"Server is busy: {str(error)}"))
+
+
 @app.get("/batch-status/{batch_id}")
 async def get_batch_status(batch_id: str):
     """
     Get processing status of a submitted batch
-    (Optional - for async processing)
+    
+    Reports the most recent job for the batch; the analysis result is
+    included once the job has completed.
     """
-    # TODO: Implement if you need async processing
+    job = await asyncio.to_thread(job_store.get_latest_for_batch, batch_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch: {batch_id}")
+    
+    messages = {
+        STATUS_QUEUED: "Batch is waiting for a worker",
+        STATUS_PROCESSING: "Batch is being analyzed",
+        STATUS_COMPLETED: "Batch processing complete",
+        STATUS_FAILED: f"Batch processing failed: {job['error']}",
+    }
     return {
         "batch_id": batch_id,
-        "status": "completed",  # or "processing", "failed"
-        "message": "Batch processing complete"
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "message": messages.get(job['status'], job['status']),
+        "submitted_at": job['created_at'],
+        "updated_at": job['updated_at'],
+        "result": job['result']
     }
 
 
+@app.get("/sessions/{session_id}/batches")
+async def list_session_batches(session_id: str):
+    """List batch jobs submitted for an audit session, newest first"""
+    return {
+        "session_id": session_id,
+        "jobs": await asyncio.to_thread(job_store.list_for_session, session_id)
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics for this process"""
+    return metrics_response()
+
+
 if __name__ == "__main__":
     import uvicorn
+    configure_logging()
     
     logger.info("Starting Audit AI Agent on http://127.0.0.1:8000")
     logger.info("API documentation available at http://127.0.0.1:8000/docs")
+    logger.info("For production use `python serve.py batch --workers N --prefork`")
     
     uvicorn.run(
         app,
         host="127.0.0.1",
         port=8000,
-        reload=True,
         log_level="info"
     )
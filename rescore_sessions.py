@@ -0,0 +1,311 @@
+"""
+Rescore Sessions - bulk re-scoring of historical audit batches on all cores
+
+Re-runs many stored batch payloads after riskWeights.json or an agent
+changes, without going through the HTTP endpoints one batch at a time.
+Batches are fanned out across a process pool and results are streamed to
+an output JSONL file as they finish.
+
+Input is a .jsonl file (one batch payload per line, like requests.jsonl),
+a .json file (one payload or a list of payloads), or a directory of such
+files. Payloads have the /run-master-audit shape (batch_id, session_id,
+company_name, location, submitted_at, audit_items).
+
+Modes:
+  audit  - full master audit per batch (run_master_audit: agents, synthesis)
+  scores - risk scores only (risk_scoring.score_sessions), vectorized per chunk
+
+Re-scoring is read-only by default: audit mode runs without persistence
+and the workers open the app's session, job and batch stores in memory,
+so production session aggregates and audit_agent_submissions rows are
+left alone (and no store files appear in the working directory).
+--write-back opts in to writing the re-scored findings like a live audit.
+
+Each output line is {"key", "batch_id", "session_id", "status", "items",
+"report" | "scores" | "error"}. The key is the batch_id plus a payload
+hash; re-running with the same --output skips keys already written, so an
+interrupted run resumes where it stopped.
+
+Usage:
+python rescore_sessions.py sessions.jsonl --output rescored.jsonl
+python rescore_sessions.py exports/ --output rescored.jsonl --mode scores --workers 16
+python rescore_sessions.py sessions.jsonl --output rescored.jsonl --write-back
+"""
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import fast_json
+from act_catalogue import ACTS_BY_PARTITION, get_catalogue, get_router
+from idempotency import payload_fingerprint
+from risk_scoring import load_risk_weights, score_sessions
+
+logger = logging.getLogger(__name__)
+
+MODES = ('audit', 'scores')
+
+# Store paths for read-only workers (see _init_worker)
+_IN_MEMORY_STORES = {
+    'SESSION_STORE_PATH': ':memory:',
+    'JOB_STORE_PATH': ':memory:',
+    'BATCH_VERSION_STORE_PATH': ':memory:',
+    'FINDINGS_PERSIST': '0',
+}
+
+
+# ============================================
+# INPUT / RESUME
+# ============================================
+
+def iter_payloads(path: Path) -> Iterator[Dict]:
+    """Yield batch payloads from a .jsonl/.json file or a directory of them"""
+    if path.is_dir():
+        for child in sorted(path.rglob('*')):
+            if child.suffix in ('.json', '.jsonl') and child.is_file():
+                yield from iter_payloads(child)
+        return
+
+    if path.suffix == '.jsonl':
+        with open(path, 'rb') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield fast_json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"⚠️  Skipping {path}:{line_no}: {e}")
+        return
+
+    with open(path, 'rb') as f:
+        data = fast_json.loads(f.read())
+    yield from (data if isinstance(data, list) else [data])
+
+
+def batch_key(batch: Dict) -> str:
+    """Stable identity of a payload: batch_id plus a content hash"""
+    return f"{batch.get('batch_id')}:{payload_fingerprint(batch)[:16]}"
+
+
+def completed_keys(output: Path) -> set:
+    """
+    Keys already written to the output file
+
+    A line cut short by an interruption is dropped from the file, so
+    appended results always start on a fresh line.
+    """
+    if not output.exists():
+        return set()
+
+    with open(output, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+
+    keys = set()
+    for line in data[:end].splitlines():
+        try:
+            keys.add(fast_json.loads(line)['key'])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return keys
+
+
+# ============================================
+# WORKERS
+# ============================================
+
+def _init_worker(write_back: bool = False):
+    """Load shared read-only data once per worker process"""
+    logging.getLogger().setLevel(logging.WARNING)
+    if not write_back:
+        # Read before the app module is first imported (in rescore_chunk)
+        os.environ.update(_IN_MEMORY_STORES)
+    get_catalogue()
+    get_router()
+    load_risk_weights()
+
+
+def _act_name(item: Dict) -> str:
+    partition = get_router().route(item.get('audit_item_id') or '')
+    act = ACTS_BY_PARTITION.get(partition)
+    return act['name'] if act else 'Other'
+
+
+def _record(key: str, batch: Dict, status: str, **fields) -> Dict:
+    return {
+        'key': key,
+        'batch_id': batch.get('batch_id'),
+        'session_id': batch.get('session_id'),
+        'status': status,
+        'items': len(batch.get('audit_items') or []),
+        **fields,
+    }
+
+
+def rescore_chunk(chunk: List[Tuple[str, Dict]], mode: str, write_back: bool = False) -> List[Dict]:
+    """Re-score a chunk of (key, batch) pairs in a worker process"""
+    if mode == 'scores':
+        try:
+            catalogue = get_catalogue()
+            sessions = [catalogue.hydrate(batch.get('audit_items') or []) for _, batch in chunk]
+            scores = score_sessions(sessions, act_of=_act_name)
+            return [_record(key, batch, 'ok', scores=result) for (key, batch), result in zip(chunk, scores)]
+        except Exception as e:
+            if len(chunk) == 1:
+                key, batch = chunk[0]
+                return [_record(key, batch, 'error', error=str(e))]
+            # Fall through to one batch at a time so one bad payload
+            # does not fail the whole chunk
+            records = []
+            for pair in chunk:
+                records.extend(rescore_chunk([pair], mode))
+            return records
+
+    # Imported here so scores-only runs never load the FastAPI app
+    from MASTER_AUDIT_ORCHESTRATOR_EXAMPLE import run_master_audit
+
+    records = []
+    for key, batch in chunk:
+        try:
+            records.append(_record(key, batch, 'ok', report=run_master_audit(batch, persist=write_back)))
+        except Exception as e:
+            records.append(_record(key, batch, 'error', error=str(e)))
+    return records
+
+
+# ============================================
+# DRIVER
+# ============================================
+
+def iter_chunks(path: Path, done: set, chunk_size: int) -> Iterator[List[Tuple[str, Dict]]]:
+    """Group pending payloads into chunks, skipping keys already written"""
+    chunk = []
+    for batch in iter_payloads(path):
+        key = batch_key(batch)
+        if key in done:
+            continue
+        done.add(key)
+        chunk.append((key, batch))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rescore(
+    input_path: Path,
+    output: Path,
+    mode: str = 'audit',
+    workers: int = 0,
+    chunk_size: int = 0,
+    progress_seconds: float = 5.0,
+    write_back: bool = False
+) -> Dict:
+    """
+    Re-score every pending batch under input_path into output
+
+    At most 2 chunks per worker are in flight, so memory stays flat however
+    large the input is. A chunk whose worker task fails is written as one
+    error record per batch rather than stopping the run. Returns the run's
+    throughput summary.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or (64 if mode == 'scores' else 1)
+    done = completed_keys(output)
+    if done:
+        logger.info(f"♻️  Resuming: {len(done)} batches already in {output}")
+
+    stats = {'batches': 0, 'items': 0, 'errors': 0, 'skipped': len(done)}
+    started = time.perf_counter()
+    last_report = started
+
+    def report_progress(final: bool = False):
+        elapsed = time.perf_counter() - started
+        stats['elapsed_seconds'] = round(elapsed, 2)
+        stats['batches_per_second'] = round(stats['batches'] / elapsed, 2) if elapsed else 0.0
+        stats['items_per_second'] = round(stats['items'] / elapsed, 1) if elapsed else 0.0
+        logger.info(
+            f"{'✅ Done' if final else '⏳'} {stats['batches']} batches ({stats['errors']} errors), "
+            f"{stats['items']} items in {stats['elapsed_seconds']}s - "
+            f"{stats['batches_per_second']} batches/s, {stats['items_per_second']} items/s"
+        )
+
+    chunks = iter_chunks(input_path, done, chunk_size)
+    with open(output, 'ab') as out, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(write_back,)
+    ) as pool:
+        pending = {}
+        try:
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending[pool.submit(rescore_chunk, chunk, mode, write_back)] = chunk
+                if not pending:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    chunk = pending.pop(future)
+                    try:
+                        records = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        records = [_record(key, batch, 'error', error=str(e)) for key, batch in chunk]
+                    for record in records:
+                        out.write(fast_json.dumps(record) + b'\n')
+                        stats['batches'] += 1
+                        stats['items'] += record['items']
+                        stats['errors'] += record['status'] != 'ok'
+                out.flush()
+
+                if time.perf_counter() - last_report >= progress_seconds:
+                    last_report = time.perf_counter()
+                    report_progress()
+        except (KeyboardInterrupt, BrokenProcessPool):
+            for future in pending:
+                future.cancel()
+            logger.warning(f"⚠️  Interrupted; re-run with the same --output to resume")
+            raise
+        finally:
+            report_progress(final=True)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('input', type=Path, help='.jsonl/.json file or directory of batch payloads')
+    parser.add_argument('--output', type=Path, required=True, help='results JSONL (appended; enables resume)')
+    parser.add_argument('--mode', choices=MODES, default='audit')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes (default: all cores)')
+    parser.add_argument('--chunk-size', type=int, default=0,
+                        help='batches per worker task (default 1 for audit, 64 for scores)')
+    parser.add_argument('--progress-seconds', type=float, default=5.0)
+    parser.add_argument('--write-back', action='store_true',
+                        help='audit mode: write findings to the session aggregates and audit_agent_submissions')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        stats = rescore(args.input, args.output, args.mode, args.workers, args.chunk_size, args.progress_seconds,
+                        args.write_back)
+    except (KeyboardInterrupt, BrokenProcessPool):
+        sys.exit(130)
+    print(json.dumps(stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Finding Cache - content-addressed cache of per-item specialist agent findings
+
+A finding is keyed by a hash of everything the agent looks at for one item
+(audit_item_id, verdict, comment, evidence, applicability, risk level and
+category, the company context) plus the agent name and version. Resubmitting a session where only
+a few answers changed therefore hits the cache for every untouched item,
+and bumping AGENT_VERSION invalidates everything at once.
+
+Entries live in an in-memory LRU with a TTL; an optional SQLite file keeps
+them across restarts and between worker processes.
+
+Configuration (environment variables):
+AGENT_VERSION             - version tag mixed into every key (default mock-1)
+FINDING_CACHE_SIZE        - max in-memory entries (default 50000)
+FINDING_CACHE_TTL_SECONDS - entry lifetime in seconds (default 604800, one week)
+FINDING_CACHE_PATH        - SQLite file for the on-disk backend (default: memory only)
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Iterable
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from audit_records import to_jsonable
+
+AGENT_VERSION = os.environ.get("AGENT_VERSION", "mock-1")
+FINDING_CACHE_SIZE = int(os.environ.get("FINDING_CACHE_SIZE", "50000"))
+FINDING_CACHE_TTL_SECONDS = float(os.environ.get("FINDING_CACHE_TTL_SECONDS", "604800"))
+FINDING_CACHE_PATH = os.environ.get("FINDING_CACHE_PATH")
+
+# Item fields that change what an agent concludes; risk_level and category
+# are copied into the finding (its severity becomes the session row's risk_level)
+KEY_FIELDS = (
+    'audit_item_id',
+    'risk_level',
+    'category',
+    'intern_verdict',
+    'intern_comment',
+    'evidence_url',
+    'intern_evidence',
+    'missing_evidence_reason',
+    'applicability_reason',
+    'is_applicable',
+)
+
+# Context fields that agents may quote in findings
+CONTEXT_KEY_FIELDS = ('company_name', 'location')
+
+
+def finding_key(item: Dict, agent_name: str, context: Dict, agent_version: str = AGENT_VERSION) -> str:
+    """Content hash identifying one agent finding"""
+    material = [agent_name, agent_version]
+    material.extend(item.get(field) for field in KEY_FIELDS)
+    material.extend(context.get(field) for field in CONTEXT_KEY_FIELDS)
+    encoded = json.dumps(material, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class FindingCache:
+    """
+    LRU + TTL cache of findings with an optional SQLite backend
+
+    Thread-safe; reads check memory first and promote disk hits.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = FINDING_CACHE_SIZE,
+        ttl_seconds: float = FINDING_CACHE_TTL_SECONDS,
+        disk_path: Optional[str] = FINDING_CACHE_PATH
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.disk_path = disk_path
+        self._disk = None
+        if disk_path:
+            self._connect()
+            with self._disk:
+                self._disk.execute("PRAGMA journal_mode=WAL")
+                self._disk.execute(
+                    "CREATE TABLE IF NOT EXISTS agent_findings ("
+                    "key TEXT PRIMARY KEY, finding TEXT NOT NULL, stored_at REAL NOT NULL)"
+                )
+        # Forked workers keep the memory tier (copy-on-write) but need their own lock and connection
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        if self.disk_path:
+            self._disk = sqlite3.connect(self.disk_path, check_same_thread=False, timeout=30)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Cached findings for the given keys (missing or expired keys are left out)"""
+        now = time.time()
+        found = {}
+        missing = []
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.append(key)
+
+            disk_hits = 0
+            if missing and self._disk is not None:
+                for key, finding, stored_at in self._read_disk(missing, now):
+                    found[key] = finding
+                    self._remember(key, finding, stored_at)
+                    disk_hits += 1
+
+            self.hits += len(found)
+            self.misses += len(missing) - disk_hits
+
+        return found
+
+    def put_many(self, findings: Dict[str, Dict[str, Any]]):
+        """Store findings by key"""
+        if not findings:
+            return
+        now = time.time()
+
+        with self._lock:
+            for key, finding in findings.items():
+                self._remember(key, finding, now)
+
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.executemany(
+                        "INSERT OR REPLACE INTO agent_findings (key, finding, stored_at) VALUES (?, ?, ?)",
+                        [(key, json.dumps(finding, default=to_jsonable), now) for key, finding in findings.items()]
+                    )
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from memory and disk; returns how many were removed in memory"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [key for key, (_, stored_at) in self._entries.items() if stored_at <= cutoff]
+            for key in expired:
+                del self._entries[key]
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute("DELETE FROM agent_findings WHERE stored_at <= ?", (cutoff,))
+        return len(expired)
+
+    def _remember(self, key: str, finding: Dict[str, Any], stored_at: float):
+        self._entries[key] = (finding, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, keys, now):
+        # SQLite caps bound parameters, so look keys up in slices
+        cutoff = now - self.ttl_seconds
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._disk.execute(
+                f"SELECT key, finding, stored_at FROM agent_findings "
+                f"WHERE stored_at > ? AND key IN ({','.join('?' * len(chunk))})",
+                [cutoff, *chunk]
+            ).fetchall()
+            for key, finding, stored_at in rows:
+                yield key, json.loads(finding), stored_at
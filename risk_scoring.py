@@ -0,0 +1,277 @@
+"""
+Risk Scoring Engine - vectorized Python port of src/utils/riskScoring.js
+
+Applies the weighted model in src/config/riskWeights.json to audit batches:
+
+    weight       = base weight of the risk level x penalty factor
+    penalty      = min(1 + log10(1 + fine_amount_max_inr) / 2, maxFactor)
+    risk score   = sum(weight x status factor) / sum(weight) x 100
+                   over applicable items (same as computeActScore)
+    compliance   = 100 - risk score
+
+An act (or batch) without applicable items has no compliance score (None):
+riskScoring.js gives it a risk score of 0 and an applicable count of 0, so
+it carries no weight in computeMultiActScore, and 100 - 0 would wrongly
+read as fully compliant while 0.0 would read as fully non-compliant.
+
+A batch is encoded once into NumPy columns (risk level codes, status codes,
+penalty amounts, act codes); every per-act and overall figure then comes out
+of a single vectorized pass with np.bincount. score_sessions() stacks many
+sessions into one set of columns for portfolio re-scoring.
+
+Installation:
+pip install numpy
+
+Configuration (environment variables):
+RISK_WEIGHTS_PATH - weights file (default ./src/config/riskWeights.json)
+"""
+
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Callable, Sequence
+import functools
+import json
+import os
+
+import numpy as np
+
+RISK_WEIGHTS_PATH = Path(os.environ.get(
+    "RISK_WEIGHTS_PATH",
+    Path(__file__).resolve().parent / "src" / "config" / "riskWeights.json"
+))
+
+# Code order for the level / status columns; unknown values get the last code
+RISK_LEVELS = ('Critical', 'High', 'Medium', 'Low')
+STATUSES = ('Compliant', 'Non-Compliant', 'Delayed', 'Not Applicable')
+
+UNKNOWN_LEVEL = len(RISK_LEVELS)
+UNKNOWN_STATUS = len(STATUSES)
+NON_COMPLIANT = STATUSES.index('Non-Compliant')
+COMPLIANT = STATUSES.index('Compliant')
+NOT_APPLICABLE = STATUSES.index('Not Applicable')
+
+_LEVEL_CODES = {level.lower(): code for code, level in enumerate(RISK_LEVELS)}
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+@functools.lru_cache(maxsize=None)
+def load_risk_weights(path: Path = RISK_WEIGHTS_PATH) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def level_code(level: Optional[str]) -> int:
+    """Code of a risk level (case-insensitive, like getBaseWeight)"""
+    if not level:
+        return UNKNOWN_LEVEL
+    return _LEVEL_CODES.get(str(level).strip().lower(), UNKNOWN_LEVEL)
+
+
+def status_code(status: Optional[str]) -> int:
+    return _STATUS_CODES.get(status, UNKNOWN_STATUS)
+
+
+def item_compliance(status: Optional[str], cfg: Optional[Dict[str, Any]] = None) -> Optional[float]:
+    """
+    Compliance score of a single item from its status (100 - status factor x 100)
+
+    None for Not Applicable items, which carry no score; other unknown
+    statuses get factor 0 like getStatusFactor.
+    """
+    if status == 'Not Applicable':
+        return None
+    factors = (cfg or load_risk_weights()).get('statusFactors', {})
+    return round(100.0 - float(factors.get(status, 0)) * 100.0, 2)
+
+
+def penalty_amount(item: Dict) -> float:
+    """fine_amount_max_inr from an item's risk_profile (0 when absent)"""
+    details = (item.get('risk_profile') or {}).get('penalty_details') or {}
+    amount = details.get('fine_amount_max_inr')
+    return float(amount) if isinstance(amount, (int, float)) and not isinstance(amount, bool) else 0.0
+
+
+def penalty_factors(amounts: np.ndarray, cfg: Dict[str, Any]) -> np.ndarray:
+    """Vectorized getPenaltyFactor()"""
+    penalty_cfg = cfg.get('penalty') or {}
+    if not penalty_cfg.get('usePenaltyModulation'):
+        return np.ones_like(amounts)
+    factors = 1 + np.log10(1 + np.maximum(amounts, 0)) / 2
+    factors = np.minimum(factors, penalty_cfg.get('maxFactor', 2))
+    return np.where(amounts > 0, factors, 1.0)
+
+
+def item_weights(level_codes: np.ndarray, amounts: np.ndarray, cfg: Dict[str, Any]) -> np.ndarray:
+    """Vectorized computeQuestionWeight(), rounded to 2 decimals like the JS"""
+    base = np.array([cfg.get(level, 1) for level in RISK_LEVELS] + [1], dtype=np.float64)
+    return np.round(base[level_codes] * penalty_factors(amounts, cfg), 2)
+
+
+# ============================================
+# ENCODING
+# ============================================
+
+class EncodedBatch:
+    """Columnar form of one or more audit batches"""
+
+    __slots__ = ('level_codes', 'status_codes', 'amounts', 'applicable', 'act_codes', 'session_codes',
+                 'acts', 'n_sessions')
+
+    def __init__(self, level_codes, status_codes, amounts, applicable, act_codes, session_codes, acts, n_sessions):
+        self.level_codes = level_codes
+        self.status_codes = status_codes
+        self.amounts = amounts
+        self.applicable = applicable
+        self.act_codes = act_codes
+        self.session_codes = session_codes
+        self.acts = acts
+        self.n_sessions = n_sessions
+
+    def __len__(self):
+        return len(self.level_codes)
+
+
+def encode_batches(
+    sessions: Sequence[Sequence[Dict]],
+    act_of: Optional[Callable[[Dict], str]] = None
+) -> EncodedBatch:
+    """
+    Encode the audit items of one or more sessions into NumPy columns
+
+    Args:
+        sessions: One list of audit item dicts per session
+        act_of: Maps an item to its act key; all items share one act when omitted
+    """
+    n_items = sum(len(items) for items in sessions)
+    level_codes = np.empty(n_items, dtype=np.int8)
+    status_codes = np.empty(n_items, dtype=np.int8)
+    amounts = np.empty(n_items, dtype=np.float64)
+    applicable = np.empty(n_items, dtype=bool)
+    act_codes = np.zeros(n_items, dtype=np.int32)
+    session_codes = np.empty(n_items, dtype=np.int32)
+    act_index: Dict[str, int] = {}
+
+    i = 0
+    for session_code, items in enumerate(sessions):
+        for item in items:
+            status = item.get('intern_verdict')
+            level_codes[i] = level_code(item.get('risk_level') or (item.get('risk_profile') or {}).get('severity_level'))
+            status_codes[i] = status_code(status)
+            amounts[i] = item['penalty_amount'] if 'penalty_amount' in item else penalty_amount(item)
+            applicable[i] = item.get('is_applicable', True) and status != 'Not Applicable'
+            if act_of is not None:
+                act_codes[i] = act_index.setdefault(act_of(item), len(act_index))
+            session_codes[i] = session_code
+            i += 1
+
+    acts = list(act_index) if act_of is not None else [None]
+    return EncodedBatch(level_codes, status_codes, amounts, applicable, act_codes, session_codes,
+                        acts, len(sessions))
+
+
+# ============================================
+# SCORING
+# ============================================
+
+def score_encoded(encoded: EncodedBatch, cfg: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Score an encoded batch in one vectorized pass
+
+    Returns one report per session:
+        {
+            'acts': {act: {...per-act figures...}},
+            'overall_compliance_score': float or None,   # applicable-item weighted, like computeMultiActScore
+            'overall_risk_score': float,
+            'critical_findings': int, 'high_risk_findings': int,
+            'medium_risk_findings': int, 'low_risk_findings': int,
+            'non_compliant_items': int, 'compliant_items': int,
+            'applicable_items': int, 'total_items': int
+        }
+    Severity counts are non-compliant items by risk level. Compliance
+    scores are None where there are no applicable items (risk scores 0).
+    """
+    cfg = cfg or load_risk_weights()
+    n_acts = len(encoded.acts)
+    n_groups = encoded.n_sessions * n_acts
+    n_levels = UNKNOWN_LEVEL + 1
+
+    status_table = np.array(
+        [cfg.get('statusFactors', {}).get(status, 0) for status in STATUSES] + [0],
+        dtype=np.float64
+    )
+    weights = item_weights(encoded.level_codes, encoded.amounts, cfg)
+    applicable_weights = np.where(encoded.applicable, weights, 0.0)
+    group = encoded.session_codes.astype(np.int64) * n_acts + encoded.act_codes
+    non_compliant = encoded.status_codes == NON_COMPLIANT
+
+    max_weight = np.bincount(group, applicable_weights, minlength=n_groups)
+    raw = np.bincount(group, applicable_weights * status_table[encoded.status_codes], minlength=n_groups)
+    items = np.bincount(group, minlength=n_groups)
+    applicable = np.bincount(group, encoded.applicable, minlength=n_groups).astype(np.int64)
+    compliant = np.bincount(group, encoded.status_codes == COMPLIANT, minlength=n_groups).astype(np.int64)
+    severity = np.bincount(
+        group[non_compliant] * n_levels + encoded.level_codes[non_compliant],
+        minlength=n_groups * n_levels
+    ).reshape(n_groups, n_levels)
+
+    risk = np.divide(raw * 100, max_weight, out=np.zeros(n_groups), where=max_weight > 0)
+
+    reports = []
+    for session in range(encoded.n_sessions):
+        rows = slice(session * n_acts, (session + 1) * n_acts)
+        s_items, s_applicable = items[rows], applicable[rows]
+        s_risk, s_severity = risk[rows], severity[rows]
+        present = s_items > 0
+        total_applicable = int(s_applicable.sum())
+
+        acts = {}
+        for code in np.flatnonzero(present):
+            acts[encoded.acts[code]] = {
+                'score': round(100 - float(s_risk[code]), 2) if s_applicable[code] else None,
+                'risk_score': round(float(s_risk[code]), 2),
+                'critical': int(s_severity[code, 0]),
+                'high': int(s_severity[code, 1]),
+                'medium': int(s_severity[code, 2]),
+                'low': int(s_severity[code, 3]),
+                'non_compliant': int(s_severity[code].sum()),
+                'compliant': int(compliant[rows][code]),
+                'applicable': int(s_applicable[code]),
+                'items_analyzed': int(s_items[code]),
+                'max_weight': round(float(max_weight[rows][code]), 2),
+                'raw_score': round(float(raw[rows][code]), 2),
+            }
+
+        overall_risk = float((s_risk * s_applicable).sum() / total_applicable) if total_applicable else 0.0
+        totals = s_severity.sum(axis=0)
+        reports.append({
+            'acts': acts,
+            'overall_compliance_score': round(100 - overall_risk, 2) if total_applicable else None,
+            'overall_risk_score': round(overall_risk, 2),
+            'critical_findings': int(totals[0]),
+            'high_risk_findings': int(totals[1]),
+            'medium_risk_findings': int(totals[2]),
+            'low_risk_findings': int(totals[3]),
+            'non_compliant_items': int(totals.sum()),
+            'compliant_items': int(compliant[rows].sum()),
+            'applicable_items': total_applicable,
+            'total_items': int(s_items.sum()),
+        })
+
+    return reports
+
+
+def score_batch(
+    audit_items: Sequence[Dict],
+    act_of: Optional[Callable[[Dict], str]] = None,
+    cfg: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Score a single batch (see score_encoded for the report shape)"""
+    return score_encoded(encode_batches([audit_items], act_of), cfg)[0]
+
+
+def score_sessions(
+    sessions: Sequence[Sequence[Dict]],
+    act_of: Optional[Callable[[Dict], str]] = None,
+    cfg: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Score many sessions at once, e.g. to re-score a portfolio after a weights change"""
+    return score_encoded(encode_batches(sessions, act_of), cfg)
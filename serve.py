@@ -0,0 +1,225 @@
+"""
+Production entry point for the Python audit services
+
+Runs one of the FastAPI apps under uvicorn with N worker processes and no
+reloader (the __main__ blocks of the app modules are for local runs only).
+
+Startup is kept short:
+- this script imports only the standard library until it hands over to
+  uvicorn, and passes the app as an import string, so the supervisor
+  process never imports FastAPI, pydantic or the app itself
+- when build/act_catalogue.snap exists (python act_snapshot.py build),
+  workers load the act catalogue and search index from the prebuilt
+  snapshots instead of parsing src/data/*.json; --build-snapshot builds
+  them first
+
+--prefork trades the lean supervisor for shared memory: this process
+imports the app, loads the act catalogue, item router, risk weights and
+(when the app uses it) the search index, binds the socket, freezes the GC
+and then forks the workers. The read-only data is shared copy-on-write, so
+each extra worker costs its own heap and connections rather than another
+copy of the catalogue, and workers start without loading anything. Dead
+workers are restarted; SIGTERM/SIGINT stop them all. Each worker gets
+WORKER_INDEX / WORKER_COUNT in its environment, which the batch service
+uses to own one shard of the job store (all jobs of a session run in the
+same worker, see job_store.shard_for). The batch service therefore runs
+more than one worker only with --prefork: plain uvicorn workers would each
+treat the whole job store as theirs and, on startup, requeue the jobs their
+siblings are running. Per-process state that is not
+routed this way:
+- /metrics reports the worker that answered the scrape
+- the idempotency caches are per worker; the job store and batch version
+  store are shared files, so status and deltas work from any worker, and
+  FINDING_CACHE_PATH shares cached findings between workers
+- the orchestrator's admission budgets (admission.py) apply per worker,
+  so set ADMISSION_MAX_ITEMS to the total divided by --workers; the batch
+  service counts its backlog in the shared job store instead
+- connections are accepted by whichever worker is free; pinning a
+  session's requests to one worker needs a proxy that hashes on a header
+
+Usage:
+python serve.py orchestrator --workers 4
+python serve.py orchestrator --workers 4 --prefork
+python serve.py batch --port 8001 --build-snapshot
+python serve.py batch --port 8001 --workers 4 --prefork
+
+Configuration (environment variables):
+WEB_CONCURRENCY     - default --workers (default 1)
+HOST / PORT         - default bind address (default 127.0.0.1:8000)
+LOG_LEVEL           - uvicorn log level (default info)
+ACT_SNAPSHOT_PATH   - catalogue snapshot (default build/act_catalogue.snap when present)
+ACT_SEARCH_SNAPSHOT - search index snapshot (default build/act_search.npz when present)
+"""
+
+from pathlib import Path
+import argparse
+import logging
+import os
+import subprocess
+import sys
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+APPS = {
+    'orchestrator': 'MASTER_AUDIT_ORCHESTRATOR_EXAMPLE:app',
+    'batch': 'python_ai_agent_example:app',
+}
+
+# Apps whose workers each own one shard of the job store (needs --prefork)
+SHARDED_APPS = {'batch'}
+
+DEFAULT_SNAPSHOT_DIR = REPO_ROOT / 'build'
+
+logger = logging.getLogger('serve')
+
+
+def use_snapshots(snapshot_dir: Path, build: bool = False):
+    """Point workers at the act data snapshots (building them if asked)"""
+    catalogue = Path(os.environ.get('ACT_SNAPSHOT_PATH') or snapshot_dir / 'act_catalogue.snap')
+    search = Path(os.environ.get('ACT_SEARCH_SNAPSHOT') or catalogue.with_name('act_search.npz'))
+
+    if build:
+        # A separate interpreter, so this process stays free of numpy and the catalogue
+        subprocess.run(
+            [sys.executable, str(REPO_ROOT / 'act_snapshot.py'), 'build',
+             '--output', str(catalogue), '--search-output', str(search)],
+            check=True
+        )
+
+    if catalogue.exists():
+        os.environ.setdefault('ACT_SNAPSHOT_PATH', str(catalogue))
+    if search.exists():
+        os.environ.setdefault('ACT_SEARCH_SNAPSHOT', str(search))
+
+
+def preload_shared_data():
+    """Load the read-only data the forked workers will share"""
+    from act_catalogue import get_router
+    from risk_scoring import load_risk_weights
+
+    get_router()
+    load_risk_weights()
+    # Only apps that search pay for the index
+    if 'act_search' in sys.modules:
+        sys.modules['act_search'].get_search_index()
+
+
+def run_prefork(app_name: str, host: str, port: int, workers: int, log_level: str):
+    """Import and warm the app once, then fork the workers onto one listening socket"""
+    import gc
+    import importlib
+    import signal
+    import socket
+    import time
+
+    import uvicorn
+
+    module_name, attribute = APPS[app_name].split(':')
+    app = getattr(importlib.import_module(module_name), attribute)
+    preload_shared_data()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Keep the collector from touching (and un-sharing) everything loaded so far
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid:
+            children[pid] = index
+            return
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        os.environ['WORKER_INDEX'] = str(index)
+        os.environ['WORKER_COUNT'] = str(workers)
+        code = 0
+        try:
+            uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+        except BaseException:
+            logger.exception(f"Worker {index} crashed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"🚀 Serving {APPS[app_name]} on http://{host}:{port} with {workers} pre-forked workers")
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            logger.warning(f"⚠️  Worker {index} (pid {pid}) exited with status {status}; restarting it")
+            time.sleep(1)
+            if not stopping:
+                spawn(index)
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an audit service under uvicorn (no reloader)")
+    parser.add_argument('app', choices=sorted(APPS))
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', '1')))
+    parser.add_argument('--log-level', default=os.environ.get('LOG_LEVEL', 'info'))
+    parser.add_argument('--snapshot-dir', type=Path, default=DEFAULT_SNAPSHOT_DIR)
+    parser.add_argument('--build-snapshot', action='store_true', help='rebuild the act data snapshots first')
+    parser.add_argument('--no-snapshot', action='store_true', help='parse the act JSON files in every worker')
+    parser.add_argument('--prefork', action='store_true',
+                        help='load the app once and fork the workers so they share its read-only data')
+    args = parser.parse_args()
+    if args.app in SHARDED_APPS and args.workers > 1 and not args.prefork:
+        # Plain uvicorn workers get no WORKER_INDEX / WORKER_COUNT, so each one
+        # would own the whole job store and requeue its siblings' running jobs
+        parser.error(f"{args.app} needs --prefork to run more than one worker")
+
+    if not args.no_snapshot:
+        use_snapshots(args.snapshot_dir, build=args.build_snapshot)
+
+    # Workers import the app by name; make the repo importable from anywhere
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, str(REPO_ROOT))
+
+    if args.prefork:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+        run_prefork(args.app, args.host, args.port, args.workers, args.log_level)
+        return
+
+    import uvicorn
+
+    uvicorn.run(
+        APPS[args.app],
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        reload=False
+    )
+
+
+if __name__ == '__main__':
+    main()
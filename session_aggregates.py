@@ -0,0 +1,335 @@
+"""
+Session Aggregates - incrementally maintained per-session and per-agent report totals
+
+src/services/reportService.js used to download every audit_agent_submissions
+row of a session and aggregate it in the browser. This store keeps those
+figures up to date as agent results are written instead:
+
+- session_results holds the latest result per (session_id, audit_item_id)
+- session_totals holds the summary counters per session
+- agent_totals holds the per-agent counters per session
+
+Writing a result replaces the item's previous contribution to the totals
+(old row subtracted, new row added), so the cost of a write depends only on
+the rows written and reading a report summary is two primary-key lookups.
+Raw rows are served a page at a time in audit_item_id order.
+
+Figures match fetchAuditSessionReport(): applicable = status other than
+'Not Applicable', critical = Critical risk and Non-Compliant, scores are
+the rounded mean of ai_score over rows that have one.
+
+Configuration (environment variables):
+SESSION_STORE_PATH - SQLite file for the aggregates (default ./audit_sessions.db)
+"""
+
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+from datetime import datetime
+import json
+import math
+import os
+import sqlite3
+import threading
+
+SESSION_STORE_PATH = os.environ.get("SESSION_STORE_PATH", "audit_sessions.db")
+
+UNKNOWN_AGENT = "Unknown_Agent"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_results (
+    session_id     TEXT NOT NULL,
+    audit_item_id  TEXT NOT NULL,
+    ai_agent_name  TEXT NOT NULL,
+    status         TEXT,
+    risk_level     TEXT,
+    ai_score       REAL,
+    detail         TEXT NOT NULL,
+    updated_at     TEXT NOT NULL,
+    PRIMARY KEY (session_id, audit_item_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS session_totals (
+    session_id            TEXT PRIMARY KEY,
+    total_items           INTEGER NOT NULL DEFAULT 0,
+    applicable_items      INTEGER NOT NULL DEFAULT 0,
+    compliant_items       INTEGER NOT NULL DEFAULT 0,
+    non_compliant_items   INTEGER NOT NULL DEFAULT 0,
+    not_applicable_items  INTEGER NOT NULL DEFAULT 0,
+    critical_risk_count   INTEGER NOT NULL DEFAULT 0,
+    score_sum             REAL NOT NULL DEFAULT 0,
+    score_count           INTEGER NOT NULL DEFAULT 0,
+    updated_at            TEXT
+);
+
+CREATE TABLE IF NOT EXISTS agent_totals (
+    session_id     TEXT NOT NULL,
+    ai_agent_name  TEXT NOT NULL,
+    total_items    INTEGER NOT NULL DEFAULT 0,
+    issues         INTEGER NOT NULL DEFAULT 0,
+    score_sum      REAL NOT NULL DEFAULT 0,
+    score_count    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, ai_agent_name)
+) WITHOUT ROWID;
+"""
+
+_SESSION_COUNTERS = (
+    'total_items', 'applicable_items', 'compliant_items', 'non_compliant_items',
+    'not_applicable_items', 'critical_risk_count', 'score_sum', 'score_count',
+)
+_AGENT_COUNTERS = ('total_items', 'issues', 'score_sum', 'score_count')
+
+
+def _js_round(value: float) -> int:
+    """Math.round() (halves round up, unlike Python's round())"""
+    return int(math.floor(value + 0.5))
+
+
+def _session_contribution(status: Optional[str], risk_level: Optional[str], ai_score: Optional[float]) -> Tuple:
+    non_compliant = status == 'Non-Compliant'
+    return (
+        1,
+        status != 'Not Applicable',
+        status == 'Compliant',
+        non_compliant,
+        status == 'Not Applicable',
+        non_compliant and risk_level == 'Critical',
+        ai_score or 0.0,
+        ai_score is not None,
+    )
+
+
+def _agent_contribution(status: Optional[str], ai_score: Optional[float]) -> Tuple:
+    return (1, status == 'Non-Compliant', ai_score or 0.0, ai_score is not None)
+
+
+def _add(totals: Dict, key, contribution: Tuple, sign: int):
+    current = totals.get(key)
+    if current is None:
+        current = totals[key] = [0] * len(contribution)
+    for i, value in enumerate(contribution):
+        current[i] += sign * value
+
+
+def _score(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+class SessionAggregates:
+    """
+    Thread-safe SQLite store of session results and their running totals
+
+    Same connection model as JobStore: one shared connection behind a lock,
+    WAL mode so report reads are not blocked by writes, and a fresh
+    connection in forked workers.
+    """
+
+    def __init__(self, path: str = SESSION_STORE_PATH):
+        self.path = path
+        self._connect()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # === Writes ===
+
+    def record_results(self, session_id: str, results: Iterable[Dict[str, Any]]) -> int:
+        """
+        Write agent results for a session and update its totals
+
+        Each result needs audit_item_id and may carry status, risk_level,
+        ai_agent_name and ai_score; any other fields are kept as the row's
+        detail. A later result for the same item replaces the earlier one.
+
+        Returns:
+            Number of results written
+        """
+        latest = {}
+        for result in results:
+            item_id = result.get('audit_item_id')
+            if item_id:
+                latest[item_id] = result
+        if not latest:
+            return 0
+
+        now = datetime.now().isoformat()
+        session_deltas: Dict[str, list] = {}
+        agent_deltas: Dict[str, list] = {}
+        rows = []
+
+        with self._lock, self._conn:
+            previous = self._previous_rows(session_id, list(latest))
+
+            for item_id, result in latest.items():
+                old = previous.get(item_id)
+                if old is not None:
+                    _add(session_deltas, session_id, _session_contribution(old['status'], old['risk_level'], old['ai_score']), -1)
+                    _add(agent_deltas, old['ai_agent_name'], _agent_contribution(old['status'], old['ai_score']), -1)
+
+                agent_name = result.get('ai_agent_name') or UNKNOWN_AGENT
+                status = result.get('status')
+                risk_level = result.get('risk_level')
+                ai_score = _score(result.get('ai_score'))
+                _add(session_deltas, session_id, _session_contribution(status, risk_level, ai_score), 1)
+                _add(agent_deltas, agent_name, _agent_contribution(status, ai_score), 1)
+
+                rows.append((session_id, item_id, agent_name, status, risk_level, ai_score, json.dumps(result), now))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO session_results "
+                "(session_id, audit_item_id, ai_agent_name, status, risk_level, ai_score, detail, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                f"INSERT INTO session_totals (session_id, {', '.join(_SESSION_COUNTERS)}, updated_at) "
+                f"VALUES (?, {', '.join('?' * len(_SESSION_COUNTERS))}, ?) "
+                f"ON CONFLICT (session_id) DO UPDATE SET "
+                + ", ".join(f"{name} = {name} + excluded.{name}" for name in _SESSION_COUNTERS)
+                + ", updated_at = excluded.updated_at",
+                (session_id, *session_deltas[session_id], now)
+            )
+            self._conn.executemany(
+                f"INSERT INTO agent_totals (session_id, ai_agent_name, {', '.join(_AGENT_COUNTERS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(_AGENT_COUNTERS))}) "
+                f"ON CONFLICT (session_id, ai_agent_name) DO UPDATE SET "
+                + ", ".join(f"{name} = {name} + excluded.{name}" for name in _AGENT_COUNTERS),
+                [(session_id, agent_name, *delta) for agent_name, delta in agent_deltas.items()]
+            )
+            self._conn.execute(
+                "DELETE FROM agent_totals WHERE session_id = ? AND total_items <= 0", (session_id,)
+            )
+
+        return len(rows)
+
+    def remove_results(self, session_id: str, item_ids: Iterable[str]) -> int:
+        """Drop results for items no longer in the session and update its totals"""
+        item_ids = list(dict.fromkeys(item_ids))
+        if not item_ids:
+            return 0
+
+        session_delta = [0] * len(_SESSION_COUNTERS)
+        agent_deltas: Dict[str, list] = {}
+        with self._lock, self._conn:
+            previous = self._previous_rows(session_id, item_ids)
+            if not previous:
+                return 0
+
+            for old in previous.values():
+                contribution = _session_contribution(old['status'], old['risk_level'], old['ai_score'])
+                session_delta = [total - value for total, value in zip(session_delta, contribution)]
+                _add(agent_deltas, old['ai_agent_name'], _agent_contribution(old['status'], old['ai_score']), -1)
+
+            self._conn.executemany(
+                "DELETE FROM session_results WHERE session_id = ? AND audit_item_id = ?",
+                [(session_id, item_id) for item_id in previous]
+            )
+            self._conn.execute(
+                "UPDATE session_totals SET "
+                + ", ".join(f"{name} = {name} + ?" for name in _SESSION_COUNTERS)
+                + ", updated_at = ? WHERE session_id = ?",
+                (*session_delta, datetime.now().isoformat(), session_id)
+            )
+            self._conn.executemany(
+                "UPDATE agent_totals SET "
+                + ", ".join(f"{name} = {name} + ?" for name in _AGENT_COUNTERS)
+                + " WHERE session_id = ? AND ai_agent_name = ?",
+                [(*delta, session_id, agent_name) for agent_name, delta in agent_deltas.items()]
+            )
+            self._conn.execute(
+                "DELETE FROM agent_totals WHERE session_id = ? AND total_items <= 0", (session_id,)
+            )
+
+        return len(previous)
+
+    def _previous_rows(self, session_id: str, item_ids: List[str]) -> Dict[str, sqlite3.Row]:
+        # SQLite caps bound parameters, so look items up in slices
+        previous = {}
+        for start in range(0, len(item_ids), 500):
+            chunk = item_ids[start:start + 500]
+            for row in self._conn.execute(
+                f"SELECT audit_item_id, ai_agent_name, status, risk_level, ai_score FROM session_results "
+                f"WHERE session_id = ? AND audit_item_id IN ({','.join('?' * len(chunk))})",
+                [session_id, *chunk]
+            ):
+                previous[row['audit_item_id']] = row
+        return previous
+
+    # === Reads ===
+
+    def get_summary(self, session_id: str) -> Dict[str, Any]:
+        """Report summary and per-agent breakdown (zeros for an unknown session)"""
+        with self._lock:
+            totals = self._conn.execute(
+                "SELECT * FROM session_totals WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            agents = self._conn.execute(
+                "SELECT * FROM agent_totals WHERE session_id = ? ORDER BY ai_agent_name", (session_id,)
+            ).fetchall()
+
+        totals = dict(totals) if totals else {name: 0 for name in _SESSION_COUNTERS}
+        applicable = totals['applicable_items']
+        return {
+            'summary': {
+                'overall_compliance': _js_round(totals['compliant_items'] / applicable * 100) if applicable else 0,
+                'critical_risk_count': totals['critical_risk_count'],
+                'total_score': _js_round(totals['score_sum'] / totals['score_count']) if totals['score_count'] else 0,
+                'total_items': totals['total_items'],
+                'applicable_items': applicable,
+                'compliant_items': totals['compliant_items'],
+                'non_compliant_items': totals['non_compliant_items'],
+                'not_applicable_items': totals['not_applicable_items'],
+            },
+            'agent_breakdown': {
+                agent['ai_agent_name']: {
+                    'score': _js_round(agent['score_sum'] / agent['score_count']) if agent['score_count'] else 0,
+                    'issues': agent['issues'],
+                    'total_items': agent['total_items'],
+                }
+                for agent in agents
+            },
+            'updated_at': totals.get('updated_at'),
+        }
+
+    def get_details(
+        self,
+        session_id: str,
+        limit: int = 100,
+        after: Optional[str] = None,
+        agent_name: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of raw results in audit_item_id order
+
+        Returns:
+            (rows, next_cursor) - pass next_cursor as `after` for the next
+            page; it is None on the last page
+        """
+        query = "SELECT audit_item_id, detail FROM session_results WHERE session_id = ?"
+        params: List[Any] = [session_id]
+        if after is not None:
+            query += " AND audit_item_id > ?"
+            params.append(after)
+        if agent_name is not None:
+            query += " AND ai_agent_name = ?"
+            params.append(agent_name)
+        query += " ORDER BY audit_item_id LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            found = self._conn.execute(query, params).fetchall()
+
+        page = found[:limit]
+        next_cursor = page[-1]['audit_item_id'] if len(found) > limit else None
+        return [json.loads(row['detail']) for row in page], next_cursor
@@ -66,7 +66,8 @@ const SubmitForReview = ({
     setStatusStep('saving');
 
     try {
-      // CLEAN SLATE: Delete previous attempts to prevent duplicates
+      // CLEAN SLATE: Delete previous attempts (items no longer in the form, stale AI results);
+      // the upsert below keeps one row per item even if two submits overlap
       console.log('[SubmitForReview] Cleaning up previous submissions...');
       await supabase
         .from('audit_agent_submissions')
@@ -104,9 +105,12 @@ const SubmitForReview = ({
         };
       });
 
+      // One row per item: an upsert may not touch the same key twice
+      const uniqueRecords = [...new Map(recordsToInsert.map(r => [r.audit_item_id, r])).values()];
+
       const { error: dbError } = await supabase
         .from('audit_agent_submissions')
-        .insert(recordsToInsert);
+        .upsert(uniqueRecords, { onConflict: 'session_id,audit_item_id' });
 
       if (dbError) throw new Error(`Database Save Failed: ${dbError.message}`);
 
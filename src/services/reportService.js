@@ -1,134 +1,198 @@
 import { supabase } from './supabaseClient';
 
+const AI_AGENT_URL = import.meta.env.VITE_AI_AGENT_URL || 'http://localhost:8000';
+
+const EMPTY_SUMMARY = {
+  overall_compliance: 0,
+  critical_risk_count: 0,
+  total_score: 0,
+  total_items: 0,
+  applicable_items: 0,
+  compliant_items: 0,
+  non_compliant_items: 0,
+  not_applicable_items: 0,
+};
+
 /**
- * Fetch and aggregate audit session data into a structured report
+ * Fetch the structured report for an audit session
+ *
+ * Summary and per-agent figures are precomputed by the orchestrator
+ * (GET /sessions/:id/report), so only one page of raw rows is transferred.
+ * Sessions the orchestrator has no aggregates for (everything audited
+ * before it kept them, or saved only through SubmitForReview), and any
+ * failure to reach it, fall back to aggregating audit_agent_submissions
+ * from Supabase in the browser.
  * @param {string} sessionId - The audit session ID
+ * @param {Object} [options]
+ * @param {number} [options.limit=100] - Raw rows per page (0 for the summary only)
+ * @param {string} [options.cursor] - next_cursor from the previous page
  * @returns {Promise<Object|null>} Structured report object or null on error
  */
-export async function fetchAuditSessionReport(sessionId) {
+export async function fetchAuditSessionReport(sessionId, { limit = 100, cursor = null } = {}) {
   try {
-    // Fetch all audit agent submissions for this session
-    const { data: submissions, error } = await supabase
-      .from('audit_agent_submissions')
-      .select('*')
-      .eq('session_id', sessionId);
+    const report = await fetchPrecomputedReport(sessionId, { limit, cursor });
 
-    if (error) {
-      console.error('[Report Service] Supabase query error:', error);
-      return null;
-    }
+    if (report && report.summary && report.summary.total_items > 0) {
+      console.log('[Report Service] Report loaded successfully:', {
+        session_id: sessionId,
+        total_items: report.summary.total_items,
+        agents: Object.keys(report.agent_breakdown).length,
+        rows: report.raw_details.length,
+      });
 
-    if (!submissions || submissions.length === 0) {
-      console.warn('[Report Service] No submissions found for session:', sessionId);
       return {
-        summary: {
-          overall_compliance: 0,
-          critical_risk_count: 0,
-          total_score: 0,
-          total_items: 0,
-          applicable_items: 0,
-          compliant_items: 0,
-        },
-        agent_breakdown: {},
-        raw_details: [],
+        summary: report.summary,
+        agent_breakdown: report.agent_breakdown,
+        raw_details: report.raw_details,
+        next_cursor: report.next_cursor,
       };
     }
 
-    // Calculate KPIs
-    const applicableItems = submissions.filter(
-      (item) => item.status !== 'Not Applicable'
-    );
-    const compliantItems = submissions.filter(
-      (item) => item.status === 'Compliant'
-    );
-    const criticalRiskNonCompliant = submissions.filter(
-      (item) => item.risk_level === 'Critical' && item.status === 'Non-Compliant'
-    );
-
-    // Calculate overall compliance percentage
-    const overallCompliance = applicableItems.length > 0
-      ? Math.round((compliantItems.length / applicableItems.length) * 100)
-      : 0;
-
-    // Calculate total score (average of all ai_score values)
-    const scoresWithValues = submissions.filter((item) => item.ai_score != null);
-    const totalScore = scoresWithValues.length > 0
-      ? Math.round(
-          scoresWithValues.reduce((sum, item) => sum + item.ai_score, 0) / scoresWithValues.length
-        )
-      : 0;
-
-    // Group results by ai_agent_name (Multi-Agent Support)
-    const agentBreakdown = {};
-
-    submissions.forEach(item => {
-      const agentName = item.ai_agent_name || 'Unknown_Agent';
-
-      if (!agentBreakdown[agentName]) {
-        agentBreakdown[agentName] = {
-          score: 0,
-          issues: 0,
-          items: [],
-          total_items: 0,
-          score_count: 0,
-        };
-      }
-
-      agentBreakdown[agentName].items.push(item);
-      agentBreakdown[agentName].total_items++;
-
-      // Track score for averaging
-      if (item.ai_score != null) {
-        agentBreakdown[agentName].score += item.ai_score;
-        agentBreakdown[agentName].score_count++;
-      }
-
-      // Count issues (non-compliant items)
-      if (item.status === 'Non-Compliant') {
-        agentBreakdown[agentName].issues++;
-      }
-    });
+    return await fetchSupabaseReport(sessionId, { limit, cursor });
 
-    // Calculate average scores for each agent
-    Object.keys(agentBreakdown).forEach(agentName => {
-      const agent = agentBreakdown[agentName];
-      agent.score = agent.score_count > 0
-        ? Math.round(agent.score / agent.score_count)
-        : 0;
-      // Clean up temporary counter
-      delete agent.score_count;
-    });
+  } catch (error) {
+    console.error('[Report Service] Unexpected error:', error);
+    return null;
+  }
+}
 
-    // Build and return the structured report
-    const report = {
-      summary: {
-        overall_compliance: overallCompliance,
-        critical_risk_count: criticalRiskNonCompliant.length,
-        total_score: totalScore,
-        total_items: submissions.length,
-        applicable_items: applicableItems.length,
-        compliant_items: compliantItems.length,
-        non_compliant_items: submissions.filter((item) => item.status === 'Non-Compliant').length,
-        not_applicable_items: submissions.filter((item) => item.status === 'Not Applicable').length,
-      },
-      agent_breakdown: agentBreakdown,
-      raw_details: submissions,
-    };
+/**
+ * Precomputed report from the orchestrator, or null when it cannot be reached
+ */
+async function fetchPrecomputedReport(sessionId, { limit, cursor }) {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
 
-    console.log('[Report Service] Report generated successfully:', {
-      session_id: sessionId,
-      total_items: report.summary.total_items,
-      agents: Object.keys(agentBreakdown).length,
-    });
+  try {
+    const response = await fetch(
+      `${AI_AGENT_URL}/sessions/${encodeURIComponent(sessionId)}/report?${params}`
+    );
 
-    return report;
+    if (!response.ok) {
+      console.warn('[Report Service] Report request failed:', response.status);
+      return null;
+    }
 
+    return await response.json();
   } catch (error) {
-    console.error('[Report Service] Unexpected error:', error);
+    console.warn('[Report Service] Orchestrator unreachable, using Supabase:', error);
     return null;
   }
 }
 
+/**
+ * Report aggregated from the session's audit_agent_submissions rows
+ *
+ * Same shape and figures as the orchestrator's report; raw rows are paged
+ * in audit_item_id order with the last id as the cursor.
+ */
+async function fetchSupabaseReport(sessionId, { limit, cursor }) {
+  const { data: submissions, error } = await supabase
+    .from('audit_agent_submissions')
+    .select('*')
+    .eq('session_id', sessionId)
+    .order('audit_item_id', { ascending: true });
+
+  if (error) {
+    console.error('[Report Service] Supabase query error:', error);
+    return null;
+  }
+
+  if (!submissions || submissions.length === 0) {
+    console.warn('[Report Service] No submissions found for session:', sessionId);
+    return {
+      summary: { ...EMPTY_SUMMARY },
+      agent_breakdown: {},
+      raw_details: [],
+      next_cursor: null,
+    };
+  }
+
+  const report = aggregateSubmissions(submissions);
+  const remaining = cursor
+    ? submissions.filter((item) => String(item.audit_item_id) > cursor)
+    : submissions;
+  const rawDetails = remaining.slice(0, limit);
+  const nextCursor = limit > 0 && remaining.length > limit
+    ? String(rawDetails[rawDetails.length - 1].audit_item_id)
+    : null;
+
+  console.log('[Report Service] Report aggregated from Supabase:', {
+    session_id: sessionId,
+    total_items: report.summary.total_items,
+    agents: Object.keys(report.agent_breakdown).length,
+    rows: rawDetails.length,
+  });
+
+  return { ...report, raw_details: rawDetails, next_cursor: nextCursor };
+}
+
+/**
+ * Summary and per-agent figures over a session's rows (as in session_aggregates.py)
+ */
+function aggregateSubmissions(submissions) {
+  const applicableItems = submissions.filter((item) => item.status !== 'Not Applicable');
+  const compliantItems = submissions.filter((item) => item.status === 'Compliant');
+  const nonCompliantItems = submissions.filter((item) => item.status === 'Non-Compliant');
+  const criticalRiskNonCompliant = nonCompliantItems.filter((item) => item.risk_level === 'Critical');
+
+  const overallCompliance = applicableItems.length > 0
+    ? Math.round((compliantItems.length / applicableItems.length) * 100)
+    : 0;
+
+  const scoresWithValues = submissions.filter((item) => item.ai_score != null);
+  const totalScore = scoresWithValues.length > 0
+    ? Math.round(
+        scoresWithValues.reduce((sum, item) => sum + Number(item.ai_score), 0) / scoresWithValues.length
+      )
+    : 0;
+
+  // Group results by ai_agent_name (Multi-Agent Support)
+  const agents = {};
+  submissions.forEach((item) => {
+    const agentName = item.ai_agent_name || 'Unknown_Agent';
+    const agent = agents[agentName] || (agents[agentName] = {
+      score_sum: 0,
+      score_count: 0,
+      issues: 0,
+      total_items: 0,
+    });
+    agent.total_items++;
+    if (item.ai_score != null) {
+      agent.score_sum += Number(item.ai_score);
+      agent.score_count++;
+    }
+    if (item.status === 'Non-Compliant') {
+      agent.issues++;
+    }
+  });
+
+  const agentBreakdown = {};
+  Object.entries(agents).forEach(([agentName, agent]) => {
+    agentBreakdown[agentName] = {
+      score: agent.score_count > 0 ? Math.round(agent.score_sum / agent.score_count) : 0,
+      issues: agent.issues,
+      total_items: agent.total_items,
+    };
+  });
+
+  return {
+    summary: {
+      overall_compliance: overallCompliance,
+      critical_risk_count: criticalRiskNonCompliant.length,
+      total_score: totalScore,
+      total_items: submissions.length,
+      applicable_items: applicableItems.length,
+      compliant_items: compliantItems.length,
+      non_compliant_items: nonCompliantItems.length,
+      not_applicable_items: submissions.length - applicableItems.length,
+    },
+    agent_breakdown: agentBreakdown,
+  };
+}
+
 /**
  * Fetch all submitted/completed audit sessions
  * @returns {Promise<Array>} Array of session summary objects sorted by date descending
@@ -0,0 +1,26 @@
+"""
+Shared test setup: keep the app modules' stores out of the working tree
+
+The app modules open their SQLite stores on import, at paths read from the
+environment, so the paths are pointed at a temporary directory before any
+test module imports them. Findings persistence and evidence prefetch stay
+off (no PostgREST or evidence host in tests).
+"""
+
+from pathlib import Path
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_data_dir = Path(tempfile.mkdtemp())
+os.environ.update({
+    'SESSION_STORE_PATH': str(_data_dir / 'sessions.db'),
+    'JOB_STORE_PATH': str(_data_dir / 'jobs.db'),
+    'BATCH_VERSION_STORE_PATH': str(_data_dir / 'batches.db'),
+    'EVIDENCE_CACHE_DIR': str(_data_dir / 'evidence'),
+    'FINDING_CACHE_PATH': '',
+    'EVIDENCE_PREFETCH': '0',
+    'FINDINGS_PERSIST': '0',
+})
@@ -0,0 +1,131 @@
+"""
+Admission controller: queue races, head-of-line dispatch, client budgets
+
+Usage:
+python -m pytest tests/test_admission.py
+"""
+
+import asyncio
+
+import pytest
+
+from admission import (
+    AdmissionController, AdmissionRejected, retry_after_seconds, CLIENT_BUDGET, SATURATED, QUEUE_TIMEOUT,
+    MIN_RETRY_AFTER_SECONDS, MAX_RETRY_AFTER_SECONDS, DEFAULT_RETRY_AFTER_SECONDS,
+)
+
+
+async def settle():
+    """Let queued tasks run up to their next wait"""
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def test_cancel_after_admission_releases_the_ticket():
+    async def run():
+        controller = AdmissionController('test', max_items=10, client_max_items=10, queue_items=10)
+        holder = await controller.acquire('a', 10)
+        waiter = asyncio.ensure_future(controller.acquire('b', 4))
+        await settle()
+        assert controller.queued_items == 4
+
+        # Cancelled, then admitted before the waiter resumes: "Admitted just as the wait ended"
+        waiter.cancel()
+        holder.release()
+        assert controller.running_items == 4
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert controller.running_items == 0
+        assert controller.queued_items == 0
+        assert controller._outstanding == {}
+
+    asyncio.run(run())
+
+
+def test_queue_timeout_rejects_and_forgets_the_waiter():
+    async def run():
+        controller = AdmissionController('test', max_items=10, client_max_items=20, queue_items=10, queue_timeout=0.01)
+        holder = await controller.acquire('a', 10)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire('b', 5)
+        assert rejected.value.reason == QUEUE_TIMEOUT
+        assert controller.queued_items == 0
+        assert controller._outstanding == {'a': 10}
+        holder.release()
+        assert controller._outstanding == {}
+
+    asyncio.run(run())
+
+
+def test_cancelled_head_lets_the_next_waiter_in():
+    async def run():
+        controller = AdmissionController('test', max_items=10, client_max_items=10, queue_items=20)
+        holder = await controller.acquire('a', 6)
+        head = asyncio.ensure_future(controller.acquire('b', 8, priority=0))
+        await settle()
+        # Fits the budget, but waits behind the head: no slipping past it
+        behind = asyncio.ensure_future(controller.acquire('c', 2, priority=1))
+        await settle()
+        assert not behind.done()
+        assert controller.queued_items == 10
+
+        head.cancel()
+        await settle()
+        assert behind.done()
+        assert controller.running_items == 8
+        assert controller.queued_items == 0
+
+        behind.result().release()
+        holder.release()
+        assert controller.running_items == 0
+
+    asyncio.run(run())
+
+
+def test_client_budget_counts_running_and_queued_items():
+    async def run():
+        controller = AdmissionController('test', max_items=3, client_max_items=5, queue_items=10)
+        running = await controller.acquire('x', 3)
+        queued = asyncio.ensure_future(controller.acquire('x', 2))
+        await settle()
+        assert controller._outstanding == {'x': 5}
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire('x', 1)
+        assert rejected.value.reason == CLIENT_BUDGET
+        # Another client is only limited by the shared budgets
+        other = asyncio.ensure_future(controller.acquire('y', 1))
+        await settle()
+
+        queued.cancel()
+        await settle()
+        assert controller._outstanding == {'x': 3, 'y': 1}
+        again = asyncio.ensure_future(controller.acquire('x', 2))
+        await settle()
+
+        running.release()
+        await settle()
+        for task in (other, again):
+            task.result().release()
+        assert controller._outstanding == {}
+        assert controller.running_items == 0
+
+    asyncio.run(run())
+
+
+def test_retry_after_is_bounded():
+    assert retry_after_seconds(100, 0) == DEFAULT_RETRY_AFTER_SECONDS
+    assert retry_after_seconds(1, 1000) == MIN_RETRY_AFTER_SECONDS
+    assert retry_after_seconds(10 ** 9, 1) == MAX_RETRY_AFTER_SECONDS
+    assert retry_after_seconds(30, 2) == 15
+
+    async def run():
+        controller = AdmissionController('test', max_items=10, client_max_items=100, queue_items=0)
+        await controller.acquire('a', 10)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire('b', 10)
+        assert rejected.value.reason == SATURATED
+        assert MIN_RETRY_AFTER_SECONDS <= rejected.value.retry_after <= MAX_RETRY_AFTER_SECONDS
+
+    asyncio.run(run())
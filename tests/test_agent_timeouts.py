@@ -0,0 +1,57 @@
+"""
+Specialist agent timeouts: blocking agents keep their thread until they return
+
+Usage:
+python -m pytest tests/test_agent_timeouts.py
+"""
+
+import asyncio
+import threading
+import time
+
+import MASTER_AUDIT_ORCHESTRATOR_EXAMPLE as orchestrator
+
+ITEMS = [{'audit_item_id': 'W-1', 'intern_verdict': 'Compliant'}]
+
+
+def wait_until(condition, seconds: float = 2.0):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_timed_out_blocking_agent_is_counted_until_its_thread_returns():
+    release = threading.Event()
+    started = threading.Event()
+
+    def hung_agent(agent_name, items, context):
+        started.set()
+        release.wait(5)
+        return {'findings': []}
+
+    abandoned = orchestrator.AGENT_THREADS_ABANDONED.value()
+    result = asyncio.run(orchestrator.invoke_specialist_agent_async(
+        'Wages_Agent', ITEMS, {'act_id': 'wages'}, agent_fn=hung_agent, timeout=0.05
+    ))
+
+    assert result is None
+    assert started.is_set()
+    assert orchestrator.AGENT_THREADS_ABANDONED.value() - abandoned == 1
+    release.set()
+    assert wait_until(lambda: orchestrator.AGENT_THREADS_ABANDONED.value() == abandoned)
+
+
+def test_blocking_agent_that_finishes_in_time_is_not_counted():
+    abandoned = orchestrator.AGENT_THREADS_ABANDONED.value()
+    result = asyncio.run(orchestrator.invoke_specialist_agent_async(
+        'Wages_Agent', ITEMS, {'act_id': 'wages'}, agent_fn=lambda *args: {'findings': []}, timeout=5
+    ))
+
+    assert result == {'findings': []}
+    assert orchestrator.AGENT_THREADS_ABANDONED.value() == abandoned
+
+
+def test_agent_pool_has_headroom_for_abandoned_threads():
+    assert orchestrator.AGENT_EXECUTOR_THREADS >= orchestrator.AGENT_CONCURRENCY_LIMIT
+    assert orchestrator._agent_executor._max_workers == orchestrator.AGENT_EXECUTOR_THREADS
@@ -0,0 +1,52 @@
+"""
+Audit logging queue handler
+
+Usage:
+python -m pytest tests/test_audit_logging.py
+"""
+
+import io
+import logging
+import os
+import sys
+
+from audit_logging import AuditQueueHandler, StderrHandler, LOG_RECORDS_DROPPED
+
+
+def make_record(level: int, msg: str = 'message') -> logging.LogRecord:
+    return logging.LogRecord('test', level, __file__, 1, msg, None, None)
+
+
+def test_full_queue_drops_only_records_below_warning():
+    handler = AuditQueueHandler(logging.NullHandler(), maxsize=2)
+    handler._writer_pid = os.getpid()  # no writer thread: keep records queued
+    dropped = LOG_RECORDS_DROPPED.value()
+    for level in (logging.INFO, logging.INFO, logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR):
+        handler.enqueue(make_record(level))
+
+    assert [record.levelno for record in handler.queue] == [logging.INFO, logging.INFO, logging.WARNING, logging.ERROR]
+    assert LOG_RECORDS_DROPPED.value() - dropped == 2
+
+
+def test_stderr_handler_writes_to_current_stderr(monkeypatch):
+    handler = StderrHandler()
+    first, second = io.StringIO(), io.StringIO()
+    monkeypatch.setattr(sys, 'stderr', first)
+    handler.handle(make_record(logging.WARNING, 'one'))
+    first.close()
+    monkeypatch.setattr(sys, 'stderr', second)
+    handler.handle(make_record(logging.WARNING, 'two'))
+    assert second.getvalue() == 'two\n'
+
+
+def test_importing_the_apps_keeps_root_handlers():
+    root = logging.getLogger()
+    marker = logging.NullHandler()
+    root.addHandler(marker)
+    try:
+        import MASTER_AUDIT_ORCHESTRATOR_EXAMPLE  # noqa: F401
+        import python_ai_agent_example  # noqa: F401
+        assert marker in root.handlers
+        assert not any(isinstance(handler, AuditQueueHandler) for handler in root.handlers)
+    finally:
+        root.removeHandler(marker)
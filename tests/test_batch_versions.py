@@ -0,0 +1,110 @@
+"""
+Batch version store: full submissions, deltas and item positions
+
+Usage:
+python -m pytest tests/test_batch_versions.py
+"""
+
+import pytest
+
+from batch_versions import BatchVersionStore, StaleBaseError
+
+
+def item(item_id: str, verdict: str = 'Compliant') -> dict:
+    return {'audit_item_id': item_id, 'intern_verdict': verdict}
+
+
+def batch(*items, **header) -> dict:
+    return {'batch_id': 'BATCH-1', 'session_id': 'SESSION-1', **header, 'audit_items': list(items)}
+
+
+def positions(store: BatchVersionStore) -> dict:
+    return {
+        row['audit_item_id']: row['position']
+        for row in store._conn.execute("SELECT audit_item_id, position FROM batch_items WHERE batch_id = 'BATCH-1'")
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BatchVersionStore(str(tmp_path / 'batches.db'))
+    yield store
+    store.close()
+
+
+def test_same_content_keeps_the_version(store):
+    assert store.put(batch(item('A'), item('B'))) == 1
+    assert store.put(batch(item('A'), item('B'))) == 1
+    assert store.put(batch(item('A'), item('B', 'Non-Compliant'))) == 2
+
+
+def test_delta_against_a_stale_base_is_rejected(store):
+    store.put(batch(item('A')))
+    store.put(batch(item('A', 'Delayed')))
+
+    with pytest.raises(StaleBaseError) as stale:
+        store.apply_delta({'batch_id': 'BATCH-1', 'base_version': 1, 'changed_items': [item('B')]})
+    assert stale.value.current_version == 2
+
+    with pytest.raises(StaleBaseError) as unknown:
+        store.apply_delta({'batch_id': 'BATCH-2', 'base_version': 1})
+    assert unknown.value.current_version is None
+
+
+def test_retrying_a_delta_returns_the_same_version(store):
+    store.put(batch(item('A'), item('B')))
+    delta = {'batch_id': 'BATCH-1', 'base_version': 1, 'changed_items': [item('B', 'Delayed')],
+             'company_name': 'Acme'}
+
+    first, version, changed = store.apply_delta(delta)
+    retried, retried_version, _ = store.apply_delta(delta)
+
+    assert version == retried_version == 2
+    assert changed == ['B']
+    assert retried == first
+    assert first['company_name'] == 'Acme'
+    assert store.get_version('BATCH-1') == 2
+
+
+def test_delta_keeps_positions_and_appends_new_items(store):
+    store.put(batch(item('A'), item('B'), item('C')))
+    full, _, _ = store.apply_delta({
+        'batch_id': 'BATCH-1', 'base_version': 1,
+        'changed_items': [item('D'), item('B', 'Non-Compliant')],
+        'removed_item_ids': ['A'],
+    })
+
+    assert [entry['audit_item_id'] for entry in full['audit_items']] == ['B', 'C', 'D']
+    assert full['audit_items'][0]['intern_verdict'] == 'Non-Compliant'
+    assert positions(store) == {'B': 1, 'C': 2, 'D': 3}
+
+
+def test_resubmission_writes_only_changed_rows(store):
+    store.put(batch(item('A'), item('B'), item('C'), item('D')))
+    written = []
+    store._conn.set_trace_callback(
+        lambda sql: written.append(sql) if sql.startswith(('INSERT', 'DELETE')) and 'batch_items' in sql else None
+    )
+    # B changed, C removed, E appended: A and D keep their stored rows
+    store.put(batch(item('A'), item('B', 'Delayed'), item('D'), item('E')))
+    store._conn.set_trace_callback(None)
+
+    assert len(written) == 3
+    assert positions(store) == {'A': 0, 'B': 1, 'D': 3, 'E': 4}
+
+
+def test_reordered_resubmission_is_renumbered(store):
+    store.put(batch(item('A'), item('B'), item('C')))
+    store.put(batch(item('C'), item('A'), item('B')))
+    assert positions(store) == {'C': 0, 'A': 1, 'B': 2}
+
+    full, _, _ = store.apply_delta({'batch_id': 'BATCH-1', 'base_version': 2})
+    assert [entry['audit_item_id'] for entry in full['audit_items']] == ['C', 'A', 'B']
+
+
+def test_later_duplicate_of_an_item_wins(store):
+    store.put(batch(item('A'), item('B'), item('A', 'Delayed')))
+    full, _, _ = store.apply_delta({'batch_id': 'BATCH-1', 'base_version': 1})
+    assert [(entry['audit_item_id'], entry['intern_verdict']) for entry in full['audit_items']] == [
+        ('B', 'Compliant'), ('A', 'Delayed')
+    ]
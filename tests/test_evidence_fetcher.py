@@ -0,0 +1,84 @@
+"""
+Evidence fetcher against a local stand-in (httpx.MockTransport)
+
+Usage:
+python -m pytest tests/test_evidence_fetcher.py
+"""
+
+import asyncio
+
+import httpx
+
+from evidence_fetcher import EvidenceFetcher, EVIDENCE_FETCHES, BLOCKED, DOWNLOADED, FAILED
+
+HOST = 'evidence.test'
+LICENCE = b'%PDF-1.7 factory licence ' * 100
+
+
+class EvidenceStandIn:
+    """Serves documents by path and records every URL requested"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requested = []
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requested.append(str(request.url))
+        route = self.routes.get(request.url.path)
+        if route is None:
+            return httpx.Response(404)
+        return route(request)
+
+
+def fetch_all(tmp_path, routes, urls, **options):
+    stand_in = EvidenceStandIn(routes)
+
+    async def run():
+        async with httpx.AsyncClient(transport=stand_in.transport()) as client:
+            async with EvidenceFetcher(cache_dir=tmp_path, allowed_hosts=[HOST], client=client, **options) as fetcher:
+                return [await fetcher.fetch(url) for url in urls]
+
+    return asyncio.run(run()), stand_in
+
+
+def test_same_document_is_stored_once(tmp_path):
+    routes = {
+        '/a/licence.pdf': lambda request: httpx.Response(200, content=LICENCE),
+        '/b/licence-copy.pdf': lambda request: httpx.Response(200, content=LICENCE),
+    }
+    downloaded = EVIDENCE_FETCHES.value(outcome=DOWNLOADED)
+    documents, _ = fetch_all(tmp_path, routes, [f"https://{HOST}/a/licence.pdf", f"https://{HOST}/b/licence-copy.pdf"])
+
+    assert EVIDENCE_FETCHES.value(outcome=DOWNLOADED) - downloaded == 2
+    assert documents[0]['sha256'] == documents[1]['sha256']
+    assert documents[0]['size'] == len(LICENCE)
+    objects = [path for path in (tmp_path / 'objects').rglob('*') if path.is_file()]
+    assert len(objects) == 1
+    assert objects[0].read_bytes() == LICENCE
+
+
+def test_document_over_max_bytes_is_rejected(tmp_path):
+    routes = {'/big.pdf': lambda request: httpx.Response(200, content=LICENCE)}
+    failed = EVIDENCE_FETCHES.value(outcome=FAILED)
+    documents, _ = fetch_all(tmp_path, routes, [f"https://{HOST}/big.pdf"], max_bytes=len(LICENCE) - 1)
+
+    assert documents == [None]
+    assert EVIDENCE_FETCHES.value(outcome=FAILED) - failed == 1
+    assert not [path for path in (tmp_path / 'objects').rglob('*') if path.is_file()]
+
+
+def test_redirect_off_the_allowed_hosts_is_refused(tmp_path):
+    routes = {
+        '/moved.pdf': lambda request: httpx.Response(
+            302, headers={'location': 'http://169.254.169.254/latest/meta-data/'}
+        ),
+    }
+    blocked = EVIDENCE_FETCHES.value(outcome=BLOCKED)
+    documents, stand_in = fetch_all(tmp_path, routes, [f"https://{HOST}/moved.pdf"])
+
+    assert documents == [None]
+    assert EVIDENCE_FETCHES.value(outcome=BLOCKED) - blocked == 1
+    assert stand_in.requested == [f"https://{HOST}/moved.pdf"]
@@ -0,0 +1,78 @@
+"""
+FindingsWriter batches and failure handling
+
+Runs the writer against httpx.MockTransport handlers: two audits sharing
+one writer must each flush, wait for and count only their own rows, and
+rows that cannot be encoded or sent must be counted as failed instead of
+failing the audit.
+
+Usage:
+python -m pytest tests/test_findings_writer.py
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from findings_writer import FindingsWriter
+
+REST_URL = 'http://postgrest.test'
+
+
+def make_rows(prefix: str, n: int):
+    return [
+        {'audit_item_id': f"{prefix}-{i:03d}", 'ai_agent_name': 'Test_Agent', 'status': 'Compliant', 'ai_score': 100.0}
+        for i in range(n)
+    ]
+
+
+def test_batches_flush_only_their_own_rows():
+    async def run():
+        slow_release = asyncio.Event()
+        written = []
+
+        async def handle(request: httpx.Request) -> httpx.Response:
+            rows = json.loads(request.content)
+            if rows[0]['session_id'] == 'SLOW':
+                await slow_release.wait()
+            written.extend(rows)
+            return httpx.Response(201)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+            writer = FindingsWriter(base_url=REST_URL, batch_size=10, client=client, retries=0)
+            slow, fast = writer.batch(), writer.batch()
+            slow.add('SLOW', make_rows('S', 25))
+            fast.add('FAST', make_rows('F', 5))
+
+            # The fast audit does not wait for the slow audit's upserts
+            outcome = await asyncio.wait_for(fast.flush(), timeout=1)
+            assert outcome == {'written': 5, 'failed': 0}
+            assert slow.buffered == 5
+
+            slow_release.set()
+            assert await slow.flush() == {'written': 25, 'failed': 0}
+            await writer.aclose()
+        assert len(written) == 30
+
+    asyncio.run(run())
+
+
+def test_errors_are_counted_as_failed():
+    async def run():
+        async def handle(request: httpx.Request) -> httpx.Response:
+            if json.loads(request.content)[0]['session_id'] == 'BROKEN':
+                raise httpx.DecodingError('bad response body', request=request)
+            return httpx.Response(201)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+            async with FindingsWriter(base_url=REST_URL, client=client, retries=1, backoff_seconds=0) as writer:
+                broken, unencodable = writer.batch(), writer.batch()
+                broken.add('BROKEN', make_rows('B', 3))
+                analysis = {}
+                analysis['self'] = analysis
+                unencodable.add('OK', [{**row, 'ai_analysis': analysis} for row in make_rows('U', 2)])
+                assert await broken.flush() == {'written': 0, 'failed': 3}
+                assert await unencodable.flush() == {'written': 0, 'failed': 2}
+
+    asyncio.run(run())
@@ -0,0 +1,174 @@
+"""
+Idempotency cache: coalescing, replay and eviction of failed submissions
+
+Usage:
+python -m pytest tests/test_idempotency.py
+"""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from idempotency import IdempotencyCache, COMPUTED, COALESCED, REPLAYED
+
+PAYLOAD = {'batch_id': 'BATCH-1', 'session_id': 'SESSION-1', 'audit_items': [{'audit_item_id': 'A'}]}
+
+
+def test_concurrent_duplicates_share_one_run():
+    async def run():
+        cache = IdempotencyCache('test')
+        release = asyncio.Event()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return 'job-1'
+
+        first = asyncio.ensure_future(cache.run('BATCH-1', PAYLOAD, compute))
+        # A retry differs only in submitted_at, which is not part of the key
+        second = asyncio.ensure_future(cache.run('BATCH-1', {**PAYLOAD, 'submitted_at': 'later'}, compute))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await first == ('job-1', COMPUTED)
+        assert await second == ('job-1', COALESCED)
+        assert len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_finished_submission_is_replayed_until_its_ttl():
+    async def run():
+        cache = IdempotencyCache('test', ttl_seconds=0.05)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return f"job-{len(calls)}"
+
+        assert await cache.run('BATCH-1', PAYLOAD, compute) == ('job-1', COMPUTED)
+        assert await cache.run('BATCH-1', PAYLOAD, compute) == ('job-1', REPLAYED)
+        # A changed payload under the same batch_id is a new submission
+        changed = {**PAYLOAD, 'company_name': 'Acme'}
+        assert await cache.run('BATCH-1', changed, compute) == ('job-2', COMPUTED)
+
+        time.sleep(0.06)
+        assert await cache.run('BATCH-1', PAYLOAD, compute) == ('job-3', COMPUTED)
+
+    asyncio.run(run())
+
+
+def test_failed_run_is_forgotten_so_a_retry_runs_again():
+    async def run():
+        cache = IdempotencyCache('test')
+        attempts = []
+
+        async def compute():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError('model down')
+            return 'job-2'
+
+        with pytest.raises(RuntimeError):
+            await cache.run('BATCH-1', PAYLOAD, compute)
+        assert len(cache) == 0
+        assert await cache.run('BATCH-1', PAYLOAD, compute) == ('job-2', COMPUTED)
+
+    asyncio.run(run())
+
+
+def test_discard_key_forgets_a_payload_changed_in_place():
+    async def run():
+        cache = IdempotencyCache('test')
+        payload = {**PAYLOAD, 'audit_items': [dict(item) for item in PAYLOAD['audit_items']]}
+
+        async def compute():
+            return 'job-1'
+
+        await cache.run('BATCH-1', payload, compute)
+        key = cache.key('BATCH-1', payload)
+        # Hydration fills in catalogue fields after the key was taken
+        payload['audit_items'][0]['risk_level'] = 'High'
+        cache.discard('BATCH-1', payload)
+        assert len(cache) == 1
+        cache.discard_key(key)
+        assert len(cache) == 0
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def batch_app():
+    """The batch service with its startup hooks run, root logging restored afterwards"""
+    from fastapi.testclient import TestClient
+    import audit_logging
+    import python_ai_agent_example as batch_service
+
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    try:
+        with TestClient(batch_service.app) as client:
+            yield batch_service, client
+    finally:
+        audit_logging.shutdown_logging()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+
+
+def wait_for_job(client, batch_id: str) -> dict:
+    for _ in range(100):
+        status = client.get(f"/batch-status/{batch_id}").json()
+        if status['status'] in ('completed', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"batch {batch_id} did not finish")
+
+
+def test_batch_failing_after_hydration_is_queued_again(batch_app, monkeypatch):
+    batch_service, client = batch_app
+    from act_catalogue import get_catalogue
+
+    entries = list(get_catalogue().entries.values())[:3]
+    batch = {
+        'batch_id': 'BATCH-RETRY',
+        'session_id': 'SESSION-RETRY',
+        'company_name': 'Test Industries',
+        'location': 'Pune, Maharashtra',
+        'submitted_at': '2026-01-01T00:00:00',
+        'audit_items': [
+            {'audit_item_id': entry.audit_item_id, 'intern_verdict': 'Compliant', 'intern_comment': ''}
+            for entry in entries
+        ],
+    }
+    analyze = batch_service.analyze_audit_batch
+    calls = []
+
+    def fails_once(payload):
+        calls.append(1)
+        if len(calls) == 1:
+            # Fail after the items were hydrated in place, like a failure mid-analysis
+            get_catalogue().hydrate(payload['audit_items'])
+            raise RuntimeError('model down')
+        return analyze(payload)
+
+    monkeypatch.setattr(batch_service, 'analyze_audit_batch', fails_once)
+
+    first = client.post('/submit-audit-batch', json=batch)
+    assert wait_for_job(client, 'BATCH-RETRY')['status'] == 'failed'
+    # Cleared by the worker itself, not only by queue_batch's failed-job fallback
+    for _ in range(100):
+        if not len(batch_service.submissions):
+            break
+        time.sleep(0.01)
+    assert len(batch_service.submissions) == 0
+
+    retry = client.post('/submit-audit-batch', json=batch)
+    assert retry.headers['Idempotent-Replayed'] == 'false'
+    assert retry.json()['job_id'] != first.json()['job_id']
+    assert wait_for_job(client, 'BATCH-RETRY')['status'] == 'completed'
@@ -0,0 +1,49 @@
+"""
+Finding cache keys: a resubmitted item only hits the cache when nothing the
+agent copies into its finding has changed
+
+Usage:
+python -m pytest tests/test_result_cache.py
+"""
+
+import asyncio
+
+from act_catalogue import get_catalogue
+from result_cache import finding_key
+import MASTER_AUDIT_ORCHESTRATOR_EXAMPLE as orchestrator
+
+CONTEXT = {'company_name': 'Test Industries', 'location': 'Pune, Maharashtra'}
+
+
+def test_item_metadata_is_part_of_the_key():
+    item = {'audit_item_id': 'W-1', 'intern_verdict': 'Non-Compliant', 'risk_level': 'Low', 'category': 'Wages'}
+    key = finding_key(item, 'Wages_Agent', CONTEXT)
+    assert finding_key(dict(item), 'Wages_Agent', CONTEXT) == key
+    assert finding_key({**item, 'risk_level': 'Critical'}, 'Wages_Agent', CONTEXT) != key
+    assert finding_key({**item, 'category': 'Bonus'}, 'Wages_Agent', CONTEXT) != key
+
+
+def test_changed_risk_level_is_not_replayed_from_the_cache(monkeypatch):
+    entry = next(entry for entry in get_catalogue().entries.values() if entry.partition == 'wages')
+    recorded = []
+    monkeypatch.setattr(
+        orchestrator.session_store, 'record_results', lambda session_id, rows: recorded.extend(rows)
+    )
+
+    def submit(risk_level):
+        recorded.clear()
+        asyncio.run(orchestrator.run_master_audit_async({
+            'batch_id': 'BATCH-RISK', 'session_id': 'SESSION-RISK', **CONTEXT,
+            'audit_items': [{
+                'audit_item_id': entry.audit_item_id,
+                'question_text': entry.question_text,
+                'category': entry.category,
+                'risk_level': risk_level,
+                'intern_verdict': 'Non-Compliant',
+                'intern_comment': 'Registers not maintained',
+            }],
+        }))
+        return [row['risk_level'] for row in recorded]
+
+    assert submit('Low') == ['Low']
+    assert submit('Critical') == ['Critical']